@@ -7,6 +7,7 @@ from typing import List
 import logging
 
 from providers.polygon import polygon_get, POLYGON_BASE
+from data.cache_service import cache_service
 from middleware.auth import get_current_user
 from middleware.rate_limit import limiter
 from fastapi import Request
@@ -74,11 +75,17 @@ async def get_momentum_stocks(
     """
     Get top momentum stocks from Polygon snapshot.
     direction: 'gainers' or 'losers'
+    Responses are cached for seconds during the session and until the
+    next open outside it, when the snapshot doesn't change.
     """
     try:
         if direction not in ("gainers", "losers"):
             direction = "gainers"
 
+        cached = await cache_service.get_snapshot(f"momentum:{direction}")
+        if cached is not None:
+            return cached
+
         # Polygon snapshot endpoint for top gainers/losers
         try:
             data = await polygon_get(
@@ -192,7 +199,10 @@ async def get_momentum_stocks(
             stocks.sort(key=lambda s: s["momentum"], reverse=True)
 
         market_open = market_open_count > len(stocks) // 2 if stocks else False
-        return {"stocks": stocks, "marketOpen": market_open}
+        response = {"stocks": stocks, "marketOpen": market_open}
+        if stocks:
+            await cache_service.set_snapshot(f"momentum:{direction}", response)
+        return response
 
     except Exception as e:
         logger.error(f"Momentum fetch failed: {e}", exc_info=True)
@@ -8,6 +8,7 @@ import logging
 
 from models.user import UserPreferences
 from services.supabase_client import supabase
+from services.watchlist_index import watchlist_index
 from middleware.auth import get_current_user
 
 logger = logging.getLogger(__name__)
@@ -79,6 +80,7 @@ async def create_preferences(
         result = await supabase.table("user_preferences").insert([prefs_data]).execute()
 
         if result:
+            watchlist_index.set_preferences(user_id, result[0])
             return result[0]
         else:
             raise HTTPException(
@@ -117,6 +119,7 @@ async def update_preferences(
         result = await query.execute()
 
         if result:
+            watchlist_index.set_preferences(user_id, result[0])
             return {
                 "success": True,
                 "message": "Preferences updated successfully",
@@ -127,6 +130,8 @@ async def update_preferences(
             preferences["user_id"] = user_id
             preferences["created_at"] = datetime.now(timezone.utc).isoformat()
             result = await supabase.table("user_preferences").insert([preferences]).execute()
+            if result:
+                watchlist_index.set_preferences(user_id, result[0])
             return {
                 "success": True,
                 "message": "Preferences created successfully",
@@ -155,6 +160,7 @@ async def reset_preferences(user: dict = Depends(get_current_user)):
         query = supabase.table("user_preferences").delete()
         query = query.eq("user_id", user_id)
         await query.execute()
+        watchlist_index.set_preferences(user_id, None)
 
         return None  # 204 No Content
 
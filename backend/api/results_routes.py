@@ -21,7 +21,9 @@ async def get_recent_results(
     user: dict = Security(get_current_user, scopes=[])
 ):
     """
-    Fetch recent scan results from Supabase.
+    Fetch current setups from Supabase: each symbol's latest scan, if it
+    was scanned within days_back (a symbol a later scan no longer finds is
+    removed).
 
     - **limit**: Maximum results to return (1-100)
     - **min_score**: Minimum breakout score filter
@@ -32,8 +34,8 @@ async def get_recent_results(
         # Calculate cutoff date
         cutoff_date = datetime.now(timezone.utc) - timedelta(days=days_back)
 
-        # Build query
-        query = supabase.table("breakout_scans").select()
+        # Build query (one row per symbol; served from the score indexes)
+        query = supabase.table("current_setups").select()
         query = query.gte("scanned_at", cutoff_date.isoformat())
 
         if min_score is not None:
@@ -71,7 +73,7 @@ async def get_symbol_results(
     user: dict = Security(get_current_user, scopes=[])
 ):
     """
-    Get scan results for a specific symbol.
+    Get a symbol's scan history (one result per trading session).
 
     - **symbol**: Ticker symbol
     - **limit**: Maximum results to return
@@ -102,13 +104,14 @@ async def get_top_today(
     limit: int = Query(10, ge=1, le=50),
     user: dict = Security(get_current_user, scopes=[])
 ):
-    """Get top-scoring setups from today's scans."""
+    """Get top-scoring setups from today's scans (one per symbol)."""
     try:
         today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
 
-        query = supabase.table("breakout_scans").select()
+        query = supabase.table("current_setups").select()
         query = query.gte("scanned_at", today.isoformat())
         query = query.order("breakout_score", desc=True)
+        query = query.order("scanned_at", desc=True)
         query = query.limit(limit)
 
         results = await query.execute()
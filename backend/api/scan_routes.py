@@ -1,8 +1,12 @@
 from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
 import asyncio
+import json
 import logging
+import time
+import uuid
 from datetime import datetime, timezone
 
 logger = logging.getLogger(__name__)
@@ -19,10 +23,12 @@ class ContentAnalysisRequest(BaseModel):
     text_content: Optional[str] = None
     image_base64: Optional[str] = None
     media_type: str = "image/png"
-from scan.scan_universe import scan_universe, scan_one_symbol, get_symbol_technicals
+from scan.scan_universe import DEFAULT_UNIVERSE, rank_results, scan_universe, scan_universe_stream, scan_one_symbol, get_symbol_technicals
+from scan.scan_one import scan_params_hash
+from config import settings
 from services.save_results import save_scan_results
 from scan.mock_results import get_mock_results
-from services.task_manager import task_manager
+from services.task_manager import task_manager, request_fingerprint
 from services.ai_analysis import get_ai_service
 from middleware.rate_limit import limiter
 from middleware.auth import get_current_user, security
@@ -43,14 +49,16 @@ async def scan_universe_endpoint(
     Requires authentication. Limited to 10 scans per minute.
     """
     try:
+        scanned = None
         if body.use_mock:
             results = await get_mock_results()
         else:
             symbols = body.symbols if body.symbols else None
             results = await scan_universe(symbols)
+            scanned = symbols or DEFAULT_UNIVERSE
 
-        if body.save_to_db and results:
-            background_tasks.add_task(save_scan_results, results)
+        if body.save_to_db and (results or scanned):
+            background_tasks.add_task(save_scan_results, results, scanned)
 
         return ScanResponse(
             success=True,
@@ -64,6 +72,82 @@ async def scan_universe_endpoint(
         raise HTTPException(status_code=500, detail="Scan failed")
 
 
+def _sse(event: str, data: str) -> str:
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+# Saves handed off by streaming scans (referenced until done)
+_background_saves: set = set()
+
+
+async def _save_logged(results, scanned):
+    try:
+        await save_scan_results(results, scanned)
+    except Exception as e:
+        logger.error(f"Saving streamed scan results failed: {e}", exc_info=True)
+
+
+def _save_in_background(results, scanned=None):
+    """Save results on a task of its own, so it outlives the response that found them."""
+    task = asyncio.create_task(_save_logged(results, scanned))
+    _background_saves.add(task)
+    task.add_done_callback(_background_saves.discard)
+
+
+@router.post("/universe/stream")
+@limiter.limit("10/minute", key_func=lambda request: request.client.host)
+async def scan_universe_stream_endpoint(
+    request: Request,
+    body: UniverseScanRequest,
+    user: dict = Depends(get_current_user)
+):
+    """
+    Scan multiple symbols, streaming results as Server-Sent Events.
+    Emits a `result` event per setup as soon as it passes filters, a
+    `progress` event ({done, total, found}) per finished symbol, then `done`
+    ({count, total}) or `error`. Results arrive unsorted.
+    Requires authentication. Limited to 10 scans per minute.
+    """
+    async def events():
+        found = []
+        scanned = None
+        try:
+            if body.use_mock:
+                mock = await get_mock_results()
+                for i, result in enumerate(mock, 1):
+                    found.append(result)
+                    yield _sse("result", result.model_dump_json())
+                    yield _sse("progress", json.dumps({"done": i, "total": len(mock), "found": len(found)}))
+                total = len(mock)
+            else:
+                symbols = body.symbols if body.symbols else None
+                total = 0
+                async for update in scan_universe_stream(symbols):
+                    if update.result:
+                        found.append(update.result)
+                        yield _sse("result", update.result.model_dump_json())
+                    total = update.total
+                    yield _sse("progress", json.dumps({"done": update.done, "total": update.total, "found": len(found)}))
+                scanned = symbols or DEFAULT_UNIVERSE
+
+            # Hand the save off before `done`: clients usually disconnect on
+            # it, which cancels this generator
+            if body.save_to_db and (found or scanned):
+                _save_in_background(found, scanned)
+
+            yield _sse("done", json.dumps({"count": len(found), "total": total}))
+        except Exception as e:
+            logger.error(f"Streaming universe scan failed: {e}", exc_info=True)
+            yield _sse("error", json.dumps({"detail": "Scan failed"}))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/symbol", response_model=ScanResponse)
 @limiter.limit("30/minute", key_func=lambda request: request.client.host)
 async def scan_symbol_endpoint(
@@ -108,31 +192,84 @@ async def scan_universe_background(
     """
     Start universe scan as background task.
     Requires authentication. Limited to 5 background scans per minute.
-    Returns task_id to check status later.
+    Returns task_id to check status later. An identical request (same
+    symbol set and options) that is still running, or finished within
+    SCAN_DEDUP_WINDOW seconds, returns that scan's task_id instead.
     """
-    task_id = f"scan_{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}_{id(body)}"
+    symbols = body.symbols if body.symbols else None
+    fingerprint = request_fingerprint(
+        "universe_scan",
+        symbols or DEFAULT_UNIVERSE,
+        use_mock=body.use_mock,
+        save_to_db=body.save_to_db,
+        scan_params=scan_params_hash(),
+    )
+    task_id = f"scan_{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:12]}"
+
+    task, created = await task_manager.get_or_create_task(
+        task_id, fingerprint, settings.SCAN_DEDUP_WINDOW, {"type": "universe_scan"},
+        owner=user["user_id"],
+    )
+    if not created:
+        return {
+            "task_id": task.task_id,
+            "status": task.status,
+            "message": "Identical scan already started; attached to it"
+        }
 
     async def background_scan():
+        async with task_manager.heartbeat(task_id):
+            await run_scan()
+
+    async def run_scan():
         try:
-            task_manager.start_task(task_id)
+            if await task_manager.is_cancelled(task_id):
+                await task_manager.mark_cancelled(task_id)
+                return
+            await task_manager.start_task(task_id)
 
+            scanned = None
             if body.use_mock:
                 results = await get_mock_results()
             else:
-                symbols = body.symbols if body.symbols else None
-                results = await scan_universe(symbols)
-
-            if body.save_to_db and results:
-                await save_scan_results(results)
-
-            task_manager.complete_task(task_id, {
+                # Record progress and check for cancellation every
+                # TASK_PROGRESS_EVERY symbols or TASK_PROGRESS_INTERVAL
+                # seconds, not once per symbol (each is a store round trip)
+                found, unreported = [], []
+                reported, reported_at = 0, time.monotonic()
+                stream = scan_universe_stream(symbols)
+                async for update in stream:
+                    if update.result:
+                        found.append((update.index, update.result))
+                        unreported.append(update.result)
+                    if (
+                        update.done < update.total
+                        and update.done - reported < settings.TASK_PROGRESS_EVERY
+                        and time.monotonic() - reported_at < settings.TASK_PROGRESS_INTERVAL
+                    ):
+                        continue
+                    await task_manager.update_progress(task_id, update.done, update.total, unreported)
+                    unreported, reported, reported_at = [], update.done, time.monotonic()
+                    if await task_manager.is_cancelled(task_id):
+                        break
+                await stream.aclose()
+
+                if await task_manager.is_cancelled(task_id):
+                    await task_manager.mark_cancelled(task_id)
+                    return
+                results = rank_results(found)
+                scanned = symbols or DEFAULT_UNIVERSE
+
+            if body.save_to_db and (results or scanned):
+                await save_scan_results(results, scanned)
+
+            await task_manager.complete_task(task_id, {
                 "results": results,
                 "count": len(results)
             })
         except Exception as e:
-            task_manager.fail_task(task_id, str(e))
+            await task_manager.fail_task(task_id, str(e))
 
-    task_manager.create_task(task_id, {"type": "universe_scan"})
     asyncio.create_task(background_scan())
 
     return {
@@ -153,7 +290,7 @@ async def get_scan_status(
     Check status of background scan task.
     Requires authentication. Limited to 60 requests per minute.
     """
-    task = task_manager.get_task(task_id)
+    task = await task_manager.get_task(task_id)
 
     if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
@@ -163,16 +300,49 @@ async def get_scan_status(
     if task.result and isinstance(task.result, dict):
         results = task.result.get("results")
         count = task.result.get("count", 0)
+    elif task.partial_results:
+        results = task.partial_results
+        count = len(results)
 
     return ScanStatusResponse(
         task_id=task_id,
         status=task.status,
         results=results,
         count=count,
-        error=task.error
+        error=task.error,
+        progress=task.progress or None
     )
 
 
+@router.post("/cancel/{task_id}")
+@limiter.limit("30/minute")
+async def cancel_scan(
+    request: Request,
+    task_id: str,
+    user: dict = Depends(get_current_user)
+):
+    """
+    Cancel a pending or running background scan you started or attached to.
+    If other users' identical requests are attached to the same scan, you
+    are only detached and it keeps running for them. Otherwise the scan
+    stops at its next progress update (within about a second); results
+    reported so far stay available from /status/{task_id}.
+    Requires authentication. Limited to 30 requests per minute.
+    """
+    task, cancelling = await task_manager.cancel_task(task_id, user["user_id"])
+
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    if cancelling:
+        status, message = "cancelling", "Cancellation requested"
+    elif task.status in ("pending", "running"):
+        status, message = "detached", "Detached; other users are still waiting on this scan"
+    else:
+        status, message = task.status, f"Task already {task.status}"
+    return {"task_id": task_id, "status": status, "message": message}
+
+
 @router.post("/symbol/ai")
 @limiter.limit("10/minute", key_func=lambda request: request.client.host)
 async def ai_scan_symbol(
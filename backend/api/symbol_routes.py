@@ -6,6 +6,8 @@ import logging
 from schemas.api_models import SymbolInfo, validate_symbol_path
 from providers.polygon import get_market_cap_usd, get_daily_candles
 from middleware.auth import get_current_user
+from data.cache_service import cache_service
+from utils.market_calendar import DAILY_BARS
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +26,25 @@ async def get_universe(user: dict = Security(get_current_user, scopes=[])):
     return DEFAULT_UNIVERSE
 
 
+async def _load_symbol_info(symbol: str) -> dict:
+    # Fetch market cap
+    market_cap = await get_market_cap_usd(symbol)
+
+    # Fetch recent price data
+    from_date = datetime.now(timezone.utc) - timedelta(days=5)
+    to_date = datetime.now(timezone.utc)
+    candles = await get_daily_candles(symbol, from_date, to_date)
+
+    current_price = float(candles.c[-1]) if len(candles) else None
+
+    return SymbolInfo(
+        symbol=symbol,
+        market_cap=market_cap,
+        current_price=current_price,
+        data_available=len(candles) > 0
+    ).model_dump(mode="json")
+
+
 @router.get("/{symbol}/info", response_model=SymbolInfo)
 async def get_symbol_info(
     symbol: str,
@@ -31,27 +52,17 @@ async def get_symbol_info(
 ):
     """
     Get basic information about a symbol.
+    Served stale-while-revalidate: a cached copy is returned immediately
+    and refreshed in the background once past the daily-bar expiry.
 
     - **symbol**: Ticker symbol
     """
     symbol = validate_symbol_path(symbol)
     try:
-        # Fetch market cap
-        market_cap = await get_market_cap_usd(symbol)
-
-        # Fetch recent price data
-        from_date = datetime.now(timezone.utc) - timedelta(days=5)
-        to_date = datetime.now(timezone.utc)
-        candles = await get_daily_candles(symbol, from_date, to_date)
-
-        current_price = candles[-1].c if candles else None
-
-        return SymbolInfo(
-            symbol=symbol,
-            market_cap=market_cap,
-            current_price=current_price,
-            data_available=len(candles) > 0
+        info = await cache_service.get_or_revalidate(
+            f"symbol_info:{symbol}", lambda: _load_symbol_info(symbol), kind=DAILY_BARS
         )
+        return SymbolInfo(**info)
 
     except Exception as e:
         logger.error(f"Get symbol info failed for {symbol}: {e}", exc_info=True)
@@ -76,7 +87,7 @@ async def validate_symbols(
             from_date = datetime.now(timezone.utc) - timedelta(days=5)
             to_date = datetime.now(timezone.utc)
             candles = await get_daily_candles(symbol.upper(), from_date, to_date)
-            if candles and len(candles) > 0:
+            if len(candles) > 0:
                 valid.append(symbol)
             else:
                 invalid.append(symbol)
@@ -10,6 +10,7 @@ import logging
 from models.user import Watchlist, WatchlistCreate, WatchlistUpdate
 from schemas.api_models import validate_symbol_path
 from services.supabase_client import supabase
+from services.watchlist_index import watchlist_index
 from providers.polygon import polygon_get, POLYGON_BASE
 from middleware.auth import get_current_user, security
 
@@ -122,6 +123,9 @@ async def add_to_watchlist(
         result = await supabase.table("watchlist_items").insert([watchlist_data]).execute()
 
         if result and len(result) > 0:
+            if item.alert_enabled:
+                await watchlist_index.ensure_preferences(user_id)
+                watchlist_index.add(user_id, symbol)
             return result[0]
         else:
             raise HTTPException(
@@ -173,6 +177,10 @@ async def update_watchlist_item(
         )
 
         if result:
+            if update.alert_enabled is not None:
+                if update.alert_enabled:
+                    await watchlist_index.ensure_preferences(user_id)
+                watchlist_index.set_alert(user_id, symbol, update.alert_enabled)
             return {
                 "success": True,
                 "message": f"Updated watchlist for {symbol}",
@@ -211,6 +219,7 @@ async def remove_from_watchlist(
             .eq("symbol", symbol)
             .execute()
         )
+        watchlist_index.remove(user_id, symbol)
 
         return None
 
@@ -8,6 +8,14 @@ from config import settings
 from api import scan_routes, symbol_routes, results_routes, watchlist_routes, preferences_routes, subscription_routes, momentum_routes, ai_routes, snaptrade_routes, training_routes, trade_routes, push_routes
 from middleware.error_handler import register_error_handlers
 from middleware.rate_limit import setup_rate_limiting
+from providers import polygon
+from scan.cpu_pool import shutdown_process_pool
+from data.cache_service import cache_service
+from services.supabase_client import supabase
+from services.notification_service import notification_queue
+from services.save_results import scan_write_buffer
+from services.watchlist_index import watchlist_index
+from services.task_manager import task_manager
 
 # Configure logging
 logging.basicConfig(
@@ -24,11 +32,25 @@ async def lifespan(app: FastAPI):
     logger.info("Starting Stock Scanner API...")
     logger.info(f"Polygon API: {'Configured' if settings.POLYGON_API_KEY else 'Missing'}")
     logger.info(f"Supabase: {'Configured' if os.getenv('SUPABASE_URL') else 'Missing'}")
+    await polygon.open_session()
+    await cache_service.connect()
+    await task_manager.connect()
+    supabase.open()
+    await notification_queue.start()
+    await watchlist_index.start()
 
     yield
 
     # Shutdown
     logger.info("Shutting down Stock Scanner API...")
+    await watchlist_index.stop()
+    await notification_queue.stop(drain=True, timeout=10)
+    await scan_write_buffer.close()
+    await polygon.close_session()
+    await cache_service.close()
+    await task_manager.close()
+    await supabase.close()
+    shutdown_process_pool()
 
 
 app = FastAPI(
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark: candle-series cache encoding and the in-process LRU tier.
+
+Compares the JSON text a cached series used to take (a list of candle
+dicts) with the binary column encoding, then times a local-tier hit against
+a Redis round trip (the latter only if REDIS_URL is reachable).
+
+Usage (from backend/):
+    python -m benchmarks.bench_cache [--symbols 500] [--days 420]
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+os.environ.setdefault("POLYGON_API_KEY", "benchmark")
+
+import numpy as np
+
+from benchmarks.synthetic import make_series
+from data.cache_service import CacheService, decode_value, encode_value
+from models.candle import CandleSeries
+
+
+def per_call_us(fn, keys) -> float:
+    start = time.perf_counter()
+    for k in keys:
+        fn(k)
+    return (time.perf_counter() - start) / len(keys) * 1e6
+
+
+async def run(symbols: int, days: int):
+    universe = {f"candles:SYM{i}": make_series(days, seed=i) for i in range(symbols)}
+    keys = list(universe)
+
+    as_json = {k: json.dumps([c.model_dump() for c in s.to_candles()]).encode() for k, s in universe.items()}
+    as_binary = {k: encode_value(s) for k, s in universe.items()}
+    json_bytes = sum(map(len, as_json.values())) / symbols
+    binary_bytes = sum(map(len, as_binary.values())) / symbols
+
+    for k in keys[:20]:
+        decoded = decode_value(as_binary[k])
+        assert all(np.array_equal(getattr(decoded, c), getattr(universe[k], c)) for c in CandleSeries.COLUMNS)
+
+    t_json = per_call_us(lambda k: CandleSeries.from_candles([_Row(**r) for r in json.loads(as_json[k])]), keys)
+    t_binary = per_call_us(lambda k: decode_value(as_binary[k]), keys)
+
+    print(f"JSON candles   | {json_bytes / 1024:6.1f} KiB/series | decode {t_json:8.1f} µs")
+    print(f"binary columns | {binary_bytes / 1024:6.1f} KiB/series | decode {t_binary:8.1f} µs | {json_bytes / binary_bytes:4.1f}x smaller")
+
+    cache = CacheService()
+    await cache.set_many(universe, ttl=600)
+    start = time.perf_counter()
+    for k in keys:
+        await cache.get(k)
+    t_local = (time.perf_counter() - start) / symbols * 1e6
+    print(f"\nlocal LRU hit  | {t_local:8.1f} µs/get ({len(cache.local)} entries, {cache.local.nbytes / 1e6:.1f} MB)")
+
+    if cache.enabled:
+        cache.local.clear()
+        start = time.perf_counter()
+        for k in keys:
+            await cache.get(k)
+        t_redis = (time.perf_counter() - start) / symbols * 1e6
+        print(f"Redis get      | {t_redis:8.1f} µs/get | local tier {t_redis / t_local:5.1f}x faster")
+        await cache.redis_client.delete(*keys)
+    else:
+        print("Redis get      | skipped (REDIS_URL not reachable)")
+    await cache.close()
+
+
+class _Row:
+    # Minimal stand-in for the per-candle objects JSON decoding used to build
+    __slots__ = ("t", "o", "h", "l", "c", "v")
+
+    def __init__(self, t, o, h, l, c, v):
+        self.t, self.o, self.h, self.l, self.c, self.v = t, o, h, l, c, v
+
+
+def main(symbols: int, days: int):
+    print(f"📊 {symbols} synthetic symbols x {days} daily bars\n")
+    asyncio.run(run(symbols, days))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--days", type=int, default=420)
+    args = parser.parse_args()
+    main(args.symbols, args.days)
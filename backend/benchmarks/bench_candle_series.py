@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark: List[Candle] vs CandleSeries over a synthetic universe.
+
+Measures, for every symbol of a synthetic universe:
+  - parse: Polygon JSON rows -> List[Candle] (old) vs CandleSeries (new)
+  - memory: bytes retained per symbol by each representation (tracemalloc)
+  - scan: scan_one throughput on CandleSeries vs on a Candle list
+
+Usage (from backend/):
+    python -m benchmarks.bench_candle_series [--symbols 5000] [--days 420]
+"""
+import argparse
+import os
+import time
+import tracemalloc
+
+os.environ.setdefault("POLYGON_API_KEY", "benchmark")
+
+from benchmarks.synthetic import make_polygon_results
+from models.candle import Candle, CandleSeries
+from scan.scan_one import scan_one
+
+
+def _parse_candles(results: list) -> list:
+    """The pre-CandleSeries parse in providers.polygon.get_daily_candles."""
+    return [
+        Candle(
+            t=int(r.get("t", 0)),
+            o=float(r.get("o", 0)),
+            h=float(r.get("h", 0)),
+            l=float(r.get("l", 0)),
+            c=float(r.get("c", 0)),
+            v=float(r.get("v", 0)),
+        )
+        for r in results
+    ]
+
+
+def _retained_bytes(build, results: list, samples: int = 50) -> float:
+    """Average bytes kept alive per symbol by the representation `build` returns."""
+    kept = []
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(samples):
+        kept.append(build(results))
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / samples
+
+
+def main(symbols: int, days: int):
+    print(f"📊 {symbols} synthetic symbols x {days} daily bars\n")
+
+    sample = make_polygon_results(days, seed=0)
+    mem_old = _retained_bytes(_parse_candles, sample)
+    mem_new = _retained_bytes(CandleSeries.from_polygon, sample)
+    print(
+        f"memory   | List[Candle] {mem_old / 1024:8.1f} KiB/symbol ({mem_old * symbols / 2**20:7.1f} MiB total) | "
+        f"CandleSeries {mem_new / 1024:6.1f} KiB/symbol ({mem_new * symbols / 2**20:6.1f} MiB total) | "
+        f"{mem_old / mem_new:.1f}x smaller"
+    )
+
+    parse_old = parse_new = scan_list = scan_series = 0.0
+    passed = 0
+    for i in range(symbols):
+        results = make_polygon_results(days, seed=i)
+
+        start = time.perf_counter()
+        candles = _parse_candles(results)
+        parse_old += time.perf_counter() - start
+
+        start = time.perf_counter()
+        series = CandleSeries.from_polygon(results)
+        parse_new += time.perf_counter() - start
+
+        start = time.perf_counter()
+        scan_one(f"S{i}", candles)
+        scan_list += time.perf_counter() - start
+
+        start = time.perf_counter()
+        if scan_one(f"S{i}", series):
+            passed += 1
+        scan_series += time.perf_counter() - start
+
+    print(
+        f"parse    | List[Candle] {parse_old:6.2f}s ({symbols / parse_old:8.0f} sym/s) | "
+        f"CandleSeries {parse_new:6.2f}s ({symbols / parse_new:8.0f} sym/s) | {parse_old / parse_new:.1f}x faster"
+    )
+    print(
+        f"scan_one | Candle list {scan_list:6.2f}s ({symbols / scan_list:8.0f} sym/s) | "
+        f"CandleSeries {scan_series:6.2f}s ({symbols / scan_series:8.0f} sym/s) | {passed} setups"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--symbols", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=420)
+    args = parser.parse_args()
+    main(args.symbols, args.days)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark + parity check: NumPy indicator engine vs the pure-Python loops.
+
+Checks that indicators.engine (and the ema/atr/adr_pct wrappers over it)
+reproduce the original per-element implementations, including ATR's
+front padding, then times:
+  - per symbol: legacy loops vs the wrappers
+  - batched: compute_batch over a (symbols x days) matrix in one call
+
+Usage (from backend/):
+    python -m benchmarks.bench_indicators [--symbols 5000] [--days 420]
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("POLYGON_API_KEY", "benchmark")
+
+import numpy as np
+
+from benchmarks.synthetic import make_series
+from indicators.adr import adr_pct
+from indicators.atr import atr
+from indicators.ema import ema
+from indicators.engine import compute_batch
+
+RTOL = 1e-12
+
+
+def legacy_ema(values, period):
+    if not values:
+        return []
+    k = 2 / (period + 1)
+    out = [values[0]]
+    for i in range(1, len(values)):
+        out.append(values[i] * k + out[-1] * (1 - k))
+    return out
+
+
+def legacy_atr(h, l, c, period):
+    if len(c) < 2:
+        return []
+    tr = [max(h[i] - l[i], abs(h[i] - c[i - 1]), abs(l[i] - c[i - 1])) for i in range(1, len(c))]
+    out = [sum(tr[:period]) / period]
+    for i in range(period, len(tr)):
+        out.append((out[-1] * (period - 1) + tr[i]) / period)
+    return [out[0]] * (len(c) - len(out)) + out
+
+
+def legacy_adr(h, l, c, period):
+    if len(c) < period:
+        return 0.0
+    ranges = [(h[i] - l[i]) / c[i] * 100 for i in range(len(c) - period, len(c))]
+    return sum(ranges) / len(ranges)
+
+
+def check_parity(samples: int = 200):
+    """Compare wrappers with the legacy loops across lengths and periods."""
+    for seed in range(samples):
+        for n in (0, 1, 2, 14, 15, 64, 65, 200, 420):
+            series = make_series(max(n, 1), seed)[:n]
+            h, l, c = series.h.tolist(), series.l.tolist(), series.c.tolist()
+            for period in (1, 14, 21, 50, 200):
+                np.testing.assert_allclose(ema(series.c, period), legacy_ema(c, period), rtol=RTOL)
+                expected_atr = legacy_atr(h, l, c, period)
+                got_atr = atr(series, period)
+                assert len(got_atr) == len(expected_atr)
+                np.testing.assert_allclose(got_atr, expected_atr, rtol=RTOL)
+                np.testing.assert_allclose(adr_pct(series, period), legacy_adr(h, l, c, period), rtol=RTOL)
+
+
+def main(symbols: int, days: int):
+    print("🔍 Checking parity with the legacy implementations...")
+    check_parity()
+    print(f"✅ ema/atr/adr_pct match within rtol={RTOL}\n")
+
+    universe = [make_series(days, seed=i) for i in range(symbols)]
+    print(f"📊 {symbols} synthetic symbols x {days} daily bars\n")
+
+    start = time.perf_counter()
+    for s in universe:
+        h, l, c = s.h.tolist(), s.l.tolist(), s.c.tolist()
+        legacy = [legacy_ema(c, 21)[-1], legacy_ema(c, 50)[-1], legacy_ema(c, 200)[-1],
+                  legacy_atr(h, l, c, 14)[-1], legacy_adr(h, l, c, 14)]
+    t_legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for s in universe:
+        wrapped = [ema(s.c, 21)[-1], ema(s.c, 50)[-1], ema(s.c, 200)[-1],
+                   atr(s, 14)[-1], adr_pct(s, 14)]
+    t_wrapped = time.perf_counter() - start
+
+    high = np.stack([s.h for s in universe])
+    low = np.stack([s.l for s in universe])
+    close = np.stack([s.c for s in universe])
+    start = time.perf_counter()
+    batch = compute_batch(high, low, close)
+    t_batch = time.perf_counter() - start
+
+    last = universe[-1]
+    h, l, c = last.h.tolist(), last.l.tolist(), last.c.tolist()
+    np.testing.assert_allclose(
+        [batch.ema21[-1], batch.ema50[-1], batch.ema200[-1], batch.atr14[-1], batch.adr14[-1]],
+        [legacy_ema(c, 21)[-1], legacy_ema(c, 50)[-1], legacy_ema(c, 200)[-1],
+         legacy_atr(h, l, c, 14)[-1], legacy_adr(h, l, c, 14)],
+        rtol=RTOL,
+    )
+
+    print(f"legacy loops  | {t_legacy:6.3f}s ({symbols / t_legacy:9.0f} sym/s)")
+    print(f"per-symbol np | {t_wrapped:6.3f}s ({symbols / t_wrapped:9.0f} sym/s) | {t_legacy / t_wrapped:5.1f}x")
+    print(f"compute_batch | {t_batch:6.3f}s ({symbols / t_batch:9.0f} sym/s) | {t_legacy / t_batch:5.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--symbols", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=420)
+    args = parser.parse_args()
+    main(args.symbols, args.days)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark: alert delivery, inline sequential sends vs the outbound queue.
+
+Uses the local stand-in providers (no Resend/VAPID/Twilio credentials, no
+network): every provider call takes --latency seconds and fails a
+--failure-rate fraction of the time. Compares
+  - before: each user's channels sent inline, one after another (old
+            dispatch_notification inside the scan task)
+  - after:  notifications enqueued, then delivered by per-channel worker
+            pools with email batching and retry/backoff
+
+Usage (from backend/):
+    python -m benchmarks.bench_notifications [--alerts 2000] [--latency 0.05] [--failure-rate 0.02] [--redis]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("POLYGON_API_KEY", "benchmark")
+
+from config import settings
+from services.notification_queue import Notification, NotificationQueue, StandInSender
+
+
+def _notifications(n: int) -> list:
+    """Per user: email always, push for half of them, SMS for one in ten (pro plan)."""
+    users = []
+    for i in range(n):
+        user = [Notification("email", {"to": f"user{i}@example.com", "subject": "Alert", "html": "<p>x</p>"}, f"u{i}")]
+        if i % 2 == 0:
+            user.append(Notification("push", {"subscription": {"endpoint": f"https://push/{i}"}, "title": "Alert", "body": "x"}, f"u{i}"))
+        if i % 10 == 0:
+            user.append(Notification("sms", {"to": "+15555550100", "body": "x"}, f"u{i}"))
+        users.append(user)
+    return users
+
+
+def _senders(latency: float, failure_rate: float) -> dict:
+    return {
+        "email": StandInSender("email", settings.NOTIFY_EMAIL_WORKERS, settings.NOTIFY_EMAIL_BATCH, latency, failure_rate),
+        "push": StandInSender("push", settings.NOTIFY_PUSH_WORKERS, 1, latency, failure_rate),
+        "sms": StandInSender("sms", settings.NOTIFY_SMS_WORKERS, 1, latency, failure_rate),
+    }
+
+
+async def before(users: list, latency: float, failure_rate: float) -> float:
+    senders = _senders(latency, failure_rate)
+    start = time.perf_counter()
+    for user in users:
+        for n in user:
+            try:
+                await senders[n.channel].send_batch([n.payload])
+            except ConnectionError:
+                pass  # the old path logged and moved on
+    return time.perf_counter() - start
+
+
+async def after(users: list, latency: float, failure_rate: float, use_redis: bool):
+    senders = _senders(latency, failure_rate)
+    queue = NotificationQueue(senders)
+    await queue.start(use_redis=use_redis)
+    try:
+        start = time.perf_counter()
+        for user in users:
+            await queue.enqueue_many(user)
+        enqueued = time.perf_counter() - start
+
+        total = sum(map(len, users))
+        while sum(s.delivered for s in senders.values()) + sum(
+            v for k, v in queue.stats.items() if k.endswith("_dead")
+        ) < total:
+            await asyncio.sleep(0.01)
+        delivered = time.perf_counter() - start
+    finally:
+        await queue.stop()
+    return enqueued, delivered, senders, queue.stats
+
+
+async def main(alerts: int, latency: float, failure_rate: float, use_redis: bool):
+    # Keep retries quick so the run finishes
+    settings.NOTIFY_RETRY_BASE = latency
+    users = _notifications(alerts)
+    total = sum(map(len, users))
+    print(f"📊 {alerts} alerts → {total} notifications | stand-in latency {latency * 1000:.0f} ms, "
+          f"failure rate {failure_rate:.0%}\n")
+
+    sample = users[: max(1, alerts // 20)]
+    t_before = await before(sample, latency, failure_rate) * len(users) / len(sample)
+    print(f"before | inline sequential: ~{t_before:7.2f}s the scan waits (extrapolated from {len(sample)} alerts)")
+
+    enqueued, delivered, senders, stats = await after(users, latency, failure_rate, use_redis)
+    print(f"after  | enqueue: {enqueued:7.2f}s the scan waits | all delivered in {delivered:6.2f}s "
+          f"({total / delivered:,.0f} notifications/s)")
+    for channel, sender in senders.items():
+        print(f"         {channel:5} {sender.workers:2} workers | {sender.delivered:5} sent in {sender.batches:5} calls"
+              f" | {stats[f'{channel}_retried']:3} retries | {stats[f'{channel}_dead']} dead")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--alerts", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--failure-rate", type=float, default=0.02)
+    parser.add_argument("--redis", action="store_true", help="queue in REDIS_URL instead of memory")
+    args = parser.parse_args()
+    asyncio.run(main(args.alerts, args.latency, args.failure_rate, args.redis))
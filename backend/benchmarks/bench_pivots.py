@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark + parity check: sliding-window pivots vs the nested-loop original.
+
+Checks that pivot_highs/pivot_lows return exactly the pivots of the original
+O(n * (left + right)) loops, including the strict-left / tie-allowed-right
+rules, then times per-symbol detection and the batched masks over a
+(symbols x days) matrix.
+
+Usage (from backend/):
+    python -m benchmarks.bench_pivots [--symbols 5000] [--days 420]
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("POLYGON_API_KEY", "benchmark")
+
+import numpy as np
+
+from benchmarks.synthetic import make_series
+from indicators.pivots import Pivot, pivot_high_mask, pivot_highs, pivot_low_mask, pivot_lows
+
+
+def legacy_pivot_highs(highs, left=3, right=3):
+    out = []
+    for i in range(left, len(highs) - right):
+        h = highs[i]
+        ok = True
+        for j in range(i - left, i):
+            if highs[j] >= h:
+                ok = False
+                break
+        if ok:
+            for j in range(i + 1, i + right + 1):
+                if highs[j] > h:
+                    ok = False
+                    break
+        if ok:
+            out.append(Pivot(i, h))
+    return out
+
+
+def legacy_pivot_lows(lows, left=3, right=3):
+    out = []
+    for i in range(left, len(lows) - right):
+        l = lows[i]
+        ok = True
+        for j in range(i - left, i):
+            if lows[j] <= l:
+                ok = False
+                break
+        if ok:
+            for j in range(i + 1, i + right + 1):
+                if lows[j] < l:
+                    ok = False
+                    break
+        if ok:
+            out.append(Pivot(i, l))
+    return out
+
+
+def check_parity(samples: int = 200):
+    for seed in range(samples):
+        for n in (0, 3, 6, 7, 8, 60, 420):
+            series = make_series(max(n, 1), seed)[:n]
+            if seed % 2:
+                # Rounded prices produce plenty of equal highs/lows to exercise ties
+                series.h[:] = series.h.round()
+                series.l[:] = series.l.round()
+            for left, right in ((3, 3), (0, 2), (2, 0), (1, 5), (5, 1)):
+                assert pivot_highs(series, left, right) == legacy_pivot_highs(series.h.tolist(), left, right)
+                assert pivot_lows(series, left, right) == legacy_pivot_lows(series.l.tolist(), left, right)
+
+
+def main(symbols: int, days: int):
+    print("🔍 Checking parity with the nested-loop implementation...")
+    check_parity()
+    print("✅ pivot_highs/pivot_lows identical, ties included\n")
+
+    universe = [make_series(days, seed=i) for i in range(symbols)]
+    print(f"📊 {symbols} synthetic symbols x {days} daily bars, left=right=3\n")
+
+    start = time.perf_counter()
+    for s in universe:
+        legacy_pivot_highs(s.h.tolist())
+        legacy_pivot_lows(s.l.tolist())
+    t_legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for s in universe:
+        pivot_highs(s)
+        pivot_lows(s)
+    t_new = time.perf_counter() - start
+
+    high = np.stack([s.h for s in universe])
+    low = np.stack([s.l for s in universe])
+    start = time.perf_counter()
+    high_mask = pivot_high_mask(high)
+    pivot_low_mask(low)
+    t_batch = time.perf_counter() - start
+
+    assert np.flatnonzero(high_mask[0]).tolist() == [p.i for p in pivot_highs(universe[0])]
+
+    print(f"nested loops   | {t_legacy:6.3f}s ({symbols / t_legacy:9.0f} sym/s)")
+    print(f"sliding window | {t_new:6.3f}s ({symbols / t_new:9.0f} sym/s) | {t_legacy / t_new:5.1f}x")
+    print(f"batched masks  | {t_batch:6.3f}s ({symbols / t_batch:9.0f} sym/s) | {t_legacy / t_batch:5.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--symbols", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=420)
+    args = parser.parse_args()
+    main(args.symbols, args.days)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-request latency of polygon_get, fresh session vs pooled session.
+
+Runs a local stand-in for the Polygon API (no network, no API key needed) and
+times the same requests two ways:
+  - before: a new aiohttp.ClientSession per request (old polygon_get behaviour)
+  - after:  the shared, pooled session from providers.polygon
+
+Usage (from backend/):
+    python -m benchmarks.bench_polygon_session [--requests 500] [--concurrency 3]
+
+The stand-in server speaks plain HTTP, so the numbers exclude the TLS handshake
+that every fresh session also pays against api.polygon.io.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("POLYGON_API_KEY", "benchmark")
+
+import aiohttp
+from aiohttp import web
+
+from providers import polygon
+
+
+def _fake_aggs(n: int = 420) -> dict:
+    t0 = 1_700_000_000_000
+    return {
+        "status": "OK",
+        "results": [
+            {"t": t0 + i * 86_400_000, "o": 100.0, "h": 101.0, "l": 99.0, "c": 100.5, "v": 1_000_000}
+            for i in range(n)
+        ],
+    }
+
+
+async def _start_server() -> tuple[web.AppRunner, str]:
+    payload = _fake_aggs()
+
+    async def aggs(request: web.Request) -> web.Response:
+        return web.json_response(payload)
+
+    async def ticker(request: web.Request) -> web.Response:
+        return web.json_response({"results": {"market_cap": 1_000_000_000}})
+
+    app = web.Application()
+    app.router.add_get("/v2/aggs/ticker/{symbol}/range/{rest:.*}", aggs)
+    app.router.add_get("/v3/reference/tickers/{symbol}", ticker)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+async def _get_unpooled(url: str, params: dict) -> dict:
+    """The pre-pooling request path: one session (and connection) per call."""
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as session:
+        async with session.get(url, params=params) as resp:
+            return await resp.json()
+
+
+async def _get_pooled(url: str, params: dict) -> dict:
+    return await polygon.polygon_get(url, dict(params))
+
+
+async def _run(fetch, base: str, n: int, concurrency: int) -> list[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one(i: int):
+        symbol = f"SYM{i % 50}"
+        if i % 2:
+            url = f"{base}/v3/reference/tickers/{symbol}"
+            params = {"apiKey": "benchmark"}
+        else:
+            url = f"{base}/v2/aggs/ticker/{symbol}/range/1/day/2024-01-01/2025-01-01"
+            params = {"adjusted": "true", "sort": "asc", "limit": 50000, "apiKey": "benchmark"}
+        async with semaphore:
+            start = time.perf_counter()
+            await fetch(url, params)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one(i) for i in range(n)))
+    return latencies
+
+
+def _report(label: str, latencies: list[float], wall: float) -> None:
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(
+        f"{label:8} | {len(latencies)} req in {wall:6.2f}s | "
+        f"mean {statistics.mean(latencies):6.2f} ms | "
+        f"p50 {statistics.median(latencies):6.2f} ms | p95 {p95:6.2f} ms"
+    )
+
+
+async def main(n: int, concurrency: int):
+    runner, base = await _start_server()
+    try:
+        print(f"📊 polygon_get against local stand-in at {base} (concurrency={concurrency})\n")
+
+        start = time.perf_counter()
+        before = await _run(_get_unpooled, base, n, concurrency)
+        _report("before", before, time.perf_counter() - start)
+
+        await polygon.open_session()
+        start = time.perf_counter()
+        after = await _run(_get_pooled, base, n, concurrency)
+        _report("after", after, time.perf_counter() - start)
+
+        print(f"\n✅ mean speedup: {statistics.mean(before) / statistics.mean(after):.2f}x")
+    finally:
+        await polygon.close_session()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
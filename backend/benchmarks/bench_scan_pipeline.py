@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark: inline scan_one vs the fetch -> queue -> process pool pipeline.
+
+Feeds scan_universe a synthetic universe through stand-in loaders (each with
+a small simulated network delay) and measures total scan time plus the
+longest event-loop stall seen by a heartbeat task, i.e. how long any other
+API request would have waited. The inline run reproduces the previous
+behaviour of calling scan_one inside each fetch coroutine.
+
+Usage (from backend/):
+    python -m benchmarks.bench_scan_pipeline [--symbols 1000] [--days 420] [--workers 0]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("POLYGON_API_KEY", "benchmark")
+
+from benchmarks.synthetic import make_series
+from config import settings
+from scan import scan_universe as su
+from scan.cpu_pool import shutdown_process_pool, worker_count
+from scan.scan_one import scan_one
+
+FETCH_DELAY = 0.002
+
+
+async def heartbeat(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Return the worst lateness of a periodic timer while the scan runs."""
+    worst = 0.0
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - expected)
+    return worst
+
+
+async def inline_scan(symbols):
+    semaphore = asyncio.Semaphore(settings.SCAN_CONCURRENCY_LIMIT)
+
+    async def bounded_scan(symbol):
+        async with semaphore:
+            fetched = await su.fetch_symbol_data(symbol)
+            if fetched is None:
+                return None
+            return scan_one(symbol, fetched[0])
+
+    raw = await asyncio.gather(*(bounded_scan(s) for s in symbols))
+    return [r for r in raw if r is not None]
+
+
+async def measure(scan, symbols):
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(stop))
+    start = time.perf_counter()
+    results = await scan(symbols)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    return results, elapsed, await beat
+
+
+async def run(symbols: int, days: int):
+    universe = {f"SYM{i}": make_series(days, seed=i) for i in range(symbols)}
+
+    async def load_daily_candles(symbol, from_date, to_date):
+        await asyncio.sleep(FETCH_DELAY)
+        return universe[symbol]
+
+    async def get_market_cap_usd(symbol):
+        return 10_000_000_000
+
+    su.load_daily_candles = load_daily_candles
+    su.get_market_cap_usd = get_market_cap_usd
+    names = list(universe)
+
+    # Start the workers outside the timed runs
+    await su.scan_universe(names[:worker_count()])
+
+    inline, t_inline, lag_inline = await measure(inline_scan, names)
+    piped, t_pipe, lag_pipe = await measure(su.scan_universe, names)
+
+    assert sorted(r.symbol for r in inline) == sorted(r.symbol for r in piped)
+
+    print(f"inline scan_one | {t_inline:6.2f}s ({symbols / t_inline:7.0f} sym/s) | max loop stall {lag_inline * 1000:7.1f} ms")
+    print(f"process pool    | {t_pipe:6.2f}s ({symbols / t_pipe:7.0f} sym/s) | max loop stall {lag_pipe * 1000:7.1f} ms | {t_inline / t_pipe:4.1f}x")
+
+
+def main(symbols: int, days: int, workers: int):
+    settings.SCAN_CPU_WORKERS = workers
+    print(f"📊 {symbols} synthetic symbols x {days} daily bars, {worker_count()} worker processes\n")
+    try:
+        asyncio.run(run(symbols, days))
+    finally:
+        shutdown_process_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--symbols", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=420)
+    parser.add_argument("--workers", type=int, default=0, help="0 = one per CPU core")
+    args = parser.parse_args()
+    main(args.symbols, args.days, args.workers)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark: saving a full-market scan to breakout_scans, one insert vs chunked upserts.
+
+Runs a local PostgREST stand-in (no network, no Supabase project needed)
+that takes --latency seconds per request plus --row-cost per row, and
+rejects bodies over --max-body bytes (like a proxy's request-size limit).
+Saves the same results three ways:
+  - before:       one insert of every row with return=representation
+                  (old save_scan_results)
+  - after:        upserts into breakout_scans on (symbol, scan_date) and
+                  current_setups on symbol, in concurrent chunks with
+                  return=minimal
+  - write-behind: rows buffered (SCAN_WRITE_BEHIND); the time the scan waits
+
+Usage (from backend/):
+    python -m benchmarks.bench_scan_writes [--rows 12000] [--latency 0.05] [--row-cost 0.00005]
+"""
+import argparse
+import asyncio
+import json
+from collections import defaultdict
+import logging
+import os
+import time
+
+os.environ.setdefault("POLYGON_API_KEY", "benchmark")
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "benchmark")
+
+from aiohttp import web
+
+from config import settings
+from models.candle import ScanResult
+import services.save_results as save_results
+from services.supabase_client import supabase
+
+
+def _results(n: int) -> list:
+    return [
+        ScanResult(
+            symbol=f"SYM{i}", price=50.0, trigger_price=52.0, distance_pct=4.0, adr_pct_14=3.5,
+            avg_vol_50=2e6, ema21=49.0, ema50=47.0, ema200=40.0, setup_type="FLAT_TOP",
+            breakout_score=60 + i % 40, notes=["tight base", "volume dry-up"], market_cap=5e9,
+        )
+        for i in range(n)
+    ]
+
+
+async def _start_server(latency: float, row_cost: float, max_body: int):
+    tables: dict = defaultdict(dict)
+    stats = {"requests": 0, "rejected": 0, "bytes_out": 0}
+
+    async def insert(request: web.Request) -> web.Response:
+        stats["requests"] += 1
+        body = await request.read()
+        if len(body) > max_body:
+            stats["rejected"] += 1
+            return web.json_response({"message": "Payload Too Large"}, status=413)
+        rows = json.loads(body)
+        await asyncio.sleep(latency + row_cost * len(rows))
+        upsert = request.query.get("on_conflict")
+        table = tables[request.match_info["table"]]
+        for i, row in enumerate(rows):
+            key = tuple(row[c] for c in upsert.split(",")) if upsert else (len(table), i)
+            table[key] = row
+        if "return=minimal" in request.headers.get("Prefer", ""):
+            return web.Response(status=201)
+        response = web.json_response(rows, status=201)
+        stats["bytes_out"] += len(response.body)
+        return response
+
+    async def delete(request: web.Request) -> web.Response:
+        stats["requests"] += 1
+        await asyncio.sleep(latency)
+        table = tables[request.match_info["table"]]
+        for column, condition in request.query.items():
+            op, _, value = condition.partition(".")
+            if op == "in":
+                values = set(value.strip("()").split(","))
+                for key in [k for k, row in table.items() if row[column] in values]:
+                    del table[key]
+        return web.Response(status=204)
+
+    app = web.Application(client_max_size=1 << 30)
+    app.router.add_post("/rest/v1/{table}", insert)
+    app.router.add_delete("/rest/v1/{table}", delete)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}", tables, stats
+
+
+async def main(n: int, latency: float, row_cost: float, max_body: int):
+    runner, base, tables, stats = await _start_server(latency, row_cost, max_body)
+    supabase.url = base
+    supabase.open()
+    # Alerts are benchmarked separately (bench_notifications)
+    async def no_alerts(results):
+        return None
+    save_results._notify_watchlist_users = no_alerts
+    logging.basicConfig(level=logging.INFO, format="         %(message)s")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    results = _results(n)
+    try:
+        print(f"📊 Saving {n} scan results to a local PostgREST stand-in "
+              f"({latency * 1000:.0f} ms/request + {row_cost * 1e6:.0f} µs/row, {max_body >> 20} MB body limit)\n")
+
+        start = time.perf_counter()
+        try:
+            await supabase.table("breakout_scans").insert(save_results._scan_rows(results)).execute()
+            outcome = f"{stats['bytes_out'] / 1e6:.1f} MB echoed back"
+        except Exception as e:
+            outcome = f"failed: {str(e)[:40]}"
+        print(f"before       | 1 request  | {time.perf_counter() - start:6.2f}s | {outcome}")
+
+        tables.clear()
+        for label in ("after", "after rescan"):
+            stats.update(requests=0, bytes_out=0)
+            start = time.perf_counter()
+            await save_results.save_scan_results(results)
+            print(f"{label:12} | {stats['requests']} requests | {time.perf_counter() - start:6.2f}s | "
+                  f"{stats['bytes_out']} bytes echoed back | {len(tables['breakout_scans'])} history rows, "
+                  f"{len(tables['current_setups'])} current setups stored")
+
+        settings.SCAN_WRITE_BEHIND = True
+        stats.update(requests=0)
+        start = time.perf_counter()
+        await save_results.save_scan_results(results)
+        waited = time.perf_counter() - start
+        await save_results.scan_write_buffer.close()
+        print(f"write-behind | scan waits {waited * 1000:.1f} ms; flushed in {stats['requests']} requests on close")
+    finally:
+        await supabase.close()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=12000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--row-cost", type=float, default=0.00005)
+    parser.add_argument("--max-body", type=int, default=2 << 20)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.latency, args.row_cost, args.max_body))
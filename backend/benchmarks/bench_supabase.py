@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-query latency of SupabaseTable.execute, fresh client vs pooled client.
+
+Runs a local PostgREST stand-in (no network, no Supabase project needed) and
+times the same mix of queries (watchlist selects, result inserts, preference
+updates) two ways:
+  - before: a new httpx.AsyncClient per query (old execute behaviour)
+  - after:  the shared, pooled client owned by SupabaseClient
+
+Usage (from backend/):
+    python -m benchmarks.bench_supabase [--requests 500] [--concurrency 5]
+
+The stand-in server speaks plain HTTP/1.1, so the numbers exclude the TLS
+handshake every fresh client also pays against Supabase, and HTTP/2
+multiplexing (negotiated over TLS) is not exercised.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("POLYGON_API_KEY", "benchmark")
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "benchmark")
+
+import httpx
+from aiohttp import web
+
+from services.supabase_client import SupabaseClient
+
+
+def _fake_rows(n: int = 25) -> list:
+    return [
+        {"id": i, "user_id": "u1", "symbol": f"SYM{i}", "notes": None, "created_at": "2025-01-01T00:00:00Z"}
+        for i in range(n)
+    ]
+
+
+async def _start_server() -> tuple[web.AppRunner, str]:
+    rows = _fake_rows()
+
+    async def select(request: web.Request) -> web.Response:
+        return web.json_response(rows)
+
+    async def insert(request: web.Request) -> web.Response:
+        return web.json_response(await request.json(), status=201)
+
+    async def update(request: web.Request) -> web.Response:
+        return web.json_response([{**rows[0], **(await request.json())}])
+
+    app = web.Application()
+    app.router.add_get("/rest/v1/{table}", select)
+    app.router.add_post("/rest/v1/{table}", insert)
+    app.router.add_patch("/rest/v1/{table}", update)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def _query(db: SupabaseClient, i: int):
+    if i % 3 == 0:
+        return db.table("scan_results").insert([{"symbol": f"SYM{i % 50}", "breakout_score": 80}])
+    if i % 3 == 1:
+        return db.table("user_preferences").update({"min_score": 70}).eq("user_id", "u1")
+    return db.table("watchlists").select("*").eq("user_id", "u1").order("created_at", desc=True)
+
+
+async def _execute_unpooled(query) -> list:
+    """The pre-pooling request path: one client (and connection) per query."""
+    async with httpx.AsyncClient() as client:
+        if query._insert_data is not None:
+            headers = {**query.headers, "Prefer": "return=representation"}
+            response = await client.post(query.url, json=query._insert_data, headers=headers)
+        elif query._update_data is not None:
+            headers = {**query.headers, "Prefer": "return=representation"}
+            response = await client.patch(query.url, json=query._update_data, params=query._filters, headers=headers)
+        else:
+            params = [("select", query._select_fields), *query._filters, ("order", ",".join(query._order_by))]
+            response = await client.get(query.url, params=params, headers=query.headers)
+        return response.json()
+
+
+async def _execute_pooled(query) -> list:
+    return await query.execute()
+
+
+async def _run(execute, db: SupabaseClient, n: int, concurrency: int) -> list[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await execute(_query(db, i))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one(i) for i in range(n)))
+    return latencies
+
+
+def _report(label: str, latencies: list[float], wall: float) -> None:
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(
+        f"{label:8} | {len(latencies)} queries in {wall:6.2f}s | "
+        f"mean {statistics.mean(latencies):6.2f} ms | "
+        f"p50 {statistics.median(latencies):6.2f} ms | p95 {p95:6.2f} ms"
+    )
+
+
+async def main(n: int, concurrency: int):
+    runner, base = await _start_server()
+    db = SupabaseClient(base, "benchmark")
+    try:
+        print(f"📊 SupabaseTable.execute against local PostgREST stand-in at {base} (concurrency={concurrency})\n")
+
+        start = time.perf_counter()
+        before = await _run(_execute_unpooled, db, n, concurrency)
+        _report("before", before, time.perf_counter() - start)
+
+        db.open()
+        start = time.perf_counter()
+        after = await _run(_execute_pooled, db, n, concurrency)
+        _report("after", after, time.perf_counter() - start)
+
+        print(f"\n✅ mean speedup: {statistics.mean(before) / statistics.mean(after):.2f}x")
+    finally:
+        await db.close()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
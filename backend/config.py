@@ -4,11 +4,29 @@ from typing import Optional
 class Settings(BaseSettings):
     # Polygon API
     POLYGON_API_KEY: str
+    POLYGON_HTTP_TIMEOUT: float = 30.0  # Total request timeout in seconds
+    POLYGON_MAX_CONNECTIONS: int = 100  # Pooled connections across all hosts
+    POLYGON_MAX_CONNECTIONS_PER_HOST: int = 20  # Pooled connections to api.polygon.io
+    POLYGON_DNS_CACHE_TTL: int = 300  # Seconds to cache resolved hostnames
+    POLYGON_KEEPALIVE_TIMEOUT: float = 30.0  # Seconds to keep idle connections open
+    POLYGON_RATE_LIMIT: float = 5.0  # Starting request rate (req/s), adapted at runtime
+    POLYGON_RATE_LIMIT_MIN: float = 0.08  # Floor after repeated 429s (~5 req/min, the free tier)
+    POLYGON_RATE_LIMIT_MAX: float = 100.0  # Ceiling for additive increase
+    POLYGON_RATE_BURST: int = 5  # Token bucket capacity
+    POLYGON_RATE_INCREASE: float = 0.25  # req/s regained per second of successful responses
+    POLYGON_RATE_DECREASE: float = 0.5  # Rate multiplier applied on a 429
 
     # Supabase
     SUPABASE_URL: Optional[str] = None
     SUPABASE_SERVICE_ROLE_KEY: Optional[str] = None
     SUPABASE_JWT_SECRET: Optional[str] = None
+    SUPABASE_HTTP2: bool = True  # Multiplex queries over HTTP/2 (needs the h2 package)
+    SUPABASE_HTTP_TIMEOUT: float = 10.0  # Read/write/pool timeout in seconds
+    SUPABASE_CONNECT_TIMEOUT: float = 5.0  # Connection (incl. TLS) timeout in seconds
+    SUPABASE_MAX_CONNECTIONS: int = 50  # Pooled connections to the Supabase host
+    SUPABASE_MAX_KEEPALIVE: int = 20  # Idle connections kept open for reuse
+    SUPABASE_KEEPALIVE_TIMEOUT: float = 30.0  # Seconds to keep idle connections open
+    SUPABASE_WRITE_CONCURRENCY: int = 4  # Bulk-insert chunks sent in parallel
 
     # Stripe
     STRIPE_SECRET_KEY: Optional[str] = None
@@ -21,7 +39,19 @@ class Settings(BaseSettings):
 
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
-    CACHE_TTL: int = 3600  # 1 hour
+    CACHE_TTL: int = 3600  # 1 hour; default for data without a market-calendar kind
+    CACHE_INTRADAY_TTL: int = 60  # Daily bars fetched while the session is live (last bar still moving)
+    CACHE_SNAPSHOT_TTL: int = 15  # Market snapshots during the session (until the next open outside it)
+    CACHE_LOCAL_MAX_ENTRIES: int = 10_000  # In-process LRU tier in front of Redis
+    CACHE_LOCAL_MAX_BYTES: int = 64 * 1024 * 1024  # Byte bound for the LRU tier (encoded values)
+    CACHE_LOCAL_TTL: int = 60  # Max seconds an entry is served from process memory
+    SWR_STALE_TTL: int = 900  # Seconds past its soft TTL stale data is still served while it refreshes
+    SWR_LOCK_TTL: int = 30  # Max seconds one worker holds a key's background-refresh lock
+    SCAN_RESULT_CACHE_TTL: int = 86400  # Scan results are keyed by the last bar, so they can live a day
+    TASK_TTL: int = 86400  # Seconds background tasks (status, progress, results) are retained
+    TASK_HEARTBEAT_INTERVAL: int = 15  # Seconds between a running task's liveness heartbeats
+    TASK_PROGRESS_EVERY: int = 100  # Symbols between a background scan's progress writes / cancel checks
+    TASK_PROGRESS_INTERVAL: float = 1.0  # ...or seconds, whichever comes first
 
     # Environment
     ENVIRONMENT: str = "development"
@@ -56,9 +86,21 @@ class Settings(BaseSettings):
 
     # Scanning Configuration
     SCAN_LOOKBACK_DAYS: int = 420  # Days of historical data for scanning (~1.2 years)
-    SCAN_API_DELAY: float = 0.5  # Delay between API calls in seconds
-    SCAN_CONCURRENCY_LIMIT: int = 3  # Max concurrent API requests
+    SCAN_CONCURRENCY_LIMIT: int = 20  # Max symbols fetched concurrently (request rate is set by POLYGON_RATE_LIMIT)
     DEFAULT_SCAN_UNIVERSE: str = "AAPL,MSFT,NVDA,AMZN,TSLA"  # Comma-separated default symbols
+    SCAN_CPU_WORKERS: int = 0  # Processes running pattern detection (0 = one per CPU core)
+    SCAN_QUEUE_SIZE: int = 64  # Fetched symbols buffered ahead of the CPU stage
+    SCAN_CPU_BATCH: int = 16  # Max queued symbols sent to a worker in one task
+    SCAN_DEDUP_WINDOW: int = 300  # Seconds a completed background scan is reused by identical requests
+    SCAN_WRITE_BEHIND: bool = False  # Buffer saved results and write them in the background
+    SCAN_WRITE_BUFFER_ROWS: int = 1000  # Buffered rows that trigger a write-behind flush
+    SCAN_WRITE_FLUSH_INTERVAL: float = 5.0  # Max seconds a row waits in the write-behind buffer
+
+    # Local Bar Store
+    BAR_STORE_ENABLED: bool = True  # Serve scan candles from the on-disk store, fetching only new bars
+    BAR_STORE_DIR: str = "data/bars"  # Root directory for per-symbol column files (relative to backend/)
+    BAR_STORE_SOURCE: str = "symbol"  # "symbol" = per-symbol incremental fetch, "grouped" = kept fresh by `main.py ingest`
+    GROUPED_INGEST_CHUNK_DAYS: int = 20  # Trading days buffered in memory per backfill write
 
     # AI Analysis Configuration
     OPENAI_API_KEY: Optional[str] = None
@@ -81,6 +123,23 @@ class Settings(BaseSettings):
     TWILIO_AUTH_TOKEN: Optional[str] = None
     TWILIO_FROM_NUMBER: Optional[str] = None
 
+    # Notifications — watchlist alert fan-out
+    ALERT_DISPATCH_CONCURRENCY: int = 20  # Users notified in parallel after a scan
+    WATCHLIST_INDEX_RECONCILE: int = 300  # Seconds between rebuilds of the in-process watchlist alert index
+
+    # Notifications — outbound queue
+    NOTIFY_PROVIDERS: str = "live"  # "live", or "standin" for local stand-in providers (offline load tests)
+    NOTIFY_EMAIL_WORKERS: int = 2  # Concurrent email senders
+    NOTIFY_PUSH_WORKERS: int = 8  # Concurrent web push senders
+    NOTIFY_SMS_WORKERS: int = 2  # Concurrent SMS senders
+    NOTIFY_EMAIL_BATCH: int = 100  # Emails per provider call (Resend batch API max 100)
+    NOTIFY_MAX_ATTEMPTS: int = 5  # Sends before a notification is dead-lettered
+    NOTIFY_RETRY_BASE: float = 2.0  # First retry delay in seconds, doubled per attempt
+    NOTIFY_RETRY_MAX: float = 300.0  # Cap on the retry delay
+    NOTIFY_POLL_INTERVAL: float = 1.0  # Idle workers re-check the queue (and due retries) this often
+    NOTIFY_STANDIN_LATENCY: float = 0.05  # Stand-in provider seconds per call
+    NOTIFY_STANDIN_FAILURE_RATE: float = 0.0  # Stand-in provider fraction of failed calls
+
     # Frontend
     FRONTEND_URL: str = "http://localhost:5173"
 
@@ -0,0 +1,372 @@
+# data/bar_store.py
+
+import asyncio
+import json
+import logging
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single writer process only
+    fcntl = None
+
+from config import settings
+from models.candle import Candles, CandleSeries, as_series
+from utils.market_calendar import daily_bars_expiry
+
+logger = logging.getLogger(__name__)
+
+# One little-endian column file per OHLCV field
+COLUMNS = {
+    "t": np.dtype("<i8"),
+    "o": np.dtype("<f8"),
+    "h": np.dtype("<f8"),
+    "l": np.dtype("<f8"),
+    "c": np.dtype("<f8"),
+    "v": np.dtype("<f8"),
+}
+
+# Relative BAR_STORE_DIR paths resolve against the backend directory, not the CWD
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Times a reader re-resolves meta.json when the version it named was pruned meanwhile
+SNAPSHOT_ATTEMPTS = 5
+
+# Relative close difference that marks a re-adjusted (split/dividend) history
+ADJUSTMENT_TOLERANCE = 1e-6
+
+
+class BarStore:
+    """
+    On-disk columnar store of daily OHLCV bars, one directory per symbol.
+
+    Each column lives in its own raw binary file ({symbol}/{version}/{col}.bin)
+    that is memory-mapped on read and appended to on update, so refreshing a
+    symbol only writes the bars that changed since the last stored timestamp.
+    {symbol}/meta.json names the current version: a rewrite builds a new
+    version directory and publishes it by atomically replacing meta.json, so
+    readers in other processes always see one complete history. Writers
+    hold a per-symbol file lock (.locks/{symbol}.lock), so API workers and
+    the ingest CLI never append to or publish the same symbol at once.
+    After a refresh the symbol is served from disk, without any request,
+    until the market calendar says its bars can change (the next close).
+    Directories are created on first write.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = os.path.join(BACKEND_DIR, root or settings.BAR_STORE_DIR)
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _dir(self, symbol: str) -> str:
+        return os.path.join(self.root, symbol.upper())
+
+    def _meta_path(self, symbol: str) -> str:
+        return os.path.join(self._dir(symbol), "meta.json")
+
+    def _data_dir(self, symbol: str, meta: dict) -> str:
+        # Stores written before versioning keep their columns in the symbol directory
+        return os.path.join(self._dir(symbol), meta.get("version", ""))
+
+    def _lock(self, symbol: str) -> asyncio.Lock:
+        if symbol not in self._locks:
+            self._locks[symbol] = asyncio.Lock()
+        return self._locks[symbol]
+
+    @contextmanager
+    def _write_lock(self, symbol: str) -> Iterator[None]:
+        """Exclusive, cross-process lock on a symbol's files (lives outside its directory, which delete removes)."""
+        if fcntl is None:
+            yield
+            return
+        lock_dir = os.path.join(self.root, ".locks")
+        os.makedirs(lock_dir, exist_ok=True)
+        with open(os.path.join(lock_dir, f"{symbol.upper()}.lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read_meta(self, symbol: str) -> dict:
+        try:
+            with open(self._meta_path(symbol)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self, symbol: str, meta: dict) -> None:
+        tmp = f"{self._meta_path(symbol)}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._meta_path(symbol))
+
+    def row_count(self, symbol: str) -> int:
+        """Number of complete rows stored (a torn append counts as absent)."""
+        cols = self.read_columns(symbol)
+        return len(cols["t"]) if cols is not None else 0
+
+    def _snapshot(self, symbol: str) -> Tuple[Optional[Dict[str, np.ndarray]], dict]:
+        """Memory-mapped columns of the current version, and the meta that named it."""
+        for attempt in range(SNAPSHOT_ATTEMPTS):
+            meta = self._read_meta(symbol)
+            data_dir = self._data_dir(symbol, meta)
+            paths = {col: os.path.join(data_dir, f"{col}.bin") for col in COLUMNS}
+            try:
+                n = min(os.path.getsize(paths[col]) // dtype.itemsize for col, dtype in COLUMNS.items())
+                if n == 0:
+                    return None, meta
+                return {
+                    col: np.memmap(paths[col], dtype=dtype, mode="r", shape=(n,))
+                    for col, dtype in COLUMNS.items()
+                }, meta
+            except FileNotFoundError:
+                # Nothing stored, or a writer in another process pruned this
+                # version meanwhile (retry on the one meta.json names now)
+                if "version" not in meta or attempt == SNAPSHOT_ATTEMPTS - 1:
+                    return None, meta
+        return None, {}
+
+    def read_columns(self, symbol: str) -> Optional[Dict[str, np.ndarray]]:
+        """Memory-map every column for a symbol, or None if nothing is stored."""
+        return self._snapshot(symbol)[0]
+
+    def covered_from(self, symbol: str) -> Optional[int]:
+        """Start (unix ms) of the date range the stored history was fetched for."""
+        return _meta_ms(self._read_meta(symbol), "from_ms")
+
+    def fresh_until(self, symbol: str) -> Optional[int]:
+        """Time (unix ms) until which the stored bars can't have changed upstream."""
+        return _meta_ms(self._read_meta(symbol), "fresh_until_ms")
+
+    def mark_fresh(self, symbol: str, until_ms: int) -> None:
+        """Record that the stored bars are current until `until_ms`."""
+        with self._write_lock(symbol):
+            meta = self._read_meta(symbol)
+            if not meta:
+                return
+            meta["fresh_until_ms"] = until_ms
+            self._write_meta(symbol, meta)
+
+    def last_timestamp(self, symbol: str) -> Optional[int]:
+        """Timestamp (unix ms) of the most recent stored bar."""
+        cols = self.read_columns(symbol)
+        return int(cols["t"][-1]) if cols is not None else None
+
+    def read(
+        self,
+        symbol: str,
+        from_date: Optional[datetime] = None,
+        to_date: Optional[datetime] = None,
+    ) -> CandleSeries:
+        """Read stored candles within [from_date, to_date] (inclusive, by day)."""
+        cols = self.read_columns(symbol)
+        if cols is None:
+            return CandleSeries.empty()
+
+        t = cols["t"]
+        lo = int(np.searchsorted(t, _day_start_ms(from_date), side="left")) if from_date else 0
+        hi = int(np.searchsorted(t, _day_end_ms(to_date), side="right")) if to_date else len(t)
+
+        # Copy out of the maps so the files can be rewritten underneath
+        return CandleSeries(*(np.array(cols[col][lo:hi]) for col in CandleSeries.COLUMNS))
+
+    def _publish(self, symbol: str, series: CandleSeries, meta: dict) -> None:
+        """Write `series` as a new version and make it current with one atomic rename."""
+        symbol_dir = self._dir(symbol)
+        previous = self._read_meta(symbol).get("version", "")
+        version = f"v{time.time_ns()}-{os.getpid()}"
+        version_dir = os.path.join(symbol_dir, version)
+        os.makedirs(version_dir)
+
+        for col, dtype in COLUMNS.items():
+            getattr(series, col).astype(dtype, copy=False).tofile(os.path.join(version_dir, f"{col}.bin"))
+
+        self._write_meta(symbol, {**meta, "version": version})
+
+        # The previous version stays for readers that resolved meta.json just before the swap
+        for name in os.listdir(symbol_dir):
+            path = os.path.join(symbol_dir, name)
+            if name.endswith(".bin"):
+                if previous:
+                    os.remove(path)
+            elif name.startswith("v") and name not in (version, previous):
+                shutil.rmtree(path, ignore_errors=True)
+
+    def write(self, symbol: str, candles: Candles, from_ms: Optional[int] = None) -> None:
+        """
+        Replace a symbol's stored history.
+        from_ms records the start of the requested range, which may precede
+        the first bar (weekends, holidays, recent listings).
+        """
+        series = as_series(candles)
+        if from_ms is None:
+            from_ms = int(series.t[0]) if len(series) else 0
+        with self._write_lock(symbol):
+            self._publish(symbol, series, {"from_ms": from_ms})
+
+    def write_tail(self, symbol: str, candles: Candles, from_ms: Optional[int] = None) -> int:
+        """
+        Merge newer bars (ascending t) into the stored history.
+        Stored bars at or after the first new timestamp are replaced (this
+        refreshes a partial intraday bar) by publishing a new version; pure
+        appends go in place. from_ms is only used when the symbol has no
+        stored history yet.
+        Returns the number of rows written.
+        """
+        series = as_series(candles)
+        if len(series) == 0:
+            return 0
+        with self._write_lock(symbol):
+            self._merge_tail(symbol, series, from_ms)
+        return len(series)
+
+    def _merge_tail(self, symbol: str, series: CandleSeries, from_ms: Optional[int]) -> None:
+        cols, meta = self._snapshot(symbol)
+        if cols is None:
+            self._publish(symbol, series, {"from_ms": int(series.t[0]) if from_ms is None else from_ms})
+            return
+
+        n = len(cols["t"])
+        keep = int(np.searchsorted(cols["t"], int(series.t[0]), side="left"))
+
+        if keep < n:
+            # Truncating in place would pull rows out from under other readers' maps
+            merged = CandleSeries(*(
+                np.concatenate([cols[col][:keep], getattr(series, col).astype(COLUMNS[col], copy=False)])
+                for col in CandleSeries.COLUMNS
+            ))
+            del cols
+            self._publish(symbol, merged, {k: v for k, v in meta.items() if k != "version"})
+            return
+
+        del cols
+        data_dir = self._data_dir(symbol, meta)
+        for col, dtype in COLUMNS.items():
+            with open(os.path.join(data_dir, f"{col}.bin"), "r+b") as f:
+                f.truncate(n * dtype.itemsize)  # drops a torn append's partial row
+                f.seek(0, os.SEEK_END)
+                f.write(getattr(series, col).astype(dtype, copy=False).tobytes())
+
+    def delete(self, symbol: str) -> None:
+        """Drop all stored bars for a symbol."""
+        with self._write_lock(symbol):
+            shutil.rmtree(self._dir(symbol), ignore_errors=True)
+
+    async def get_daily_candles(
+        self,
+        symbol: str,
+        from_date: datetime,
+        to_date: datetime,
+    ) -> CandleSeries:
+        """
+        Return adjusted daily candles for [from_date, to_date], fetching from
+        Polygon only the bars missing since the last stored timestamp (or
+        nothing at all when BAR_STORE_SOURCE is "grouped", or while the
+        last refresh is still fresh by the market calendar).
+
+        The refresh re-requests the last two stored bars: the older one must
+        match exactly (otherwise history was re-adjusted for a split/dividend
+        and is re-downloaded in full), the newer one may be a partial intraday
+        bar and is overwritten.
+        """
+        from providers.polygon import get_daily_candles
+
+        symbol = symbol.upper()
+        async with self._lock(symbol):
+            # Disk work runs in a worker thread so a scan's other symbols keep the loop
+            cols, meta = await asyncio.to_thread(self._snapshot, symbol)
+            covered_from = _meta_ms(meta, "from_ms")
+            needs_full = (
+                cols is None
+                or len(cols["t"]) < 2
+                or covered_from is None
+                or covered_from > _day_start_ms(from_date)
+            )
+
+            # Grouped-daily ingestion keeps the whole market current, so a
+            # covered symbol is served from disk without any request; so is
+            # one refreshed since the last close (nights, weekends, holidays).
+            if not needs_full and (
+                settings.BAR_STORE_SOURCE == "grouped"
+                or (_meta_ms(meta, "fresh_until_ms") or 0) > time.time() * 1000
+            ):
+                del cols
+                return await asyncio.to_thread(self.read, symbol, from_date, to_date)
+
+            # Judged at request time: bars fetched mid-session go stale sooner
+            fresh_until_ms = _expiry_ms()
+
+            if not needs_full:
+                anchor_t = int(cols["t"][-2])
+                anchor_c = float(cols["c"][-2])
+                del cols
+
+                fresh = await get_daily_candles(
+                    symbol, _ms_to_datetime(anchor_t), to_date, adjusted=True
+                )
+                if (
+                    len(fresh) == 0
+                    or int(fresh.t[0]) != anchor_t
+                    or not _same_price(float(fresh.c[0]), anchor_c)
+                ):
+                    logger.info(f"Bar store history for {symbol} changed upstream, refetching")
+                    needs_full = True
+                else:
+                    await asyncio.to_thread(self._refresh_tail, symbol, fresh[1:], fresh_until_ms)
+
+            if needs_full:
+                candles = await get_daily_candles(symbol, from_date, to_date, adjusted=True)
+                if len(candles):
+                    await asyncio.to_thread(
+                        self._refresh_full, symbol, candles, _day_start_ms(from_date), fresh_until_ms
+                    )
+                return candles
+
+        return await asyncio.to_thread(self.read, symbol, from_date, to_date)
+
+    def _refresh_tail(self, symbol: str, candles: Candles, fresh_until_ms: int) -> None:
+        self.write_tail(symbol, candles)
+        self.mark_fresh(symbol, fresh_until_ms)
+
+    def _refresh_full(self, symbol: str, candles: Candles, from_ms: int, fresh_until_ms: int) -> None:
+        self.write(symbol, candles, from_ms=from_ms)
+        self.mark_fresh(symbol, fresh_until_ms)
+
+
+def _meta_ms(meta: dict, key: str) -> Optional[int]:
+    try:
+        return int(meta[key])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _ms_to_datetime(ms: int) -> datetime:
+    return datetime.utcfromtimestamp(ms / 1000)
+
+
+def _day_start_ms(d: datetime) -> int:
+    d = d.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+    return int((d - datetime(1970, 1, 1)).total_seconds() * 1000)
+
+
+def _day_end_ms(d: datetime) -> int:
+    return _day_start_ms(d) + 86_400_000 - 1
+
+
+def _expiry_ms() -> int:
+    return int(daily_bars_expiry().timestamp() * 1000)
+
+
+def _same_price(a: float, b: float) -> bool:
+    return abs(a - b) <= ADJUSTMENT_TOLERANCE * max(abs(a), abs(b), 1.0)
+
+
+# Global bar store instance
+bar_store = BarStore()
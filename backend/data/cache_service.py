@@ -1,88 +1,422 @@
 # data/cache_service.py
 
-from typing import Optional, Any
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
 import logging
 import json
 import redis
+import redis.asyncio as aioredis
 from config import settings
+from models.candle import CandleSeries
+from utils.market_calendar import DAILY_BARS, REFERENCE, SNAPSHOT, cache_ttl
+from utils.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# Produces a fresh JSON value for get_or_revalidate
+Loader = Callable[[], Awaitable[Any]]
+
+
+def encode_value(value: Any) -> bytes:
+    """Serialize a cache value: CandleSeries as raw column bytes, the rest as JSON."""
+    if isinstance(value, CandleSeries):
+        return value.to_bytes()
+    return json.dumps(value).encode()
+
+
+def decode_value(raw: bytes) -> Any:
+    """Inverse of encode_value."""
+    if raw.startswith(CandleSeries.MAGIC):
+        return CandleSeries.from_bytes(raw)
+    return json.loads(raw)
+
+
+class LocalLRUCache:
+    """
+    Size-bounded in-process LRU of encoded values with per-entry expiry.
+    Values are kept encoded, so every hit decodes a private copy (candle
+    series decode zero-copy) and the byte bound is exact.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, raw = entry
+        if expires_at <= time.monotonic():
+            self.delete(key)
+            return None
+        self._entries.move_to_end(key)
+        return raw
+
+    def set(self, key: str, raw: bytes, ttl: float):
+        if ttl <= 0 or len(raw) > self.max_bytes:
+            self.delete(key)
+            return
+        self.delete(key)
+        self._entries[key] = (time.monotonic() + ttl, raw)
+        self.nbytes += len(raw)
+        while len(self._entries) > self.max_entries or self.nbytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.nbytes -= len(evicted)
+
+    def delete(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= len(entry[1])
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+
+
 class CacheService:
     """
-    Redis-based cache service with automatic fallback to no-cache mode.
+    Two-tier cache: a size-bounded in-process LRU in front of async Redis,
+    with automatic fallback to the local tier alone when Redis is down.
     Caches stock market data to reduce API calls and improve performance.
+    Batch methods (get_many/set_many) cover many keys in one round trip.
+    Without an explicit TTL, expiry follows the market calendar for the
+    value's data kind (see utils.market_calendar.cache_ttl).
     """
 
     def __init__(self):
+        self.redis_client: Optional[aioredis.Redis] = None
+        self.enabled = False
+        self.local = LocalLRUCache(settings.CACHE_LOCAL_MAX_ENTRIES, settings.CACHE_LOCAL_MAX_BYTES)
+        self._connect_attempted = False
+        self._connect_lock = asyncio.Lock()
+        self._loads = SingleFlight()  # per-key loads for get_or_revalidate
+        self._revalidations: Set[asyncio.Task] = set()
+
+    async def connect(self) -> bool:
+        """
+        Connect to Redis once; called from the app lifespan, or lazily on
+        first use. Returns whether the cache is enabled.
+        """
+        async with self._connect_lock:
+            if self._connect_attempted:
+                return self.enabled
+            self._connect_attempted = True
+
+            try:
+                # Try to connect to Redis (raw bytes: values are JSON or binary series)
+                self.redis_client = aioredis.from_url(
+                    settings.REDIS_URL,
+                    decode_responses=False,
+                    socket_connect_timeout=2,
+                    socket_timeout=2
+                )
+                # Test connection
+                await self.redis_client.ping()
+                self.enabled = True
+                logger.info(f"Redis cache enabled at {settings.REDIS_URL}")
+            except (redis.ConnectionError, redis.TimeoutError) as e:
+                logger.warning(f"Redis connection failed: {e}. Using the in-process cache only.")
+                await self._discard_client()
+            except Exception as e:
+                logger.error(f"Unexpected error initializing Redis: {e}. Using the in-process cache only.")
+                await self._discard_client()
+
+            return self.enabled
+
+    async def _discard_client(self):
+        if self.redis_client is not None:
+            try:
+                await self.redis_client.aclose()
+            except Exception:
+                pass
         self.redis_client = None
         self.enabled = False
 
-        try:
-            # Try to connect to Redis
-            self.redis_client = redis.from_url(
-                settings.REDIS_URL,
-                decode_responses=True,
-                socket_connect_timeout=2,
-                socket_timeout=2
-            )
-            # Test connection
-            self.redis_client.ping()
-            self.enabled = True
-            logger.info(f"Redis cache enabled at {settings.REDIS_URL}")
-        except (redis.ConnectionError, redis.TimeoutError) as e:
-            logger.warning(f"Redis connection failed: {e}. Running without cache.")
-            self.redis_client = None
-            self.enabled = False
-        except Exception as e:
-            logger.error(f"Unexpected error initializing Redis: {e}. Running without cache.")
-            self.redis_client = None
-            self.enabled = False
+    async def close(self):
+        """Close the Redis connection pool; a later call reconnects."""
+        for task in list(self._revalidations):
+            task.cancel()
+        async with self._connect_lock:
+            await self._discard_client()
+            self._connect_attempted = False
+
+    async def _client(self) -> Optional[aioredis.Redis]:
+        if not self._connect_attempted:
+            await self.connect()
+        return self.redis_client if self.enabled else None
+
+    def _local_ttl(self, ttl: int) -> float:
+        # Short local lifetime bounds staleness between workers
+        return min(ttl, settings.CACHE_LOCAL_TTL)
 
-    def get(self, key: str) -> Optional[Any]:
-        """Get value from cache by key."""
-        if not self.enabled or not self.redis_client:
+    def _remember(self, key: str, raw: bytes, pttl: int):
+        """Keep a value read from Redis locally, never past its Redis expiry (PTTL, ms)."""
+        if pttl == -1:  # no expiry
+            self.local.set(key, raw, settings.CACHE_LOCAL_TTL)
+        elif pttl > 0:
+            self.local.set(key, raw, self._local_ttl(pttl / 1000))
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Get value from cache by key (local tier first, then Redis)."""
+        raw = self.local.get(key)
+        if raw is not None:
+            return decode_value(raw)
+
+        client = await self._client()
+        if client is None:
             return None
 
         try:
-            value = self.redis_client.get(key)
-            if value:
-                return json.loads(value)
+            pipe = client.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.pttl(key)
+            raw, pttl = await pipe.execute()
+            if raw:
+                self._remember(key, raw, pttl)
+                return decode_value(raw)
             return None
         except Exception as e:
             logger.error(f"Cache get error for key {key}: {e}")
             return None
 
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
-        """Set value in cache with optional TTL (in seconds)."""
-        if not self.enabled or not self.redis_client:
+    async def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get several values; local misses are fetched in one round trip. Misses are None."""
+        raws: List[Optional[bytes]] = [self.local.get(k) for k in keys]
+        missing = [i for i, raw in enumerate(raws) if raw is None]
+
+        client = await self._client() if missing else None
+        if client is not None:
+            try:
+                pipe = client.pipeline(transaction=False)
+                pipe.mget([keys[i] for i in missing])
+                for i in missing:
+                    pipe.pttl(keys[i])
+                fetched, *pttls = await pipe.execute()
+                for i, raw, pttl in zip(missing, fetched, pttls):
+                    if raw:
+                        raws[i] = raw
+                        self._remember(keys[i], raw, pttl)
+            except Exception as e:
+                logger.error(f"Cache mget error for {len(missing)} keys: {e}")
+
+        return [decode_value(raw) if raw else None for raw in raws]
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None, kind: Optional[str] = None) -> bool:
+        """Set value in cache with optional TTL (in seconds), else the expiry for its data kind."""
+        ttl = ttl or cache_ttl(kind)
+        try:
+            serialized = encode_value(value)
+        except Exception as e:
+            logger.error(f"Cache encode error for key {key}: {e}")
+            return False
+        self.local.set(key, serialized, self._local_ttl(ttl))
+
+        client = await self._client()
+        if client is None:
             return False
 
         try:
-            ttl = ttl or settings.CACHE_TTL
-            serialized = json.dumps(value)
-            self.redis_client.setex(key, ttl, serialized)
+            await client.setex(key, ttl, serialized)
             return True
         except Exception as e:
             logger.error(f"Cache set error for key {key}: {e}")
             return False
 
-    def delete(self, key: str) -> bool:
+    async def set_many(
+        self, items: Dict[str, Any], ttl: Optional[int] = None, kind: Optional[str] = None
+    ) -> bool:
+        """Set several values, each with the TTL (or kind expiry), in one pipelined round trip."""
+        if not items:
+            return False
+        ttl = ttl or cache_ttl(kind)
+        try:
+            encoded = {key: encode_value(value) for key, value in items.items()}
+        except Exception as e:
+            logger.error(f"Cache encode error for {len(items)} keys: {e}")
+            return False
+        for key, raw in encoded.items():
+            self.local.set(key, raw, self._local_ttl(ttl))
+
+        client = await self._client()
+        if client is None:
+            return False
+
+        try:
+            pipe = client.pipeline(transaction=False)
+            for key, raw in encoded.items():
+                pipe.setex(key, ttl, raw)
+            await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Cache pipelined set error for {len(items)} keys: {e}")
+            return False
+
+    async def delete(self, key: str) -> bool:
         """Delete key from cache."""
-        if not self.enabled or not self.redis_client:
+        self.local.delete(key)
+        client = await self._client()
+        if client is None:
             return False
 
         try:
-            self.redis_client.delete(key)
+            await client.delete(key)
             return True
         except Exception as e:
             logger.error(f"Cache delete error for key {key}: {e}")
             return False
 
-    def get_stock_data(self, ticker: str) -> Optional[dict]:
+    async def get_or_revalidate(
+        self,
+        key: str,
+        loader: Loader,
+        kind: Optional[str] = None,
+        ttl: Optional[int] = None,
+    ) -> Any:
+        """
+        Stale-while-revalidate read of a JSON value produced by `loader`.
+
+        Within its soft TTL (`ttl`, else the expiry for its data kind) the
+        cached value is returned as is. For SWR_STALE_TTL after that it is
+        still returned immediately, while one background refresh per key
+        (per process via single-flight, across workers via a Redis lock)
+        reloads it. Misses load inline, with concurrent callers sharing one
+        load; loader errors propagate to them.
+        """
+        entry = await self.get(key)
+        if entry is not None:
+            if time.time() >= entry["fresh_until"]:
+                self._revalidate_in_background(key, loader, kind, ttl)
+            return entry["value"]
+        return await self._loads.do(key, lambda: self._load(key, loader, kind, ttl))
+
+    async def _load(self, key: str, loader: Loader, kind: Optional[str], ttl: Optional[int]) -> Any:
+        value = await loader()
+        soft_ttl = ttl or cache_ttl(kind)
+        entry = {"value": value, "fresh_until": time.time() + soft_ttl}
+        await self.set(key, entry, soft_ttl + settings.SWR_STALE_TTL)
+        return value
+
+    def _revalidate_in_background(self, key: str, loader: Loader, kind: Optional[str], ttl: Optional[int]):
+        if key in self._loads:
+            return
+        task = asyncio.create_task(self._revalidate(key, loader, kind, ttl))
+        self._revalidations.add(task)
+        task.add_done_callback(self._revalidations.discard)
+
+    async def _revalidate(self, key: str, loader: Loader, kind: Optional[str], ttl: Optional[int]):
+        client = await self._client()
+        lock_key = f"lock:{key}"
+        locked = False
+        try:
+            if client is not None:
+                locked = bool(await client.set(lock_key, b"1", nx=True, ex=settings.SWR_LOCK_TTL))
+                if not locked:
+                    return  # another worker is refreshing it
+                # Another worker may have refreshed it since our local copy
+                pipe = client.pipeline(transaction=False)
+                pipe.get(key)
+                pipe.pttl(key)
+                raw, pttl = await pipe.execute()
+                if raw and decode_value(raw)["fresh_until"] > time.time():
+                    self._remember(key, raw, pttl)
+                    return
+            await self._loads.do(key, lambda: self._load(key, loader, kind, ttl))
+        except Exception as e:
+            logger.warning(f"Background refresh failed for {key}: {e}")
+        finally:
+            if locked:
+                try:
+                    await client.delete(lock_key)
+                except Exception:
+                    pass
+
+    async def get_stock_data(self, ticker: str) -> Optional[dict]:
         """Get cached stock data for a ticker symbol."""
-        return self.get(f"stock:{ticker}")
+        return await self.get(f"stock:{ticker}")
+
+    async def get_many_stock_data(self, tickers: List[str]) -> Dict[str, Optional[dict]]:
+        """Get cached stock data for many tickers in one round trip."""
+        values = await self.get_many([f"stock:{t}" for t in tickers])
+        return dict(zip(tickers, values))
 
-    def set_stock_data(self, ticker: str, data: dict, ttl: Optional[int] = None) -> bool:
+    async def set_stock_data(self, ticker: str, data: dict, ttl: Optional[int] = None) -> bool:
         """Cache stock data for a ticker symbol."""
-        return self.set(f"stock:{ticker}", data, ttl)
\ No newline at end of file
+        return await self.set(f"stock:{ticker}", data, ttl)
+
+    async def set_many_stock_data(self, data: Dict[str, dict], ttl: Optional[int] = None) -> bool:
+        """Cache stock data for many tickers in one round trip."""
+        return await self.set_many({f"stock:{t}": d for t, d in data.items()}, ttl)
+
+    @staticmethod
+    def _candles_key(symbol: str, from_date: datetime, to_date: datetime) -> str:
+        return f"candles:{symbol.upper()}:{from_date:%Y-%m-%d}:{to_date:%Y-%m-%d}"
+
+    async def get_candles(self, symbol: str, from_date: datetime, to_date: datetime) -> Optional[CandleSeries]:
+        """Get a cached daily candle series (stored in binary form)."""
+        return await self.get(self._candles_key(symbol, from_date, to_date))
+
+    async def set_candles(
+        self,
+        symbol: str,
+        from_date: datetime,
+        to_date: datetime,
+        candles: CandleSeries,
+        ttl: Optional[int] = None,
+    ) -> bool:
+        """Cache a daily candle series (until the next close, outside the session)."""
+        return await self.set(self._candles_key(symbol, from_date, to_date), candles, ttl, kind=DAILY_BARS)
+
+    async def get_market_cap(self, symbol: str) -> Optional[dict]:
+        """Get cached market cap ({"market_cap": ...}, None = unknown upstream)."""
+        return await self.get(f"ref:market_cap:{symbol.upper()}")
+
+    async def set_market_cap(self, symbol: str, market_cap: Optional[float]) -> bool:
+        """Cache market cap as reference data (weekly expiry)."""
+        return await self.set(f"ref:market_cap:{symbol.upper()}", {"market_cap": market_cap}, kind=REFERENCE)
+
+    async def get_snapshot(self, name: str) -> Optional[Any]:
+        """Get a cached market snapshot response."""
+        return await self.get(f"snapshot:{name}")
+
+    async def set_snapshot(self, name: str, data: Any) -> bool:
+        """Cache a market snapshot: seconds during the session, until the next open outside it."""
+        return await self.set(f"snapshot:{name}", data, kind=SNAPSHOT)
+
+    async def get_scan_result(self, key: str) -> Optional[dict]:
+        """Get a cached scan outcome ({"result": ...}, result None = did not pass)."""
+        return await self.get(f"scan:{key}")
+
+    async def get_many_scan_results(self, keys: List[str]) -> List[Optional[dict]]:
+        """Get cached scan outcomes for many keys in one round trip."""
+        return await self.get_many([f"scan:{k}" for k in keys])
+
+    async def set_scan_result(self, key: str, data: dict, ttl: Optional[int] = None) -> bool:
+        """Cache a scan outcome, negative ones included."""
+        return await self.set(f"scan:{key}", data, ttl or settings.SCAN_RESULT_CACHE_TTL)
+
+    async def set_many_scan_results(self, data: Dict[str, dict], ttl: Optional[int] = None) -> bool:
+        """Cache many scan outcomes in one round trip."""
+        return await self.set_many(
+            {f"scan:{k}": d for k, d in data.items()}, ttl or settings.SCAN_RESULT_CACHE_TTL
+        )
+
+    async def get_technicals(self, key: str) -> Optional[dict]:
+        """Get cached symbol technicals."""
+        return await self.get(f"technicals:{key}")
+
+    async def set_technicals(self, key: str, data: dict, ttl: Optional[int] = None) -> bool:
+        """Cache symbol technicals."""
+        return await self.set(f"technicals:{key}", data, ttl or settings.SCAN_RESULT_CACHE_TTL)
+
+
+# Global cache service instance
+cache_service = CacheService()
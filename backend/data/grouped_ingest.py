@@ -0,0 +1,169 @@
+# data/grouped_ingest.py
+
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import settings
+from data.bar_store import BarStore, bar_store
+from models.candle import CandleSeries
+from utils.market_calendar import CLOSE_SETTLE, is_trading_day, session_close
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = "_grouped_ingest.json"
+
+
+def _state_path(store: BarStore) -> str:
+    return os.path.join(store.root, STATE_FILE)
+
+
+def load_state(store: BarStore = bar_store) -> Optional[dict]:
+    """Read ingestion progress ({"from_ms", "last_date", "last_final"}), or None before the first backfill."""
+    try:
+        with open(_state_path(store)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_state(store: BarStore, state: dict) -> None:
+    os.makedirs(store.root, exist_ok=True)
+    tmp = f"{_state_path(store)}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, _state_path(store))
+
+
+def _bar_final(d: datetime) -> bool:
+    """Whether a trading day's bar is final: its session closed and the bar settled."""
+    return datetime.now(timezone.utc) >= session_close(d.date()) + CLOSE_SETTLE
+
+
+def _write_chunk(store: BarStore, merged: Dict[str, CandleSeries], from_ms: Optional[int]) -> int:
+    return sum(store.write_tail(symbol, series, from_ms=from_ms) for symbol, series in merged.items())
+
+
+def _trading_days(start: datetime, end: datetime) -> List[datetime]:
+    """NYSE trading days in [start, end], so weekends and holidays cost no request."""
+    days = []
+    d = start
+    while d <= end:
+        if is_trading_day(d.date()):
+            days.append(d)
+        d += timedelta(days=1)
+    return days
+
+
+def _merge_days(days: List[Tuple[List[str], CandleSeries]]) -> Dict[str, CandleSeries]:
+    """Pivot per-day (symbols, bars) responses into per-symbol series sorted by t."""
+    symbols = np.concatenate([np.asarray(syms, dtype=str) for syms, _ in days])
+    cols = {
+        col: np.concatenate([getattr(bars, col) for _, bars in days])
+        for col in CandleSeries.COLUMNS
+    }
+
+    order = np.lexsort((cols["t"], symbols))
+    symbols = symbols[order]
+    cols = {col: arr[order] for col, arr in cols.items()}
+
+    unique, starts = np.unique(symbols, return_index=True)
+    ends = np.append(starts[1:], len(symbols))
+    return {
+        str(symbol): CandleSeries(*(cols[col][a:b] for col in CandleSeries.COLUMNS))
+        for symbol, a, b in zip(unique, starts, ends)
+    }
+
+
+async def ingest_grouped_daily(
+    backfill_days: Optional[int] = None,
+    store: BarStore = bar_store,
+) -> dict:
+    """
+    Backfill, then keep current, the whole US market in the bar store using
+    one grouped-daily request per trading day.
+
+    The first run backfills `backfill_days` calendar days (default
+    SCAN_LOOKBACK_DAYS). Later runs resume after the last ingested day, or
+    from it if its bar was captured before the close settled (so it gets
+    finalized); otherwise new days are pure appends to each symbol.
+    Symbols that split since the last run are dropped so their history is
+    re-downloaded, adjusted, by the per-symbol path on next use.
+    Progress is saved after every chunk, so an interrupted backfill resumes.
+
+    Schedule after the close (e.g. cron `python main.py ingest`) and set
+    BAR_STORE_SOURCE=grouped so scans read the store without any requests.
+    """
+    from providers.polygon import get_grouped_daily, get_split_tickers
+
+    started = time.perf_counter()
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    state = load_state(store)
+    split_symbols: List[str] = []
+
+    if state is None:
+        start = today - timedelta(days=backfill_days or settings.SCAN_LOOKBACK_DAYS)
+        state = {"from_ms": int((start - datetime(1970, 1, 1)).total_seconds() * 1000), "last_date": None}
+        backfill = True
+        logger.info(f"Grouped ingest: backfilling from {start.date()}")
+    else:
+        last = datetime.strptime(state["last_date"], "%Y-%m-%d")
+        start = last + timedelta(days=1) if state.get("last_final") else last
+        backfill = False
+        split_symbols = await get_split_tickers(last, today)
+        for symbol in split_symbols:
+            await asyncio.to_thread(store.delete, symbol)
+        if split_symbols:
+            logger.info(f"Grouped ingest: dropped {len(split_symbols)} split symbols for refetch")
+
+    days = _trading_days(start, today)
+    semaphore = asyncio.Semaphore(settings.SCAN_CONCURRENCY_LIMIT)
+
+    async def fetch_day(d: datetime) -> Tuple[List[str], CandleSeries]:
+        async with semaphore:
+            return await get_grouped_daily(d, adjusted=True)
+
+    chunk_size = max(1, settings.GROUPED_INGEST_CHUNK_DAYS)
+    days_with_data = 0
+    bars_written = 0
+    symbols_seen = set()
+
+    for i in range(0, len(days), chunk_size):
+        chunk = days[i:i + chunk_size]
+        responses = await asyncio.gather(*(fetch_day(d) for d in chunk))
+
+        loaded = [(d, r) for d, r in zip(chunk, responses) if r[0]]
+        if not loaded:
+            continue
+        days_with_data += len(loaded)
+
+        # Symbols already stored keep their coverage; new ones are only known
+        # to be complete from the backfill start during the backfill itself.
+        from_ms = state["from_ms"] if backfill else None
+        merged = _merge_days([r for _, r in loaded])
+        bars_written += await asyncio.to_thread(_write_chunk, store, merged, from_ms)
+        symbols_seen.update(merged)
+
+        last_day = loaded[-1][0]
+        state["last_date"] = last_day.strftime("%Y-%m-%d")
+        state["last_final"] = _bar_final(last_day)
+        await asyncio.to_thread(_save_state, store, state)
+
+    summary = {
+        "mode": "backfill" if backfill else "update",
+        "requests": len(days),
+        "days_with_data": days_with_data,
+        "symbols": len(symbols_seen),
+        "bars_written": bars_written,
+        "splits_reset": len(split_symbols),
+        "last_date": state["last_date"],
+        "elapsed_s": round(time.perf_counter() - started, 2),
+    }
+    logger.info(f"Grouped ingest complete: {summary}")
+    return summary
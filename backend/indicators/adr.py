@@ -1,13 +1,8 @@
-from typing import List
-from models.candle import Candle
+from models.candle import Candles, as_series
+from indicators.engine import adr_pct_np
 
 
-def adr_pct(candles: List[Candle], period: int) -> float:
+def adr_pct(candles: Candles, period: int) -> float:
     """Calculate Average Daily Range (%)."""
-    if len(candles) < period:
-        return 0.0
-
-    recent = candles[-period:]
-    ranges_pct = [((c.h - c.l) / c.c) * 100 for c in recent]
-    avg = sum(ranges_pct) / len(ranges_pct)
-    return avg
+    series = as_series(candles)
+    return float(adr_pct_np(series.h, series.l, series.c, period))
@@ -1,19 +1,10 @@
-from typing import List
+from typing import List, Sequence, Union
+import numpy as np
+from indicators.engine import ema_np
 
 
-def ema(values: List[float], period: int) -> List[float]:
+def ema(values: Union[Sequence[float], np.ndarray], period: int) -> List[float]:
     """Calculate Exponential Moving Average."""
-    if not values:
+    if len(values) == 0:
         return []
-
-    k = 2 / (period + 1)
-    out = []
-    prev = values[0]
-    out.append(prev)
-
-    for i in range(1, len(values)):
-        cur = values[i] * k + prev * (1 - k)
-        out.append(cur)
-        prev = cur
-
-    return out
+    return ema_np(np.asarray(values, dtype=np.float64), period).tolist()
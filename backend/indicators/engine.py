@@ -0,0 +1,131 @@
+from functools import lru_cache
+from typing import NamedTuple
+import numpy as np
+
+# Recurrences are evaluated in blocks of this many steps; each block is one
+# matrix product, so cost is O(n / BLOCK) NumPy calls for any number of rows.
+BLOCK = 64
+
+
+@lru_cache(maxsize=32)
+def _decay_kernel(alpha: float, beta: float, size: int):
+    """
+    Weights for y[j] = alpha * y[j-1] + beta * x[j] over one block:
+    y_block = x_block @ W + y_prev * carry.
+    """
+    powers = alpha ** np.arange(size + 1, dtype=np.float64)
+    j = np.arange(size)
+    lag = j[None, :] - j[:, None]  # W[m, j] weights x[m] in y[j]
+    w = np.where(lag >= 0, beta * powers[np.clip(lag, 0, size)], 0.0)
+    carry = powers[1:]
+    w.setflags(write=False)
+    carry.setflags(write=False)
+    return w, carry
+
+
+def _linear_recurrence(x: np.ndarray, alpha: float, beta: float, y0: np.ndarray) -> np.ndarray:
+    """
+    Evaluate y[i] = alpha * y[i-1] + beta * x[i] along the last axis,
+    with y[-1] = y0. Returns an array shaped like x.
+    """
+    out = np.empty_like(x, dtype=np.float64)
+    prev = np.asarray(y0, dtype=np.float64)
+    n = x.shape[-1]
+
+    for start in range(0, n, BLOCK):
+        block = x[..., start:start + BLOCK]
+        w, carry = _decay_kernel(alpha, beta, block.shape[-1])
+        out[..., start:start + BLOCK] = block @ w + prev[..., None] * carry
+        prev = out[..., start + block.shape[-1] - 1]
+
+    return out
+
+
+def ema_np(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    Exponential moving average along the last axis, seeded with the first value.
+    Accepts one series (n,) or a (symbols, n) matrix.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if values.shape[-1] == 0:
+        return values.copy()
+
+    k = 2 / (period + 1)
+    out = np.empty_like(values)
+    out[..., 0] = values[..., 0]
+    out[..., 1:] = _linear_recurrence(values[..., 1:], 1 - k, k, values[..., 0])
+    return out
+
+
+def true_range_np(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """True range for bars 1..n-1 (the first bar has no previous close)."""
+    prev_close = close[..., :-1]
+    high = high[..., 1:]
+    low = low[..., 1:]
+    return np.maximum(
+        high - low,
+        np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)),
+    )
+
+
+def atr_np(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int) -> np.ndarray:
+    """
+    Wilder ATR along the last axis, front-padded with its first value so the
+    result lines up with the input bars. Returns an empty array for < 2 bars.
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    n = close.shape[-1]
+    if n < 2:
+        return np.empty(close.shape[:-1] + (0,), dtype=np.float64)
+
+    tr = true_range_np(high, low, close)
+
+    # Seed is the mean of the first `period` true ranges (divided by period
+    # even when fewer exist), then Wilder's smoothing for the rest.
+    first = tr[..., :period].sum(axis=-1) / period
+    smoothed = _linear_recurrence(tr[..., period:], (period - 1) / period, 1 / period, first)
+
+    out = np.empty(close.shape, dtype=np.float64)
+    pad = n - smoothed.shape[-1]
+    out[..., :pad] = first[..., None]
+    out[..., pad:] = smoothed
+    return out
+
+
+def adr_pct_np(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int) -> np.ndarray:
+    """Average daily range (%) over the last `period` bars; 0.0 with too little history."""
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    if close.shape[-1] < period:
+        return np.zeros(close.shape[:-1], dtype=np.float64)
+
+    ranges_pct = ((high[..., -period:] - low[..., -period:]) / close[..., -period:]) * 100
+    return ranges_pct.sum(axis=-1) / period
+
+
+class IndicatorBatch(NamedTuple):
+    """Latest indicator values per symbol, each shaped (symbols,)."""
+    ema21: np.ndarray
+    ema50: np.ndarray
+    ema200: np.ndarray
+    atr14: np.ndarray
+    adr14: np.ndarray
+
+
+def compute_batch(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> IndicatorBatch:
+    """
+    Compute EMA21/50/200, Wilder ATR14 and ADR14 for a (symbols, days) matrix
+    in one call. Rows must be aligned on the same trading days; group symbols
+    by history length before stacking.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    return IndicatorBatch(
+        ema21=ema_np(close, 21)[..., -1],
+        ema50=ema_np(close, 50)[..., -1],
+        ema200=ema_np(close, 200)[..., -1],
+        atr14=atr_np(high, low, close, 14)[..., -1],
+        adr14=adr_pct_np(high, low, close, 14),
+    )
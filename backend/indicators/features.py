@@ -0,0 +1,73 @@
+from typing import Any, Callable, Dict, Hashable, Tuple, Union
+import numpy as np
+from models.candle import Candles, CandleSeries, as_series
+from indicators.engine import adr_pct_np, atr_np, ema_np
+from indicators.pivots import pivot_high_points, pivot_low_points
+
+
+class FeatureContext:
+    """
+    Lazily computed, memoized features of one candle series.
+
+    Build one per symbol per request and hand it to the patterns, scan_one
+    and the technicals path; each indicator is then computed at most once
+    no matter how many consumers ask for it. Returned arrays are shared, so
+    treat them as read-only.
+    """
+
+    def __init__(self, candles: Candles):
+        self.series: CandleSeries = as_series(candles)
+        self._cache: Dict[Hashable, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.series)
+
+    def _memo(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    @property
+    def price(self) -> float:
+        """Latest close."""
+        return float(self.series.c[-1])
+
+    def ema(self, period: int) -> np.ndarray:
+        """EMA of closes, aligned with the bars."""
+        return self._memo(("ema", period), lambda: ema_np(self.series.c, period))
+
+    def atr(self, period: int) -> np.ndarray:
+        """Wilder ATR, front-padded to align with the bars."""
+        s = self.series
+        return self._memo(("atr", period), lambda: atr_np(s.h, s.l, s.c, period))
+
+    def adr_pct(self, period: int) -> float:
+        """Average daily range (%) over the last `period` bars."""
+        s = self.series
+        return self._memo(("adr_pct", period), lambda: float(adr_pct_np(s.h, s.l, s.c, period)))
+
+    def avg_volume(self, period: int) -> float:
+        """Average volume over the last `period` bars (or all, if fewer)."""
+        def compute() -> float:
+            volumes = self.series.v[-period:].tolist()
+            return sum(volumes) / len(volumes) if volumes else 0.0
+        return self._memo(("avg_volume", period), compute)
+
+    def pivot_highs(self, left: int = 3, right: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+        """Pivot highs as (indices, prices)."""
+        return self._memo(("pivot_highs", left, right), lambda: pivot_high_points(self.series, left, right))
+
+    def pivot_lows(self, left: int = 3, right: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+        """Pivot lows as (indices, prices)."""
+        return self._memo(("pivot_lows", left, right), lambda: pivot_low_points(self.series, left, right))
+
+
+# Anything a pattern accepts: raw candles or an already-built context
+Features = Union[Candles, FeatureContext]
+
+
+def as_context(candles: Features) -> FeatureContext:
+    """Return the given FeatureContext, or build one around raw candles."""
+    if isinstance(candles, FeatureContext):
+        return candles
+    return FeatureContext(candles)
@@ -1,5 +1,7 @@
-from typing import List, NamedTuple
-from models.candle import Candle
+from typing import List, NamedTuple, Tuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from models.candle import Candles, as_series
 
 
 class Pivot(NamedTuple):
@@ -7,49 +9,69 @@ class Pivot(NamedTuple):
     price: float
 
 
-def pivot_highs(candles: List[Candle], left: int = 3, right: int = 3) -> List[Pivot]:
-    """Find pivot highs (local maxima)."""
-    out = []
-    for i in range(left, len(candles) - right):
-        h = candles[i].h
-        ok = True
+def _window_extreme(x: np.ndarray, size: int, reducer) -> np.ndarray:
+    """reducer over every length-`size` window along the last axis (n - size + 1 values)."""
+    return reducer(sliding_window_view(x, size, axis=-1), axis=-1)
+
+
+def _pivot_mask(x: np.ndarray, left: int, right: int, is_high: bool) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float64)
+    n = x.shape[-1]
+    mask = np.zeros(x.shape, dtype=bool)
+    if n - right <= left:
+        return mask
+
+    reducer = np.max if is_high else np.min
+    center = x[..., left:n - right]
+    ok = np.ones(center.shape, dtype=bool)
+
+    # Bars to the left must be strictly beaten, bars to the right may tie.
+    if left:
+        before = _window_extreme(x, left, reducer)[..., :n - right - left]
+        ok &= (before < center) if is_high else (before > center)
+    if right:
+        after = _window_extreme(x, right, reducer)[..., left + 1:n - right + 1]
+        ok &= (after <= center) if is_high else (after >= center)
+
+    mask[..., left:n - right] = ok
+    return mask
+
 
-        for j in range(i - left, i):
-            if candles[j].h >= h:
-                ok = False
-                break
+def pivot_high_mask(highs: np.ndarray, left: int = 3, right: int = 3) -> np.ndarray:
+    """
+    Boolean mask of pivot highs along the last axis of a (n,) or (symbols, n)
+    array: higher than the `left` previous bars, not exceeded by the `right`
+    following bars. Left-padding a row with NaN never creates pivots.
+    """
+    return _pivot_mask(highs, left, right, is_high=True)
 
-        if ok:
-            for j in range(i + 1, i + right + 1):
-                if j < len(candles) and candles[j].h > h:
-                    ok = False
-                    break
 
-        if ok:
-            out.append(Pivot(i, h))
+def pivot_low_mask(lows: np.ndarray, left: int = 3, right: int = 3) -> np.ndarray:
+    """Boolean mask of pivot lows; the mirror image of pivot_high_mask."""
+    return _pivot_mask(lows, left, right, is_high=False)
 
-    return out
+
+def pivot_high_points(candles: Candles, left: int = 3, right: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+    """Pivot highs as (indices, prices) arrays."""
+    highs = as_series(candles).h
+    idx = np.flatnonzero(pivot_high_mask(highs, left, right))
+    return idx, highs[idx]
+
+
+def pivot_low_points(candles: Candles, left: int = 3, right: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+    """Pivot lows as (indices, prices) arrays."""
+    lows = as_series(candles).l
+    idx = np.flatnonzero(pivot_low_mask(lows, left, right))
+    return idx, lows[idx]
+
+
+def pivot_highs(candles: Candles, left: int = 3, right: int = 3) -> List[Pivot]:
+    """Find pivot highs (local maxima)."""
+    idx, prices = pivot_high_points(candles, left, right)
+    return [Pivot(i, p) for i, p in zip(idx.tolist(), prices.tolist())]
 
 
-def pivot_lows(candles: List[Candle], left: int = 3, right: int = 3) -> List[Pivot]:
+def pivot_lows(candles: Candles, left: int = 3, right: int = 3) -> List[Pivot]:
     """Find pivot lows (local minima)."""
-    out = []
-    for i in range(left, len(candles) - right):
-        l = candles[i].l
-        ok = True
-
-        for j in range(i - left, i):
-            if candles[j].l <= l:
-                ok = False
-                break
-
-        if ok:
-            for j in range(i + 1, i + right + 1):
-                if j < len(candles) and candles[j].l < l:
-                    ok = False
-                    break
-
-        if ok:
-            out.append(Pivot(i, l))
-
-    return out
+    idx, prices = pivot_low_points(candles, left, right)
+    return [Pivot(i, p) for i, p in zip(idx.tolist(), prices.tolist())]
@@ -5,14 +5,20 @@ from dotenv import load_dotenv
 # Load environment variables first
 load_dotenv()
 
-from scan.scan_universe import scan_universe
+from scan.scan_universe import DEFAULT_UNIVERSE, scan_universe
 from scan.mock_results import get_mock_results
-from services.save_results import save_scan_results
+from services.save_results import save_scan_results, scan_write_buffer
+from services.supabase_client import supabase
+from services.notification_service import notification_queue
+from providers.polygon import close_session
+from scan.cpu_pool import shutdown_process_pool
+from data.cache_service import cache_service
 
 
 async def run_cli_scan():
     """Run the breakout scanner and save results to Supabase."""
     print("🚀 Starting breakout scanner...")
+    await notification_queue.start()
 
     try:
         # TRY: Real Polygon scan (may fail due to rate limits on free tier)
@@ -20,6 +26,8 @@ async def run_cli_scan():
         print("Attempting Polygon API scan...")
         results = await scan_universe()
 
+        scanned = DEFAULT_UNIVERSE if results else None
+
         # FALLBACK: If Polygon fails, use mock data for demo
         if not results:
             print("⚠️  Polygon API rate limited. Using mock data for demo...")
@@ -40,7 +48,7 @@ async def run_cli_scan():
             print()
             print(f"Saving to Supabase...")
             try:
-                await save_scan_results(results)
+                await save_scan_results(results, scanned)
                 print("✨ Scan complete.")
             except Exception as save_err:
                 print(f"⚠️  Supabase save failed (demo mode): {save_err}")
@@ -53,6 +61,31 @@ async def run_cli_scan():
         import traceback
         traceback.print_exc()
         exit(1)
+    finally:
+        # Deliver the alerts queued by this run before exiting
+        await notification_queue.stop(drain=True)
+        await scan_write_buffer.close()
+        await close_session()
+        await cache_service.close()
+        await supabase.close()
+        shutdown_process_pool()
+
+
+async def run_grouped_ingest(backfill_days: int = None):
+    """Backfill/update the local bar store from Polygon grouped-daily bars."""
+    from data.grouped_ingest import ingest_grouped_daily
+
+    print("📥 Ingesting grouped daily bars into the local bar store...")
+    try:
+        summary = await ingest_grouped_daily(backfill_days)
+        print(
+            f"✅ {summary['mode']}: {summary['requests']} requests, "
+            f"{summary['days_with_data']} trading days, {summary['symbols']} symbols, "
+            f"{summary['bars_written']} bars (through {summary['last_date']}) "
+            f"in {summary['elapsed_s']}s"
+        )
+    finally:
+        await close_session()
 
 
 def run_api_server():
@@ -78,6 +111,10 @@ if __name__ == "__main__":
     # Check for 'serve' argument to start API server
     if len(sys.argv) > 1 and sys.argv[1] == "serve":
         run_api_server()
+    elif len(sys.argv) > 1 and sys.argv[1] == "ingest":
+        # Optional backfill window in days for the first run: `python main.py ingest 420`
+        days = int(sys.argv[2]) if len(sys.argv) > 2 else None
+        asyncio.run(run_grouped_ingest(days))
     else:
         # Default: Run CLI scan
         asyncio.run(run_cli_scan())
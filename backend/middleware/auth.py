@@ -4,7 +4,7 @@ Verifies JWT tokens from Supabase Auth and extracts user information.
 """
 from fastapi import Request, HTTPException, Security, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from typing import Optional
+from typing import Dict, Optional
 import jwt
 import os
 import httpx
@@ -168,6 +168,23 @@ async def get_user_plan(user_id: str) -> str:
     return "core"
 
 
+async def get_user_plans(user_ids) -> Dict[str, str]:
+    """
+    Look up the plans of many users in bulk (see get_user_plan).
+    Users without a subscription row, or all of them if the lookup fails,
+    get "core".
+    """
+    from services.supabase_client import supabase
+    user_ids = list(user_ids)
+    plans: Dict[str, str] = {}
+    try:
+        for row in await supabase.select_in("subscriptions", "user_id", user_ids, "user_id, plan"):
+            plans.setdefault(row["user_id"], row.get("plan", "core"))
+    except Exception as e:
+        logger.error("Failed to fetch plans for %d users: %s", len(user_ids), e)
+    return {user_id: plans.get(user_id, "core") for user_id in user_ids}
+
+
 def require_role(required_role: str):
     """
     Decorator to require a specific role for an endpoint.
@@ -0,0 +1,50 @@
+-- Migration: One breakout_scans row per symbol per trading session
+-- Run this in Supabase SQL Editor
+--
+-- save_scan_results upserts on (symbol, scan_date), so rescanning a symbol
+-- on the same session updates its row instead of adding a duplicate.
+
+-- ============================================
+-- SCAN DATE COLUMN
+-- ============================================
+ALTER TABLE public.breakout_scans ADD COLUMN IF NOT EXISTS scan_date DATE;
+
+-- Backfill existing rows with the session they were scanned for, by the
+-- same rule as latest_session(): the US/Eastern date if it's a trading day
+-- and the session had opened (09:30), otherwise the previous trading day.
+-- NYSE holidays 2020-2027, from utils.market_calendar.holidays()
+WITH holidays (day) AS (
+    VALUES
+    (DATE '2020-01-01'), (DATE '2020-01-20'), (DATE '2020-02-17'), (DATE '2020-04-10'), (DATE '2020-05-25'), (DATE '2020-07-03'), (DATE '2020-09-07'), (DATE '2020-11-26'), (DATE '2020-12-25'),
+    (DATE '2021-01-01'), (DATE '2021-01-18'), (DATE '2021-02-15'), (DATE '2021-04-02'), (DATE '2021-05-31'), (DATE '2021-07-05'), (DATE '2021-09-06'), (DATE '2021-11-25'), (DATE '2021-12-24'),
+    (DATE '2022-01-17'), (DATE '2022-02-21'), (DATE '2022-04-15'), (DATE '2022-05-30'), (DATE '2022-06-20'), (DATE '2022-07-04'), (DATE '2022-09-05'), (DATE '2022-11-24'), (DATE '2022-12-26'),
+    (DATE '2023-01-02'), (DATE '2023-01-16'), (DATE '2023-02-20'), (DATE '2023-04-07'), (DATE '2023-05-29'), (DATE '2023-06-19'), (DATE '2023-07-04'), (DATE '2023-09-04'), (DATE '2023-11-23'), (DATE '2023-12-25'),
+    (DATE '2024-01-01'), (DATE '2024-01-15'), (DATE '2024-02-19'), (DATE '2024-03-29'), (DATE '2024-05-27'), (DATE '2024-06-19'), (DATE '2024-07-04'), (DATE '2024-09-02'), (DATE '2024-11-28'), (DATE '2024-12-25'),
+    (DATE '2025-01-01'), (DATE '2025-01-20'), (DATE '2025-02-17'), (DATE '2025-04-18'), (DATE '2025-05-26'), (DATE '2025-06-19'), (DATE '2025-07-04'), (DATE '2025-09-01'), (DATE '2025-11-27'), (DATE '2025-12-25'),
+    (DATE '2026-01-01'), (DATE '2026-01-19'), (DATE '2026-02-16'), (DATE '2026-04-03'), (DATE '2026-05-25'), (DATE '2026-06-19'), (DATE '2026-07-03'), (DATE '2026-09-07'), (DATE '2026-11-26'), (DATE '2026-12-25'),
+    (DATE '2027-01-01'), (DATE '2027-01-18'), (DATE '2027-02-15'), (DATE '2027-03-26'), (DATE '2027-05-31'), (DATE '2027-06-18'), (DATE '2027-07-05'), (DATE '2027-09-06'), (DATE '2027-11-25'), (DATE '2027-12-24')
+)
+UPDATE public.breakout_scans b
+SET scan_date = (
+    SELECT max(d)::date
+    FROM (SELECT b.scanned_at::timestamptz AT TIME ZONE 'America/New_York' AS ts) AS et,
+         generate_series((et.ts::date - 10)::timestamp, et.ts::date::timestamp, interval '1 day') AS d
+    WHERE extract(isodow FROM d) < 6
+      AND d::date NOT IN (SELECT day FROM holidays)
+      AND (d::date < et.ts::date OR et.ts::time >= TIME '09:30')
+)
+WHERE scan_date IS NULL;
+
+-- Keep only the latest row per symbol and session (a pre-open scan and
+-- the previous session's scans now share a date)
+DELETE FROM public.breakout_scans a
+USING public.breakout_scans b
+WHERE a.symbol = b.symbol
+  AND a.scan_date = b.scan_date
+  AND (a.scanned_at, a.ctid) < (b.scanned_at, b.ctid);
+
+ALTER TABLE public.breakout_scans ALTER COLUMN scan_date SET NOT NULL;
+
+-- Conflict target for the upsert (also serves per-symbol history lookups)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_breakout_scans_symbol_scan_date
+    ON public.breakout_scans(symbol, scan_date);
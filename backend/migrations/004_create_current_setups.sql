@@ -0,0 +1,59 @@
+-- Migration: Current setups (latest scan per symbol)
+-- Run this in Supabase SQL Editor, after 003
+--
+-- breakout_scans keeps every scan; current_setups keeps one row per symbol,
+-- its latest scan. save_scan_results upserts both (and removes symbols a
+-- later scan no longer finds), and the results API's dashboard queries read
+-- this table, so they don't grow with scan history.
+
+-- ============================================
+-- CURRENT SETUPS TABLE
+-- ============================================
+CREATE TABLE IF NOT EXISTS public.current_setups (
+    symbol TEXT PRIMARY KEY,
+    price NUMERIC(12, 2),
+    trigger_price NUMERIC(12, 2),
+    distance_pct NUMERIC(8, 2),
+    adr_pct_14 NUMERIC(8, 2),
+    avg_vol_50 NUMERIC(20, 2),
+    ema21 NUMERIC(12, 2),
+    ema50 NUMERIC(12, 2),
+    ema200 NUMERIC(12, 2),
+    setup_type TEXT,
+    breakout_score INTEGER NOT NULL,
+    notes TEXT[],
+    market_cap NUMERIC(20, 2),
+    scan_date DATE NOT NULL,
+    scanned_at TIMESTAMPTZ NOT NULL
+);
+
+-- Dashboard: best setups (optionally since a date), best first
+CREATE INDEX IF NOT EXISTS idx_current_setups_score
+    ON public.current_setups(breakout_score DESC, scanned_at DESC);
+
+-- Dashboard filtered by setup type
+CREATE INDEX IF NOT EXISTS idx_current_setups_setup_score
+    ON public.current_setups(setup_type, breakout_score DESC, scanned_at DESC);
+
+-- Backfill from history: each symbol's latest scan
+INSERT INTO public.current_setups (
+    symbol, price, trigger_price, distance_pct, adr_pct_14, avg_vol_50,
+    ema21, ema50, ema200, setup_type, breakout_score, notes, market_cap,
+    scan_date, scanned_at
+)
+SELECT DISTINCT ON (symbol)
+    symbol, price, trigger_price, distance_pct, adr_pct_14, avg_vol_50,
+    ema21, ema50, ema200, setup_type, breakout_score, notes, market_cap,
+    scan_date, scanned_at
+FROM public.breakout_scans
+ORDER BY symbol, scanned_at DESC
+ON CONFLICT (symbol) DO NOTHING;
+
+-- Row Level Security (RLS); the backend's service role bypasses it
+ALTER TABLE public.current_setups ENABLE ROW LEVEL SECURITY;
+
+-- Policy: Signed-in users can read current setups
+DROP POLICY IF EXISTS "Authenticated users can view current setups" ON public.current_setups;
+CREATE POLICY "Authenticated users can view current setups"
+    ON public.current_setups FOR SELECT
+    USING (auth.role() = 'authenticated');
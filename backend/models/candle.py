@@ -1,4 +1,5 @@
-from typing import List, Literal, Optional
+from typing import Iterator, List, Literal, Optional, Sequence, Union
+import numpy as np
 from pydantic import BaseModel
 
 
@@ -11,6 +12,122 @@ class Candle(BaseModel):
     v: float
 
 
+class CandleSeries:
+    """
+    Columnar OHLCV series backed by contiguous NumPy arrays.
+
+    t is int64 unix ms; o/h/l/c/v are float64. Slicing returns a view-backed
+    CandleSeries, integer indexing returns a single Candle.
+    """
+
+    COLUMNS = ("t", "o", "h", "l", "c", "v")
+    __slots__ = COLUMNS
+
+    # Binary form: MAGIC, uint32 row count, then each column as raw
+    # little-endian int64/float64 in COLUMNS order
+    MAGIC = b"\x00CS1"
+    _HEADER = np.dtype("<u4")
+
+    def __init__(self, t, o, h, l, c, v):
+        self.t = np.ascontiguousarray(t, dtype=np.int64)
+        self.o = np.ascontiguousarray(o, dtype=np.float64)
+        self.h = np.ascontiguousarray(h, dtype=np.float64)
+        self.l = np.ascontiguousarray(l, dtype=np.float64)
+        self.c = np.ascontiguousarray(c, dtype=np.float64)
+        self.v = np.ascontiguousarray(v, dtype=np.float64)
+
+    @classmethod
+    def empty(cls) -> "CandleSeries":
+        return cls(*([] for _ in cls.COLUMNS))
+
+    @classmethod
+    def from_candles(cls, candles: Sequence[Candle]) -> "CandleSeries":
+        """Build from a list of Candle models."""
+        return cls(*([getattr(c, col) for c in candles] for col in cls.COLUMNS))
+
+    @classmethod
+    def from_polygon(cls, results: List[dict]) -> "CandleSeries":
+        """Build straight from Polygon aggregate JSON rows, without per-bar objects."""
+        n = len(results)
+        return cls(
+            np.fromiter((r.get("t", 0) for r in results), dtype=np.int64, count=n),
+            *(
+                np.fromiter((r.get(col, 0) for r in results), dtype=np.float64, count=n)
+                for col in cls.COLUMNS[1:]
+            ),
+        )
+
+    @classmethod
+    def from_bytes(cls, buf: bytes) -> "CandleSeries":
+        """
+        Decode to_bytes() output. Columns are zero-copy, read-only views
+        of `buf`.
+        """
+        if not buf.startswith(cls.MAGIC):
+            raise ValueError("Not an encoded CandleSeries")
+        offset = len(cls.MAGIC)
+        n = int(np.frombuffer(buf, dtype=cls._HEADER, count=1, offset=offset)[0])
+        offset += cls._HEADER.itemsize
+        cols = []
+        for col in cls.COLUMNS:
+            dtype = np.dtype("<i8") if col == "t" else np.dtype("<f8")
+            cols.append(np.frombuffer(buf, dtype=dtype, count=n, offset=offset))
+            offset += n * dtype.itemsize
+        return cls(*cols)
+
+    def to_bytes(self) -> bytes:
+        """Compact binary encoding (48 bytes per bar plus an 8-byte header)."""
+        parts = [self.MAGIC, np.array([len(self)], dtype=self._HEADER).tobytes()]
+        parts.extend(
+            getattr(self, col).astype("<i8" if col == "t" else "<f8", copy=False).tobytes()
+            for col in self.COLUMNS
+        )
+        return b"".join(parts)
+
+    def to_candles(self) -> List[Candle]:
+        """Materialize Candle models (for JSON responses and legacy callers)."""
+        return [
+            Candle(t=t, o=o, h=h, l=l, c=c, v=v)
+            for t, o, h, l, c, v in zip(*(getattr(self, col).tolist() for col in self.COLUMNS))
+        ]
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return CandleSeries(*(getattr(self, col)[idx] for col in self.COLUMNS))
+        return Candle(
+            t=int(self.t[idx]),
+            o=float(self.o[idx]),
+            h=float(self.h[idx]),
+            l=float(self.l[idx]),
+            c=float(self.c[idx]),
+            v=float(self.v[idx]),
+        )
+
+    def __iter__(self) -> Iterator[Candle]:
+        return iter(self.to_candles())
+
+    def __repr__(self) -> str:
+        return f"CandleSeries(len={len(self)})"
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, col).nbytes for col in self.COLUMNS)
+
+
+# Anything the indicators and patterns accept as price history
+Candles = Union[CandleSeries, List[Candle]]
+
+
+def as_series(candles: Candles) -> CandleSeries:
+    """Return candles as a CandleSeries, converting a Candle list if needed."""
+    if isinstance(candles, CandleSeries):
+        return candles
+    return CandleSeries.from_candles(candles)
+
+
 class ScanResult(BaseModel):
     symbol: str
     price: float
@@ -1,5 +1,5 @@
 from typing import List, NamedTuple, Optional
-from models.candle import Candle
+from models.candle import Candles, as_series
 from indicators.pivots import pivot_highs, pivot_lows
 
 
@@ -104,7 +104,7 @@ def calculate_level_strength(
 
 
 def detect_breakout_levels(
-    candles: List[Candle],
+    candles: Candles,
     lookback: int = 120,
     tolerance_pct: float = 0.5
 ) -> BreakoutLevelsResult:
@@ -119,11 +119,14 @@ def detect_breakout_levels(
     Returns:
         BreakoutLevelsResult with resistance and support levels
     """
+    candles = as_series(candles)
     if len(candles) < lookback:
         lookback = len(candles)
 
     recent_candles = candles[-lookback:]
-    current_price = candles[-1].c
+    current_price = float(candles.c[-1])
+    recent_highs = recent_candles.h.tolist()
+    recent_lows = recent_candles.l.tolist()
 
     # Find pivot highs (resistance) and lows (support)
     pivot_highs_list = pivot_highs(recent_candles, 3, 3)
@@ -143,8 +146,8 @@ def detect_breakout_levels(
 
         # Count touches (how many times price tested this level)
         touches = sum(
-            1 for c in recent_candles
-            if abs(c.h - pivot.price) / pivot.price * 100 < tolerance_pct
+            1 for h in recent_highs
+            if abs(h - pivot.price) / pivot.price * 100 < tolerance_pct
         )
 
         bars_ago = len(recent_candles) - pivot.i - 1
@@ -167,8 +170,8 @@ def detect_breakout_levels(
         )
 
         touches = sum(
-            1 for c in recent_candles
-            if abs(c.l - pivot.price) / pivot.price * 100 < tolerance_pct
+            1 for l in recent_lows
+            if abs(l - pivot.price) / pivot.price * 100 < tolerance_pct
         )
 
         bars_ago = len(recent_candles) - pivot.i - 1
@@ -1,6 +1,5 @@
-from typing import List, NamedTuple
-from models.candle import Candle
-from indicators.atr import atr
+from typing import NamedTuple
+from indicators.features import Features, as_context
 
 
 class TightBaseResult(NamedTuple):
@@ -9,19 +8,20 @@ class TightBaseResult(NamedTuple):
     atr_down: bool
 
 
-def is_tight_base(candles: List[Candle], lookback_days: int = 120) -> TightBaseResult:
+def is_tight_base(candles: Features, lookback_days: int = 120) -> TightBaseResult:
     """Detect tight consolidation base over ~4-6 months."""
-    if len(candles) < lookback_days + 10:
+    ctx = as_context(candles)
+    series = ctx.series
+    if len(series) < lookback_days + 10:
         return TightBaseResult(ok=False, range_pct=0.0, atr_down=False)
 
-    slice_candles = candles[-lookback_days:]
-    highest_high = max(c.h for c in slice_candles)
-    lowest_low = min(c.l for c in slice_candles)
+    slice_candles = series[-lookback_days:]
+    highest_high = float(slice_candles.h.max())
+    lowest_low = float(slice_candles.l.min())
     range_pct = ((highest_high - lowest_low) / lowest_low) * 100
 
     # ATR contraction over last ~60 days
-    atr14 = atr(candles, 14)
-    recent = atr14[-60:]
+    recent = ctx.atr(14)[-60:].tolist()
 
     if len(recent) < 30:
         return TightBaseResult(ok=False, range_pct=range_pct, atr_down=False)
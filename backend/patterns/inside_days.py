@@ -1,5 +1,5 @@
 from typing import List, NamedTuple, Optional
-from models.candle import Candle
+from models.candle import Candles, as_series
 
 
 class InsideDayResult(NamedTuple):
@@ -10,7 +10,7 @@ class InsideDayResult(NamedTuple):
     parent_index: Optional[int]
 
 
-def detect_inside_day(candles: List[Candle], index: int = -1) -> InsideDayResult:
+def detect_inside_day(candles: Candles, index: int = -1) -> InsideDayResult:
     """
     Detect inside day pattern at specified index.
 
@@ -25,42 +25,44 @@ def detect_inside_day(candles: List[Candle], index: int = -1) -> InsideDayResult
     Returns:
         InsideDayResult with detection status and levels
     """
-    if len(candles) < 2:
+    series = as_series(candles)
+    if len(series) < 2:
         return InsideDayResult(False, None, None, None)
 
     if index < 0:
-        index = len(candles) + index
+        index = len(series) + index
 
     if index < 1:
         return InsideDayResult(False, None, None, None)
 
-    current = candles[index]
-    parent = candles[index - 1]
+    cur_h, cur_l = float(series.h[index]), float(series.l[index])
+    parent_h, parent_l = float(series.h[index - 1]), float(series.l[index - 1])
 
-    is_inside = (current.h <= parent.h) and (current.l >= parent.l)
+    is_inside = (cur_h <= parent_h) and (cur_l >= parent_l)
 
     if is_inside:
         return InsideDayResult(
             is_inside=True,
-            inside_high=current.h,
-            inside_low=current.l,
+            inside_high=cur_h,
+            inside_low=cur_l,
             parent_index=index - 1
         )
 
     return InsideDayResult(False, None, None, None)
 
 
-def count_consecutive_inside_days(candles: List[Candle]) -> int:
+def count_consecutive_inside_days(candles: Candles) -> int:
     """
     Count consecutive inside days from the most recent candle.
 
     Returns:
         Number of consecutive inside days
     """
+    series = as_series(candles)
     count = 0
 
-    for i in range(len(candles) - 1, 0, -1):
-        result = detect_inside_day(candles, i)
+    for i in range(len(series) - 1, 0, -1):
+        result = detect_inside_day(series, i)
         if result.is_inside:
             count += 1
         else:
@@ -69,13 +71,14 @@ def count_consecutive_inside_days(candles: List[Candle]) -> int:
     return count
 
 
-def find_inside_day_breakout_level(candles: List[Candle]) -> dict:
+def find_inside_day_breakout_level(candles: Candles) -> dict:
     """
     Find the breakout level for an inside day pattern.
 
     Returns:
         Dictionary with breakout levels and pattern info
     """
+    candles = as_series(candles)
     result = detect_inside_day(candles)
 
     if not result.is_inside:
@@ -1,6 +1,5 @@
 from typing import List, NamedTuple, Optional
-from models.candle import Candle
-from indicators.pivots import pivot_highs
+from indicators.features import Features, as_context
 
 
 class Cluster(NamedTuple):
@@ -39,31 +38,32 @@ def cluster_resistance_levels(
     return clusters
 
 
-def find_inside_day_high(candles: List[Candle]) -> Optional[float]:
+def find_inside_day_high(candles: Features) -> Optional[float]:
     """Find inside day high (price contained within previous candle)."""
-    if len(candles) < 3:
+    series = as_context(candles).series
+    if len(series) < 3:
         return None
 
-    a = candles[-2]
-    b = candles[-1]
+    a_h, b_h = float(series.h[-2]), float(series.h[-1])
+    a_l, b_l = float(series.l[-2]), float(series.l[-1])
 
     # Inside day: current high <= prev high AND current low >= prev low
-    if b.h <= a.h and b.l >= a.l:
-        return b.h
+    if b_h <= a_h and b_l >= a_l:
+        return b_h
 
     return None
 
 
-def pick_trigger_price(candles: List[Candle]) -> dict:
+def pick_trigger_price(candles: Features) -> dict:
     """Select breakout trigger level with priority."""
-    pivots = pivot_highs(candles, 3, 3)
-    recent_pivots = pivots[-20:] if len(pivots) > 20 else pivots
-    pivot_prices = [p.price for p in recent_pivots]
+    ctx = as_context(candles)
+    _, pivot_prices = ctx.pivot_highs(3, 3)
+    pivot_prices = pivot_prices[-20:].tolist()
 
     clusters = cluster_resistance_levels(pivot_prices, 0.3)
     best_cluster = clusters[0] if clusters else None
     last_swing_high = pivot_prices[-1] if pivot_prices else None
-    inside_high = find_inside_day_high(candles)
+    inside_high = find_inside_day_high(ctx)
 
     # Priority:
     # 1) flat top (cluster touches >= 3)
@@ -1,5 +1,5 @@
-from typing import List, NamedTuple
-from models.candle import Candle
+from typing import NamedTuple
+from indicators.features import Features, as_context
 
 
 class VolumeQualityResult(NamedTuple):
@@ -8,12 +8,13 @@ class VolumeQualityResult(NamedTuple):
     avg_red: float
 
 
-def volume_quality(candles: List[Candle], lookback: int = 30) -> VolumeQualityResult:
+def volume_quality(candles: Features, lookback: int = 30) -> VolumeQualityResult:
     """Check if volume is higher on green days than red days."""
-    slice_candles = candles[-lookback:]
+    slice_candles = as_context(candles).series[-lookback:]
 
-    green = [c.v for c in slice_candles if c.c >= c.o]
-    red = [c.v for c in slice_candles if c.c < c.o]
+    is_green = slice_candles.c >= slice_candles.o
+    green = slice_candles.v[is_green].tolist()
+    red = slice_candles.v[~is_green].tolist()
 
     avg_green = sum(green) / len(green) if green else 0.0
     avg_red = sum(red) / len(red) if red else 0.0
@@ -1,6 +1,5 @@
 from typing import List, NamedTuple
-from models.candle import Candle
-from indicators.pivots import pivot_lows
+from indicators.features import Features, as_context
 
 
 class HigherLowsResult(NamedTuple):
@@ -8,15 +7,16 @@ class HigherLowsResult(NamedTuple):
     points: List[float]
 
 
-def has_higher_lows(candles: List[Candle], min_count: int = 3) -> HigherLowsResult:
+def has_higher_lows(candles: Features, min_count: int = 3) -> HigherLowsResult:
     """Detect ascending lows (wedge structure)."""
-    lows = pivot_lows(candles, 3, 3)[-8:] if len(pivot_lows(candles, 3, 3)) > 0 else []
+    _, lows = as_context(candles).pivot_lows(3, 3)
+    lows = lows[-8:]
 
     if len(lows) < min_count:
         return HigherLowsResult(ok=False, points=[])
 
     # Pick last 3 meaningful lows
-    last = [p.price for p in lows[-min_count:]]
+    last = lows[-min_count:].tolist()
     ok = last[0] < last[1] and last[1] < last[2]
 
     return HigherLowsResult(ok=ok, points=last)
@@ -1,11 +1,16 @@
 import os
+import time
 import asyncio
+import json
 import aiohttp
 import logging
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from dotenv import load_dotenv
-from models.candle import Candle
+from models.candle import CandleSeries
+from config import settings
+from data.cache_service import cache_service
+from utils.single_flight import SingleFlight
 
 load_dotenv()
 
@@ -18,39 +23,192 @@ if not API_KEY:
     raise ValueError("Missing POLYGON_API_KEY in environment variables.")
 
 
+# App-lifetime HTTP session shared by every Polygon request
+_session: Optional[aiohttp.ClientSession] = None
+
+# Identical requests in flight at the same time, coalesced into one
+_inflight = SingleFlight()
+
+
+# Minimum seconds between two increases, or two decreases, of the rate;
+# a decrease also holds off the next increase this long
+ADJUST_INTERVAL = 1.0
+
+
+class AdaptiveRateLimiter:
+    """
+    Process-wide token bucket for Polygon requests, in requests/second.
+
+    The rate adapts AIMD-style: each 429 multiplies it by `decrease`, and
+    successful responses add back `increase` req/s, up to `max_rate`. Each
+    happens at most once per ADJUST_INTERVAL, so a burst of 429s from
+    requests already in flight counts as one signal, and the increase
+    grows with time rather than with the request rate.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        min_rate: float,
+        max_rate: float,
+        burst: int,
+        increase: float,
+        decrease: float,
+    ):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._last_decrease = 0.0
+        self._last_increase = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent. Waiters are served in FIFO order."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def on_success(self) -> None:
+        """Additive increase after a successful response."""
+        now = time.monotonic()
+        if now - max(self._last_increase, self._last_decrease) < ADJUST_INTERVAL:
+            return
+        self._last_increase = now
+        self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        """Multiplicative decrease after a 429, honouring Retry-After if sent."""
+        now = time.monotonic()
+        if retry_after:
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+        if now - self._last_decrease < ADJUST_INTERVAL:
+            return
+        self._last_decrease = now
+        self._refill(now)
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        self._tokens = min(self._tokens, 0.0)
+        logger.warning(f"Polygon rate limited, slowing to {self.rate:.2f} req/s")
+
+
+rate_limiter = AdaptiveRateLimiter(
+    rate=settings.POLYGON_RATE_LIMIT,
+    min_rate=settings.POLYGON_RATE_LIMIT_MIN,
+    max_rate=settings.POLYGON_RATE_LIMIT_MAX,
+    burst=settings.POLYGON_RATE_BURST,
+    increase=settings.POLYGON_RATE_INCREASE,
+    decrease=settings.POLYGON_RATE_DECREASE,
+)
+
+
 def to_ymd(d: datetime) -> str:
     """Format date as YYYY-MM-DD."""
     return d.strftime("%Y-%m-%d")
 
 
+async def open_session() -> aiohttp.ClientSession:
+    """
+    Open the shared Polygon HTTP session.
+    Keep-alive connections, DNS results and TLS sessions are reused across
+    requests. Called from the app lifespan; safe to call more than once.
+    """
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=settings.POLYGON_MAX_CONNECTIONS,
+            limit_per_host=settings.POLYGON_MAX_CONNECTIONS_PER_HOST,
+            ttl_dns_cache=settings.POLYGON_DNS_CACHE_TTL,
+            keepalive_timeout=settings.POLYGON_KEEPALIVE_TIMEOUT,
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=settings.POLYGON_HTTP_TIMEOUT),
+        )
+        logger.info("Polygon HTTP session opened")
+    return _session
+
+
+async def close_session() -> None:
+    """Close the shared Polygon HTTP session and its connection pool."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+        logger.info("Polygon HTTP session closed")
+    _session = None
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """Return the shared session, opening it lazily (e.g. for CLI scans)."""
+    if _session is None or _session.closed:
+        return await open_session()
+    return _session
+
+
+def _retry_after(resp: aiohttp.ClientResponse) -> Optional[float]:
+    """Parse a Retry-After header given in seconds."""
+    try:
+        return float(resp.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
 async def polygon_get(url: str, params: dict = None, tries: int = 5) -> dict:
-    """Make GET request to Polygon API with retries and backoff."""
-    if params is None:
-        params = {}
+    """
+    Make GET request to Polygon API through the shared rate limiter, with retries.
+    Concurrent identical requests (same url and params) share one round trip;
+    each caller decodes its own copy of the response body.
+    """
+    params = {k: v for k, v in (params or {}).items() if k != "apiKey"}
+    key = (url, tuple(sorted((k, str(v)) for k, v in params.items())))
+    return json.loads(await _inflight.do(key, lambda: _polygon_get(url, params, tries)))
+
 
-    params["apiKey"] = API_KEY
+async def _polygon_get(url: str, params: dict, tries: int) -> bytes:
+    """The raw response body of a successful request (shared, immutable)."""
+    params = {**params, "apiKey": API_KEY}
     last_err = None
+    session = await get_session()
 
     for attempt in range(tries):
+        await rate_limiter.acquire()
         try:
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as session:
-                async with session.get(url, params=params) as resp:
-                    if resp.status == 200:
-                        return await resp.json()
-                    elif resp.status == 429:
-                        # Rate limit - aggressive backoff
-                        backoff = 1.0 * (2 ** attempt)
-                        logger.warning(f"Rate limited on {url}, retry in {backoff}s...")
-                        await asyncio.sleep(backoff)
-                        continue
-                    elif resp.status in [500, 502, 503, 504]:
-                        # Server error, retry
-                        backoff = 0.5 * (2 ** attempt)
-                        await asyncio.sleep(backoff)
-                        continue
-                    else:
-                        text = await resp.text()
-                        raise Exception(f"Polygon API error {resp.status}: {text[:200]}")
+            async with session.get(url, params=params) as resp:
+                if resp.status == 200:
+                    rate_limiter.on_success()
+                    return await resp.read()
+                elif resp.status == 429:
+                    # Rate limit - slow the shared limiter, and back this request
+                    # off too (Retry-After if sent) so the attempts span seconds
+                    retry_after = _retry_after(resp)
+                    rate_limiter.on_throttle(retry_after)
+                    last_err = Exception(f"Polygon API rate limited: {url}")
+                    backoff = max(retry_after or 0.0, 1.0 * (2 ** attempt))
+                elif resp.status in [500, 502, 503, 504]:
+                    # Server error, retry
+                    backoff = 0.5 * (2 ** attempt)
+                else:
+                    text = await resp.text()
+                    raise Exception(f"Polygon API error {resp.status}: {text[:200]}")
+            # Sleep after the response is released, not while holding its connection
+            if attempt < tries - 1:
+                await asyncio.sleep(backoff)
         except asyncio.TimeoutError:
             last_err = Exception("Request timeout")
             backoff = 1.0 + attempt
@@ -69,7 +227,7 @@ async def get_daily_candles(
     from_date: datetime,
     to_date: datetime,
     adjusted: bool = True,
-) -> List[Candle]:
+) -> CandleSeries:
     """Fetch daily OHLCV candles from Polygon."""
     url = f"{POLYGON_BASE}/v2/aggs/ticker/{symbol}/range/1/day/{to_ymd(from_date)}/{to_ymd(to_date)}"
 
@@ -82,27 +240,58 @@ async def get_daily_candles(
         },
     )
 
-    results = data.get("results", [])
-    return [
-        Candle(
-            t=int(r.get("t", 0)),
-            o=float(r.get("o", 0)),
-            h=float(r.get("h", 0)),
-            l=float(r.get("l", 0)),
-            c=float(r.get("c", 0)),
-            v=float(r.get("v", 0)),
-        )
-        for r in results
-    ]
+    return CandleSeries.from_polygon(data.get("results") or [])
 
 
 async def get_market_cap_usd(symbol: str) -> Optional[float]:
-    """Fetch market cap from Polygon."""
+    """Fetch market cap from Polygon (cached as weekly reference data)."""
+    cached = await cache_service.get_market_cap(symbol)
+    if cached is not None:
+        return cached["market_cap"]
+
     url = f"{POLYGON_BASE}/v3/reference/tickers/{symbol}"
 
     try:
         data = await polygon_get(url)
         cap = data.get("results", {}).get("market_cap")
-        return float(cap) if cap else None
     except Exception:
+        # Not cached: a failed lookup is retried next time
         return None
+
+    market_cap = float(cap) if cap else None
+    await cache_service.set_market_cap(symbol, market_cap)
+    return market_cap
+
+
+async def get_grouped_daily(date: datetime, adjusted: bool = True) -> Tuple[List[str], CandleSeries]:
+    """
+    Fetch one trading day's daily candle for every US stock ticker.
+    Returns (symbols, bars) with one bar per symbol in the same order;
+    empty on weekends and market holidays.
+    """
+    url = f"{POLYGON_BASE}/v2/aggs/grouped/locale/us/market/stocks/{to_ymd(date)}"
+
+    data = await polygon_get(url, {"adjusted": str(adjusted).lower()})
+
+    results = [r for r in data.get("results") or [] if r.get("T")]
+    return [r["T"] for r in results], CandleSeries.from_polygon(results)
+
+
+async def get_split_tickers(from_date: datetime, to_date: datetime) -> List[str]:
+    """Fetch tickers with a stock split executed within [from_date, to_date]."""
+    url = f"{POLYGON_BASE}/v3/reference/splits"
+    params = {
+        "execution_date.gte": to_ymd(from_date),
+        "execution_date.lte": to_ymd(to_date),
+        "limit": 1000,
+    }
+
+    tickers = []
+    while url:
+        data = await polygon_get(url, params)
+        tickers.extend(r["ticker"] for r in data.get("results", []) if r.get("ticker"))
+        # next_url already carries the cursor and filters
+        url = data.get("next_url")
+        params = {}
+
+    return tickers
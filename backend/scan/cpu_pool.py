@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
+
+from config import settings
+from models.candle import CandleSeries, ScanResult
+from scan.scan_one import scan_one
+
+logger = logging.getLogger(__name__)
+
+# Shared pool for pattern detection, so CPU work never runs on the event loop
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def worker_count() -> int:
+    """Number of worker processes (SCAN_CPU_WORKERS, or one per core)."""
+    return settings.SCAN_CPU_WORKERS if settings.SCAN_CPU_WORKERS > 0 else (os.cpu_count() or 1)
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Return the shared process pool, starting it on first use."""
+    global _pool
+    if _pool is None:
+        # spawn: forking a process that runs an event loop and HTTP
+        # connections is unsafe, and it matches the macOS/Windows default
+        _pool = ProcessPoolExecutor(
+            max_workers=worker_count(),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        logger.info(f"Started scan process pool with {worker_count()} workers")
+    return _pool
+
+
+def shutdown_process_pool() -> None:
+    """Stop the shared process pool; call once on shutdown."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+def scan_batch(items: List[Tuple[str, CandleSeries]]) -> List[Optional[ScanResult]]:
+    """Scan several symbols in one task, amortizing the IPC round trip."""
+    results = []
+    for symbol, candles in items:
+        try:
+            results.append(scan_one(symbol, candles))
+        except Exception as e:
+            logger.error(f"Error scanning {symbol}: {e}")
+            results.append(None)
+    return results
+
+
+async def _run_in_pool(fn, *args):
+    """
+    Run fn(*args) in the shared pool. A worker that died (OOM kill,
+    segfault) breaks the whole executor, so the broken pool is replaced
+    and the call retried once on a fresh one.
+    """
+    global _pool
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+    try:
+        return await loop.run_in_executor(pool, fn, *args)
+    except BrokenProcessPool:
+        # Concurrent callers on the same broken pool replace it only once
+        if _pool is pool:
+            logger.error("Scan process pool broke (a worker died), starting a new one")
+            pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        return await loop.run_in_executor(get_process_pool(), fn, *args)
+
+
+async def run_scan_batch(items: List[Tuple[str, CandleSeries]]) -> List[Optional[ScanResult]]:
+    """Run scan_batch in the process pool without blocking the event loop."""
+    return await _run_in_pool(scan_batch, items)
+
+
+async def run_scan_one(symbol: str, candles: CandleSeries) -> Optional[ScanResult]:
+    """
+    Run scan_one in the process pool without blocking the event loop.
+    The candles and the result are pickled across the process boundary.
+    """
+    return await _run_in_pool(scan_one, symbol, candles)
@@ -0,0 +1,103 @@
+import hashlib
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from data.cache_service import cache_service
+from models.candle import CandleSeries, ScanResult
+from scan.scan_one import scan_params_hash
+from utils.market_calendar import DAILY_BARS
+
+
+def result_key(symbol: str, candles: CandleSeries) -> Optional[str]:
+    """
+    Cache key for scanning `candles`: symbol, last bar timestamp and a digest
+    of the scan parameters plus the last bar's values. The values matter
+    because an intraday bar keeps its timestamp while it is still forming.
+    Returns None when there is nothing to key on.
+    """
+    if len(candles) == 0:
+        return None
+    last = candles[-1]
+    digest = hashlib.sha1(
+        f"{scan_params_hash()}:{last.o!r}:{last.h!r}:{last.l!r}:{last.c!r}:{last.v!r}".encode()
+    ).hexdigest()[:16]
+    return f"{symbol.upper()}:{last.t}:{digest}"
+
+
+def _decode(cached: Optional[dict]) -> Tuple[bool, Optional[ScanResult]]:
+    if cached is None:
+        return False, None
+    result = cached.get("result")
+    return True, ScanResult.model_validate(result) if result else None
+
+
+def _encode(result: Optional[ScanResult]) -> dict:
+    return {"result": result.model_dump() if result else None}
+
+
+async def get_cached_result(key: Optional[str]) -> Tuple[bool, Optional[ScanResult]]:
+    """Look up a scan outcome; returns (hit, result), result None = did not pass."""
+    if key is None:
+        return False, None
+    return _decode(await cache_service.get_scan_result(key))
+
+
+async def get_cached_results(keys: List[Optional[str]]) -> List[Tuple[bool, Optional[ScanResult]]]:
+    """Look up many scan outcomes in one round trip; same shape as get_cached_result."""
+    present = [k for k in keys if k is not None]
+    found = dict(zip(present, await cache_service.get_many_scan_results(present))) if present else {}
+    return [_decode(found.get(k)) if k is not None else (False, None) for k in keys]
+
+
+async def cache_result(key: Optional[str], result: Optional[ScanResult]) -> None:
+    """Store a scan outcome, negative ones included."""
+    if key is not None:
+        await cache_service.set_scan_result(key, _encode(result))
+
+
+async def cache_results(outcomes: List[Tuple[Optional[str], Optional[ScanResult]]]) -> None:
+    """Store many scan outcomes in one round trip."""
+    items = {key: _encode(result) for key, result in outcomes if key is not None}
+    if items:
+        await cache_service.set_many_scan_results(items)
+
+
+def _decode_technicals(cached: Dict[str, Any]) -> Dict[str, Any]:
+    if cached.get("scan_result"):
+        cached["scan_result"] = ScanResult.model_validate(cached["scan_result"])
+    return cached
+
+
+def _encode_technicals(technicals: Dict[str, Any]) -> Dict[str, Any]:
+    scan_result = technicals.get("scan_result")
+    return {**technicals, "scan_result": scan_result.model_dump() if scan_result else None}
+
+
+async def get_cached_technicals(key: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Look up technicals stored by cache_technicals."""
+    if key is None:
+        return None
+    cached = await cache_service.get_technicals(key)
+    return _decode_technicals(cached) if cached is not None else None
+
+
+async def cache_technicals(key: Optional[str], technicals: Dict[str, Any]) -> None:
+    """Store the output of get_symbol_technicals."""
+    if key is None:
+        return
+    await cache_service.set_technicals(key, _encode_technicals(technicals))
+
+
+async def get_or_revalidate_technicals(
+    symbol: str,
+    loader: Callable[[], Awaitable[Dict[str, Any]]],
+) -> Dict[str, Any]:
+    """
+    Serve a symbol's technicals stale-while-revalidate: without any upstream
+    request while cached, refreshed in the background once past the
+    daily-bar expiry (see CacheService.get_or_revalidate).
+    """
+    async def load() -> Dict[str, Any]:
+        return _encode_technicals(await loader())
+
+    cached = await cache_service.get_or_revalidate(f"symbol_technicals:{symbol.upper()}", load, kind=DAILY_BARS)
+    return _decode_technicals(dict(cached))
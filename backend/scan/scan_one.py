@@ -1,62 +1,77 @@
-from typing import List, Optional
-from models.candle import Candle
-from models.candle import ScanResult
-from indicators.ema import ema
-from indicators.adr import adr_pct
+import hashlib
+import json
+from typing import Optional
+from models.candle import Candles, ScanResult
+from indicators.features import Features, as_context
 from patterns.consolidation import is_tight_base
 from patterns.resistance import pick_trigger_price
 from patterns.wedge import has_higher_lows
 from patterns.volume import volume_quality
 from scoring.breakout_score import score_breakout, is_actionable
 
+# Filter and pattern parameters; anything that changes scan output belongs
+# here (bump "version" for logic changes) so cached results are invalidated.
+SCAN_PARAMS = {
+    "version": 1,
+    "min_history": 260,
+    "min_avg_vol_50": 1_000_000,
+    "min_adr_pct_14": 2.0,
+    "min_market_cap": 300_000_000,
+    "base_lookback": 120,
+    "higher_lows_count": 3,
+    "volume_lookback": 30,
+}
 
-def avg_volume(candles: List[Candle], period: int) -> float:
+
+def scan_params_hash() -> str:
+    """Short, stable hash of SCAN_PARAMS for cache keys."""
+    payload = json.dumps(SCAN_PARAMS, sort_keys=True).encode()
+    return hashlib.sha1(payload).hexdigest()[:12]
+
+
+def avg_volume(candles: Candles, period: int) -> float:
     """Calculate average volume over period."""
-    slice_candles = candles[-period:] if len(candles) >= period else candles
-    if not slice_candles:
-        return 0.0
-    return sum(c.v for c in slice_candles) / len(slice_candles)
+    return as_context(candles).avg_volume(period)
 
 
-def scan_one(symbol: str, candles: List[Candle]) -> Optional[ScanResult]:
-    """Scan a single ticker and return result if actionable."""
+def scan_one(symbol: str, candles: Features) -> Optional[ScanResult]:
+    """
+    Scan a single ticker and return result if actionable.
+    Pass a FeatureContext to share indicators already computed by the caller.
+    """
+    ctx = as_context(candles)
+
     # Need enough history for EMA200 + base detection
-    if len(candles) < 260:
+    if len(ctx) < SCAN_PARAMS["min_history"]:
         return None
 
-    closes = [c.c for c in candles]
-
     # Calculate EMAs
-    ema21_arr = ema(closes, 21)
-    ema50_arr = ema(closes, 50)
-    ema200_arr = ema(closes, 200)
-
-    price = closes[-1]
-    ema21 = ema21_arr[-1]
-    ema50 = ema50_arr[-1]
-    ema200 = ema200_arr[-1]
+    price = ctx.price
+    ema21 = float(ctx.ema(21)[-1])
+    ema50 = float(ctx.ema(50)[-1])
+    ema200 = float(ctx.ema(200)[-1])
 
     # HARD FILTER 1: Above key EMAs (trend alignment)
     if not (price > ema21 and price > ema50 and price > ema200):
         return None
 
     # HARD FILTER 2: Volume (liquidity)
-    avg_vol_50 = avg_volume(candles, 50)
-    if avg_vol_50 < 1_000_000:
+    avg_vol_50 = ctx.avg_volume(50)
+    if avg_vol_50 < SCAN_PARAMS["min_avg_vol_50"]:
         return None
 
     # HARD FILTER 3: ADR% (movement potential)
-    adr14 = adr_pct(candles, 14)
-    if adr14 < 2.0:
+    adr14 = ctx.adr_pct(14)
+    if adr14 < SCAN_PARAMS["min_adr_pct_14"]:
         return None
 
     # PATTERNS
-    base = is_tight_base(candles, 120)
-    wedge = has_higher_lows(candles, 3)
-    vol = volume_quality(candles, 30)
+    base = is_tight_base(ctx, SCAN_PARAMS["base_lookback"])
+    wedge = has_higher_lows(ctx, SCAN_PARAMS["higher_lows_count"])
+    vol = volume_quality(ctx, SCAN_PARAMS["volume_lookback"])
 
     # TRIGGER PRICE
-    trigger_info = pick_trigger_price(candles)
+    trigger_info = pick_trigger_price(ctx)
     if not trigger_info["trigger"]:
         return None
 
@@ -1,19 +1,31 @@
 import asyncio
 import logging
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
-from models.candle import ScanResult
+from typing import AsyncIterator, List, NamedTuple, Optional, Dict, Any, Tuple
+from models.candle import CandleSeries, ScanResult
 from providers.polygon import get_daily_candles, get_market_cap_usd
-from scan.scan_one import scan_one, avg_volume
-from indicators.ema import ema
-from indicators.adr import adr_pct
+from data.bar_store import bar_store
+from data.cache_service import cache_service
+from scan.scan_one import SCAN_PARAMS, scan_one
+from scan.cpu_pool import run_scan_batch, run_scan_one, worker_count
+from scan.result_cache import (
+    result_key, get_cached_result, get_cached_results, cache_result, cache_results,
+    get_cached_technicals, cache_technicals, get_or_revalidate_technicals,
+)
+from indicators.features import FeatureContext
 from config import settings
+from utils.market_calendar import latest_session
+from utils.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
 # Parse default universe from settings
 DEFAULT_UNIVERSE = [s.strip() for s in settings.DEFAULT_SCAN_UNIVERSE.split(",")]
 
+# Concurrent single-symbol requests for the same ticker, coalesced
+_symbol_scans = SingleFlight()
+_technicals = SingleFlight()
+
 
 def days_ago(n: int) -> datetime:
     """Get date n days ago."""
@@ -22,27 +34,69 @@ def days_ago(n: int) -> datetime:
     return d - timedelta(days=n)
 
 
-async def scan_one_symbol(symbol: str) -> Optional[ScanResult]:
-    """Scan a single symbol, fetch data, apply logic."""
-    try:
-        from_date = days_ago(settings.SCAN_LOOKBACK_DAYS)
-        to_date = datetime.utcnow()
+def scan_window() -> Tuple[datetime, datetime]:
+    """
+    Date range symbol data is loaded for: SCAN_LOOKBACK_DAYS up to the
+    latest session. Anchored on the session, not the clock, so the range
+    (and the candle cache keys built from it) holds overnight and on weekends.
+    """
+    to_date = datetime.combine(latest_session(), datetime.min.time())
+    return to_date - timedelta(days=settings.SCAN_LOOKBACK_DAYS), to_date
+
+
+async def load_daily_candles(symbol: str, from_date: datetime, to_date: datetime) -> CandleSeries:
+    """
+    Load adjusted daily candles, via the local bar store when enabled,
+    otherwise through the (binary-encoded) candle cache.
+    """
+    if settings.BAR_STORE_ENABLED:
+        return await bar_store.get_daily_candles(symbol, from_date, to_date)
+
+    candles = await cache_service.get_candles(symbol, from_date, to_date)
+    if candles is None:
+        candles = await get_daily_candles(symbol, from_date, to_date, adjusted=True)
+        await cache_service.set_candles(symbol, from_date, to_date, candles)
+    return candles
+
 
-        # Add delay between API calls to respect rate limits
-        await asyncio.sleep(settings.SCAN_API_DELAY)
+async def fetch_symbol_data(symbol: str) -> Optional[Tuple[CandleSeries, Optional[float]]]:
+    """Fetch candles and market cap; None if the symbol fails the market cap filter."""
+    from_date, to_date = scan_window()
+
+    candles, market_cap = await asyncio.gather(
+        load_daily_candles(symbol, from_date, to_date),
+        get_market_cap_usd(symbol),
+    )
+
+    # Hard filter: market cap
+    if market_cap is not None and market_cap < SCAN_PARAMS["min_market_cap"]:
+        return None
+
+    return candles, market_cap
+
+
+async def scan_one_symbol(symbol: str) -> Optional[ScanResult]:
+    """
+    Scan a single symbol, fetch data, apply logic.
+    Concurrent scans of the same symbol share one run.
+    """
+    return await _symbol_scans.do(symbol, lambda: _scan_one_symbol(symbol))
 
-        candles, market_cap = await asyncio.gather(
-            get_daily_candles(symbol, from_date, to_date, adjusted=True),
-            get_market_cap_usd(symbol),
-        )
 
-        # Hard filter: market cap
-        if market_cap is not None and market_cap < 300_000_000:
+async def _scan_one_symbol(symbol: str) -> Optional[ScanResult]:
+    try:
+        fetched = await fetch_symbol_data(symbol)
+        if fetched is None:
             return None
+        candles, market_cap = fetched
 
-        result = scan_one(symbol, candles)
+        key = result_key(symbol, candles)
+        hit, result = await get_cached_result(key)
+        if not hit:
+            result = await run_scan_one(symbol, candles)
+            await cache_result(key, result)
         if result:
-            result.market_cap = market_cap
+            result = result.model_copy(update={"market_cap": market_cap})
 
         return result
     except Exception as e:
@@ -54,33 +108,56 @@ async def get_symbol_technicals(symbol: str) -> Dict[str, Any]:
     """
     Fetch Polygon data and compute full technicals for a symbol.
     No hard filters — always returns data. Raises on data fetch failure.
+    Served stale-while-revalidate: a cached copy is returned at once and
+    refreshed in the background when old. Concurrent calls for the same
+    symbol share one computation.
     """
-    from_date = days_ago(settings.SCAN_LOOKBACK_DAYS)
-    to_date = datetime.utcnow()
+    return await get_or_revalidate_technicals(
+        symbol, lambda: _technicals.do(symbol, lambda: _get_symbol_technicals(symbol))
+    )
+
+
+async def _get_symbol_technicals(symbol: str) -> Dict[str, Any]:
+    from_date, to_date = scan_window()
 
     candles, market_cap = await asyncio.gather(
-        get_daily_candles(symbol, from_date, to_date, adjusted=True),
+        load_daily_candles(symbol, from_date, to_date),
         get_market_cap_usd(symbol),
     )
 
     if len(candles) < 50:
         raise ValueError(f"Not enough price history for {symbol} ({len(candles)} candles)")
 
-    closes = [c.c for c in candles]
-    price = closes[-1]
+    # Same last bar and parameters -> same technicals; only market cap moves
+    key = result_key(symbol, candles)
+    cached = await get_cached_technicals(key)
+    if cached is not None:
+        # Copies: the cached entry and result may be shared with other callers
+        cached = {**cached, "market_cap": market_cap}
+        if cached["scan_result"]:
+            cached["scan_result"] = cached["scan_result"].model_copy(update={"market_cap": market_cap})
+        return cached
+
+    # One context for both the summary below and scan_one, so every
+    # indicator is computed once
+    ctx = FeatureContext(candles)
+    price = ctx.price
 
-    ema21_val = ema(closes, 21)[-1] if len(closes) >= 21 else None
-    ema50_val = ema(closes, 50)[-1] if len(closes) >= 50 else None
-    ema200_val = ema(closes, 200)[-1] if len(closes) >= 200 else None
-    avg_vol = avg_volume(candles, 50)
-    adr14 = adr_pct(candles, 14)
+    ema21_val = float(ctx.ema(21)[-1]) if len(ctx) >= 21 else None
+    ema50_val = float(ctx.ema(50)[-1]) if len(ctx) >= 50 else None
+    ema200_val = float(ctx.ema(200)[-1]) if len(ctx) >= 200 else None
+    avg_vol = ctx.avg_volume(50)
+    adr14 = ctx.adr_pct(14)
 
     # Attempt full breakout scan (may return None if filters not met)
     scan_result: Optional[ScanResult] = None
-    if len(candles) >= 260:
-        scan_result = scan_one(symbol, candles)
+    if len(ctx) >= SCAN_PARAMS["min_history"]:
+        hit, scan_result = await get_cached_result(key)
+        if not hit:
+            scan_result = scan_one(symbol, ctx)
+            await cache_result(key, scan_result)
         if scan_result:
-            scan_result.market_cap = market_cap
+            scan_result = scan_result.model_copy(update={"market_cap": market_cap})
 
     # Trend assessment
     trend = "Mixed / Consolidating"
@@ -94,7 +171,7 @@ async def get_symbol_technicals(symbol: str) -> Dict[str, Any]:
         elif price < ema21_val < ema50_val < ema200_val:
             trend = "Downtrend — below all EMAs"
 
-    return {
+    technicals = {
         "symbol": symbol,
         "price": price,
         "ema21": ema21_val,
@@ -107,25 +184,141 @@ async def get_symbol_technicals(symbol: str) -> Dict[str, Any]:
         "trend": trend,
         "scan_result": scan_result,
     }
+    await cache_technicals(key, technicals)
+    return technicals
 
 
-async def scan_universe(symbols: List[str] = None) -> List[ScanResult]:
-    """Scan entire universe, return actionable setups."""
+class ScanUpdate(NamedTuple):
+    """One symbol finished: its result (None if it didn't pass) and overall progress."""
+    index: int
+    symbol: str
+    result: Optional[ScanResult]
+    done: int
+    total: int
+
+
+async def scan_universe_stream(symbols: List[str] = None) -> AsyncIterator[ScanUpdate]:
+    """
+    Scan a universe, yielding a ScanUpdate as each symbol completes.
+
+    Stages joined by bounded queues: async fetchers load candles
+    (providers.polygon.rate_limiter paces the requests), a checker looks up
+    everything fetched so far in the result cache with one MGET, and
+    scorers hand the misses to the process pool in batches, so pattern
+    detection uses every core and never blocks the event loop. The queue
+    bounds keep fetching from running far ahead of scoring. Closing the
+    generator early cancels the remaining work.
+    """
     if symbols is None:
         symbols = DEFAULT_UNIVERSE
 
-    # Run scans concurrently to respect Polygon rate limits
-    semaphore = asyncio.Semaphore(settings.SCAN_CONCURRENCY_LIMIT)
+    fetched_queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, settings.SCAN_QUEUE_SIZE))
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, settings.SCAN_QUEUE_SIZE))
+    updates: asyncio.Queue = asyncio.Queue()
+    pending = iter(enumerate(symbols))
+
+    async def drain(source: asyncio.Queue, limit: int) -> Tuple[list, bool]:
+        """Wait for one item, then take whatever else is queued, up to limit.
+        Returns (items, finished); stops after at most one None sentinel."""
+        items = []
+        item = await source.get()
+        while item is not None:
+            items.append(item)
+            if len(items) >= limit or source.empty():
+                break
+            item = source.get_nowait()
+        return items, item is None
 
-    async def bounded_scan(symbol):
-        async with semaphore:
-            return await scan_one_symbol(symbol)
+    async def fetcher():
+        # Fetchers share one iterator, so each symbol is fetched once
+        for index, symbol in pending:
+            try:
+                fetched = await fetch_symbol_data(symbol)
+            except Exception as e:
+                logger.error(f"Error scanning {symbol}: {e}")
+                fetched = None
+            if fetched is None:
+                updates.put_nowait((index, symbol, None))
+            else:
+                await fetched_queue.put((index, symbol, *fetched))
 
-    tasks = [bounded_scan(sym) for sym in symbols]
-    raw = await asyncio.gather(*tasks)
-    results = [r for r in raw if r is not None]
+    async def checker():
+        # Unchanged last bar -> reuse the stored outcome, even a negative one
+        done = False
+        while not done:
+            batch, done = await drain(fetched_queue, settings.SCAN_QUEUE_SIZE)
+            if not batch:
+                continue
+            keys = [result_key(symbol, candles) for _, symbol, candles, _ in batch]
+            try:
+                cached = await get_cached_results(keys)
+            except Exception as e:
+                logger.error(f"Result cache lookup failed: {e}")
+                cached = [(False, None)] * len(batch)
+            for (index, symbol, candles, market_cap), key, (hit, result) in zip(batch, keys, cached):
+                if hit:
+                    if result:
+                        result.market_cap = market_cap
+                    updates.put_nowait((index, symbol, result))
+                else:
+                    await queue.put((index, symbol, candles, market_cap, key))
 
-    # Sort best first
-    results.sort(key=lambda x: x.breakout_score, reverse=True)
+    async def scorer():
+        # Take whatever is queued (up to SCAN_CPU_BATCH) as one pool task
+        done = False
+        while not done:
+            batch, done = await drain(queue, settings.SCAN_CPU_BATCH)
+            if not batch:
+                continue
+            try:
+                scanned = await run_scan_batch([(symbol, candles) for _, symbol, candles, _, _ in batch])
+            except Exception as e:
+                logger.error(f"Error scanning {', '.join(item[1] for item in batch)}: {e}")
+                scanned = [None] * len(batch)
+                batch = [(*item[:4], None) for item in batch]  # don't cache failures
+            await cache_results([(key, result) for (_, _, _, _, key), result in zip(batch, scanned)])
+            for (index, symbol, _, market_cap, _), result in zip(batch, scanned):
+                if result:
+                    result.market_cap = market_cap
+                updates.put_nowait((index, symbol, result))
+
+    async def run():
+        # Two scorers per worker keep every process busy while results pickle back
+        check = asyncio.create_task(checker())
+        scorers = [asyncio.create_task(scorer()) for _ in range(2 * worker_count())]
+        try:
+            await asyncio.gather(*(fetcher() for _ in range(max(1, settings.SCAN_CONCURRENCY_LIMIT))))
+            await fetched_queue.put(None)
+            await check
+            for _ in scorers:
+                await queue.put(None)
+            await asyncio.gather(*scorers)
+        finally:
+            for task in [check, *scorers]:
+                task.cancel()
+            updates.put_nowait(None)
+
+    runner = asyncio.create_task(run())
+    done = 0
+    try:
+        while (update := await updates.get()) is not None:
+            done += 1
+            yield ScanUpdate(*update, done=done, total=len(symbols))
+        await runner
+    finally:
+        runner.cancel()
 
-    return results
+
+def rank_results(found: List[Tuple[int, ScanResult]]) -> List[ScanResult]:
+    """Sort (universe index, result) pairs best first; ties keep universe order."""
+    return [r for _, r in sorted(found, key=lambda x: (-x[1].breakout_score, x[0]))]
+
+
+async def scan_universe(symbols: List[str] = None) -> List[ScanResult]:
+    """Scan entire universe, return actionable setups."""
+    found = [
+        (update.index, update.result)
+        async for update in scan_universe_stream(symbols)
+        if update.result
+    ]
+    return rank_results(found)
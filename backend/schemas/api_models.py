@@ -1,6 +1,6 @@
 from fastapi import HTTPException
 from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional, Literal
+from typing import Dict, List, Optional, Literal
 from models.candle import ScanResult
 import re
 
@@ -110,10 +110,11 @@ class ResultsResponse(BaseModel):
 class ScanStatusResponse(BaseModel):
     """Response model for background task status."""
     task_id: str
-    status: Literal["running", "completed", "failed"]
-    results: Optional[List[ScanResult]] = None
+    status: Literal["pending", "running", "completed", "failed", "cancelled"]
+    results: Optional[List[ScanResult]] = None  # results so far while running
     count: int = 0
     error: Optional[str] = None
+    progress: Optional[Dict[str, int]] = None  # {"done", "total", "found"}
 
 
 class SymbolInfo(BaseModel):
@@ -0,0 +1,127 @@
+"""
+Batched watchlist alert resolution.
+
+Turns a batch of scan results into the alerts to send. Recipients are
+matched against the in-process watchlist index (services.watchlist_index)
+without touching the database, then everything the dispatch needs
+(profiles, plans and push subscriptions) is loaded with a handful of bulk
+`in` queries. Until the index is built, matching queries the watchlist
+items and preferences instead.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from models.candle import ScanResult
+from services.supabase_client import supabase
+from services.watchlist_index import PREFERENCE_FIELDS, Match, wants_alert, watchlist_index
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingAlert:
+    """One notification to dispatch: a user whose watchlist matched a scan result."""
+    user_id: str
+    email: str
+    scan_result: ScanResult
+    preferences: dict
+    plan: str
+    push_subscription: Optional[dict] = None
+
+
+def _first_by(rows: List[dict], *keys: str) -> dict:
+    """Index rows by one or more columns, keeping the first row per value (as .eq(...)[0] did)."""
+    indexed: dict = {}
+    for row in rows:
+        indexed.setdefault(row[keys[0]] if len(keys) == 1 else tuple(row[k] for k in keys), row)
+    return indexed
+
+
+async def _load_push_subscriptions(user_ids: List[str]) -> Dict[str, dict]:
+    # Requires a `push_subscriptions` table with columns (user_id, subscription_data).
+    if not user_ids:
+        return {}
+    try:
+        rows = await supabase.select_in("push_subscriptions", "user_id", user_ids, "user_id, subscription_data")
+    except Exception as e:
+        logger.warning("Could not fetch push subscriptions for %d users: %s", len(user_ids), e)
+        return {}
+    return {user_id: row["subscription_data"] for user_id, row in _first_by(rows, "user_id").items()}
+
+
+async def _match_from_database(scan_by_symbol: Dict[str, ScanResult]) -> List[Match]:
+    """Index-less matching: query alert-enabled watchlist items and their users' preferences."""
+    items = await supabase.select_in(
+        "watchlist_items", "symbol", sorted(scan_by_symbol), "user_id, symbol", alert_enabled=True
+    )
+    if not items:
+        return []
+    user_ids = list(dict.fromkeys(item["user_id"] for item in items))
+    prefs_rows = await supabase.select_in("user_preferences", "user_id", user_ids, PREFERENCE_FIELDS)
+    preferences_by_user = _first_by(prefs_rows, "user_id")
+
+    matches: List[Match] = []
+    # A symbol on several of a user's watchlists alerts them once
+    for item in _first_by(items, "user_id", "symbol").values():
+        preferences = preferences_by_user.get(item["user_id"], {})
+        if wants_alert(preferences, scan_by_symbol[item["symbol"]].breakout_score):
+            matches.append((item["user_id"], item["symbol"], preferences))
+    return matches
+
+
+async def resolve_alerts(results: List[ScanResult]) -> Tuple[List[PendingAlert], Dict[str, float]]:
+    """
+    Find the alerts to send for a batch of scan results: users with an
+    alert-enabled watchlist item for a scanned symbol, whose score
+    threshold (default 80) is met and who have a channel enabled.
+
+    Returns (alerts, timings); timings holds the milliseconds spent in the
+    "match" (finding recipients) and "load" (users' data) phases. Raises if
+    the watchlist items, profiles or preferences can't be fetched.
+    """
+    from middleware.auth import get_user_plans
+
+    timings: Dict[str, float] = {}
+    scan_by_symbol = {r.symbol: r for r in results}
+
+    started = time.perf_counter()
+    if watchlist_index.ready:
+        matches = watchlist_index.match(list(scan_by_symbol.values()))
+    else:
+        matches = await _match_from_database(scan_by_symbol)
+    timings["match"] = (time.perf_counter() - started) * 1000
+    if not matches:
+        return [], timings
+
+    started = time.perf_counter()
+    user_ids = list(dict.fromkeys(user_id for user_id, _, _ in matches))
+    push_users = list(dict.fromkeys(user_id for user_id, _, prefs in matches if prefs.get("push_alerts")))
+    # Profiles' PK is `id`, not `user_id`
+    profile_rows, plans, push_subscriptions = await asyncio.gather(
+        supabase.select_in("profiles", "id", user_ids, "id, email"),
+        get_user_plans(user_ids),
+        _load_push_subscriptions(push_users),
+    )
+    profiles = _first_by(profile_rows, "id")
+    timings["load"] = (time.perf_counter() - started) * 1000
+
+    alerts: List[PendingAlert] = []
+    for user_id, symbol, preferences in matches:
+        profile = profiles.get(user_id)
+        if not profile:
+            logger.warning("No profile found for user %s, skipping alert", user_id)
+            continue
+
+        alerts.append(PendingAlert(
+            user_id=user_id,
+            email=profile["email"],
+            scan_result=scan_by_symbol[symbol],
+            preferences=preferences,
+            plan=plans[user_id],
+            push_subscription=push_subscriptions.get(user_id),
+        ))
+
+    return alerts, timings
@@ -0,0 +1,362 @@
+"""
+Outbound notification queue.
+
+Notifications are enqueued per channel (email, push, sms) and delivered by
+that channel's own pool of workers, so a scan never waits on provider
+latency and a slow channel can't hold up the others. Senders may take
+notifications in batches (e.g. Resend's batch email API). Failed sends are
+retried with exponential backoff; notifications that keep failing, or fail
+permanently, go to a dead-letter list.
+
+Queued and retrying notifications live in Redis, so they survive restarts
+and are shared by every worker process; without Redis they live in
+process memory. A batch being sent when the process dies is lost.
+"""
+import asyncio
+import heapq
+import json
+import logging
+import random
+import time
+import uuid
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+import redis.asyncio as aioredis
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Dead letters kept for inspection
+DEAD_LETTER_LIMIT = 1000
+
+
+class PermanentNotificationError(Exception):
+    """A send that will never succeed (e.g. an expired push subscription); not retried."""
+
+
+@dataclass
+class Notification:
+    """One outbound message for a channel; payload is channel-specific."""
+    channel: str
+    payload: dict
+    user_id: Optional[str] = None
+    attempts: int = 0
+    last_error: Optional[str] = None
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    created_at: float = field(default_factory=time.time)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, raw) -> "Notification":
+        return cls(**json.loads(raw))
+
+
+class ChannelSender:
+    """
+    Delivers one channel's notifications. Subclasses implement send_batch,
+    which sends up to batch_size payloads and raises if they weren't sent.
+    """
+    channel = ""
+
+    def __init__(self, workers: int = 1, batch_size: int = 1):
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+
+    def configured(self) -> bool:
+        """Whether the provider has the credentials it needs."""
+        return True
+
+    async def send_batch(self, payloads: List[dict]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release provider clients and threads."""
+
+
+class ThreadedSender(ChannelSender):
+    """
+    Sender for blocking provider SDKs: send_sync runs on the channel's own
+    thread pool (one thread per worker), so channels don't compete for the
+    default executor.
+    """
+
+    def __init__(self, workers: int = 1, batch_size: int = 1):
+        super().__init__(workers, batch_size)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def send_sync(self, payloads: List[dict]) -> None:
+        raise NotImplementedError
+
+    async def send_batch(self, payloads: List[dict]) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix=f"notify-{self.channel}")
+        await asyncio.get_running_loop().run_in_executor(self._executor, self.send_sync, payloads)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+class StandInSender(ChannelSender):
+    """
+    Local stand-in provider for offline load tests: takes `latency` seconds
+    per batch, fails a `failure_rate` fraction of batches and counts what it
+    delivered.
+    """
+
+    def __init__(self, channel: str, workers: int = 1, batch_size: int = 1,
+                 latency: float = 0.05, failure_rate: float = 0.0):
+        super().__init__(workers, batch_size)
+        self.channel = channel
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.delivered = 0
+        self.batches = 0
+
+    async def send_batch(self, payloads: List[dict]) -> None:
+        await asyncio.sleep(self.latency)
+        if random.random() < self.failure_rate:
+            raise ConnectionError(f"stand-in {self.channel} provider failure")
+        self.delivered += len(payloads)
+        self.batches += 1
+
+
+class InMemoryNotificationStore:
+    """Queues in process memory (single worker; lost on restart)."""
+
+    def __init__(self):
+        self.queues: Dict[str, deque] = defaultdict(deque)
+        self.delayed: Dict[str, list] = defaultdict(list)  # heap of (due, seq, raw)
+        self.dead: deque = deque(maxlen=DEAD_LETTER_LIMIT)
+        self._seq = 0
+
+    async def push(self, channel: str, raws: List[str]):
+        self.queues[channel].extend(raws)
+
+    async def pop(self, channel: str, count: int) -> List[str]:
+        queue = self.queues[channel]
+        return [queue.popleft() for _ in range(min(count, len(queue)))]
+
+    async def schedule(self, channel: str, raw: str, due: float):
+        self._seq += 1
+        heapq.heappush(self.delayed[channel], (due, self._seq, raw))
+
+    async def promote_due(self, channel: str, now: float):
+        delayed = self.delayed[channel]
+        while delayed and delayed[0][0] <= now:
+            self.queues[channel].append(heapq.heappop(delayed)[2])
+
+    async def dead_letter(self, raw: str):
+        self.dead.append(raw)
+
+    async def depth(self, channel: str) -> int:
+        return len(self.queues[channel])
+
+    async def close(self):
+        pass
+
+
+class RedisNotificationStore:
+    """
+    Queues in Redis, shared by every worker process: a list per channel
+    plus a sorted set of retries scored by due time.
+    """
+
+    def __init__(self, client: aioredis.Redis):
+        self.redis = client
+
+    @staticmethod
+    def _key(channel: str, suffix: str = "") -> str:
+        return f"notify:{channel}{suffix}"
+
+    async def push(self, channel: str, raws: List[str]):
+        await self.redis.rpush(self._key(channel), *raws)
+
+    async def pop(self, channel: str, count: int) -> List[str]:
+        return await self.redis.lpop(self._key(channel), count) or []
+
+    async def schedule(self, channel: str, raw: str, due: float):
+        await self.redis.zadd(self._key(channel, ":retry"), {raw: due})
+
+    async def promote_due(self, channel: str, now: float):
+        key = self._key(channel, ":retry")
+        for raw in await self.redis.zrangebyscore(key, "-inf", now, start=0, num=500):
+            # Only the worker whose ZREM succeeds requeues it
+            if await self.redis.zrem(key, raw):
+                await self.redis.rpush(self._key(channel), raw)
+
+    async def dead_letter(self, raw: str):
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.lpush("notify:dead", raw)
+        pipe.ltrim("notify:dead", 0, DEAD_LETTER_LIMIT - 1)
+        await pipe.execute()
+
+    async def depth(self, channel: str) -> int:
+        return await self.redis.llen(self._key(channel))
+
+    async def close(self):
+        await self.redis.aclose()
+
+
+class NotificationQueue:
+    """
+    Durable outbound queue with a worker pool per channel.
+    Started and stopped with the app lifespan; enqueue() only stores the
+    notification and wakes the channel's workers.
+    """
+
+    def __init__(self, senders: Dict[str, ChannelSender]):
+        self.senders = senders
+        self.store = InMemoryNotificationStore()
+        self.stats: Counter = Counter()
+        self._workers: List[asyncio.Task] = []
+        self._wakeups: Dict[str, asyncio.Event] = {channel: asyncio.Event() for channel in senders}
+        self._inflight: Counter = Counter()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self, use_redis: bool = True):
+        """Connect the store (Redis, else memory) and start every channel's workers."""
+        if self.running:
+            return
+        self._wakeups = {channel: asyncio.Event() for channel in self.senders}
+        if use_redis:
+            try:
+                client = aioredis.from_url(
+                    settings.REDIS_URL,
+                    decode_responses=True,
+                    socket_connect_timeout=2,
+                    socket_timeout=5
+                )
+                await client.ping()
+                self.store = RedisNotificationStore(client)
+                logger.info("Notification queue using Redis")
+            except Exception as e:
+                logger.warning(f"Redis unavailable for notifications ({e}). Using in-memory queue.")
+
+        for channel, sender in self.senders.items():
+            for _ in range(sender.workers):
+                self._workers.append(asyncio.create_task(self._worker(channel, sender)))
+        logger.info(
+            "Notification workers started: "
+            + ", ".join(f"{c}={s.workers}" for c, s in self.senders.items())
+        )
+
+    async def stop(self, drain: bool = False, timeout: float = 30.0):
+        """
+        Stop the workers. With drain=True, first wait (up to timeout) until
+        every queued notification is sent, with either store, so a one-shot
+        process (the CLI scan) delivers what it queued before exiting;
+        retries not yet due are not waited for.
+        """
+        if drain and self.running:
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                if not await self.pending():
+                    break
+                await asyncio.sleep(0.05)
+
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for sender in self.senders.values():
+            sender.close()
+        await self.store.close()
+        self.store = InMemoryNotificationStore()
+
+    async def pending(self) -> int:
+        """Notifications queued or being sent (retries not yet due excluded)."""
+        depths = [await self.store.depth(channel) for channel in self.senders]
+        return sum(depths) + sum(self._inflight.values())
+
+    async def enqueue(self, channel: str, payload: dict, user_id: Optional[str] = None) -> bool:
+        """Queue a notification; False if the channel isn't available."""
+        return await self.enqueue_many([Notification(channel, payload, user_id)]) == 1
+
+    async def enqueue_many(self, notifications: List[Notification]) -> int:
+        """Queue several notifications; returns how many were accepted."""
+        by_channel: Dict[str, List[str]] = defaultdict(list)
+        for n in notifications:
+            sender = self.senders.get(n.channel)
+            if sender is None or not sender.configured():
+                logger.warning("Notification channel %s not configured — skipping", n.channel)
+                continue
+            by_channel[n.channel].append(n.to_json())
+
+        for channel, raws in by_channel.items():
+            await self.store.push(channel, raws)
+            self._wakeups[channel].set()
+            self.stats[f"{channel}_queued"] += len(raws)
+        return sum(map(len, by_channel.values()))
+
+    async def _worker(self, channel: str, sender: ChannelSender):
+        wakeup = self._wakeups[channel]
+        while True:
+            try:
+                wakeup.clear()
+                await self.store.promote_due(channel, time.time())
+                raws = await self.store.pop(channel, sender.batch_size)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Notification queue error (%s): %s", channel, e)
+                await asyncio.sleep(settings.NOTIFY_POLL_INTERVAL)
+                continue
+
+            if not raws:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), settings.NOTIFY_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # Other workers may have more to do
+            wakeup.set()
+            batch = [Notification.from_json(raw) for raw in raws]
+            self._inflight[channel] += len(batch)
+            try:
+                await sender.send_batch([n.payload for n in batch])
+                self.stats[f"{channel}_sent"] += len(batch)
+            except asyncio.CancelledError:
+                raise
+            except PermanentNotificationError as e:
+                for n in batch:
+                    n.attempts += 1
+                    await self._dead_letter(n, e)
+            except Exception as e:
+                for n in batch:
+                    await self._retry(n, e)
+            finally:
+                self._inflight[channel] -= len(batch)
+
+    async def _retry(self, notification: Notification, error: Exception):
+        notification.attempts += 1
+        notification.last_error = str(error)
+        if notification.attempts >= settings.NOTIFY_MAX_ATTEMPTS:
+            await self._dead_letter(notification, error)
+            return
+        # Exponential backoff with jitter
+        delay = min(settings.NOTIFY_RETRY_MAX, settings.NOTIFY_RETRY_BASE * 2 ** (notification.attempts - 1))
+        delay *= random.uniform(0.5, 1.0)
+        await self.store.schedule(notification.channel, notification.to_json(), time.time() + delay)
+        self.stats[f"{notification.channel}_retried"] += 1
+
+    async def _dead_letter(self, notification: Notification, error: Exception):
+        notification.last_error = str(error)
+        logger.error(
+            "Notification %s (%s, user %s) dropped after %d attempts: %s",
+            notification.id, notification.channel, notification.user_id,
+            notification.attempts, error,
+        )
+        await self.store.dead_letter(notification.to_json())
+        self.stats[f"{notification.channel}_dead"] += 1
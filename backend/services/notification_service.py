@@ -1,12 +1,27 @@
 """
 Notification dispatch service.
 Handles email (Resend), browser push (pywebpush), and SMS (Twilio).
+
+dispatch_notification only enqueues; delivery happens on the outbound
+queue's per-channel workers (services.notification_queue), which reuse
+one provider client per channel. Set NOTIFY_PROVIDERS=standin to swap the
+providers for local stand-ins (offline load tests).
 """
-import asyncio
 import json
 import logging
 import os
-from typing import Optional
+import threading
+from typing import Dict, List, Optional
+
+from config import settings
+from services.notification_queue import (
+    ChannelSender,
+    Notification,
+    NotificationQueue,
+    PermanentNotificationError,
+    StandInSender,
+    ThreadedSender,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -21,94 +36,174 @@ TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 TWILIO_FROM_NUMBER = os.getenv("TWILIO_FROM_NUMBER")
 
+# Resend's batch endpoint accepts at most 100 emails per call
+RESEND_BATCH_LIMIT = 100
 
-async def send_email(to_email: str, subject: str, html_body: str) -> bool:
-    """
-    Send a transactional email via the Resend API.
-    Returns True on success, False on failure.
-    Skips silently if RESEND_API_KEY is not configured.
-    """
-    if not RESEND_API_KEY:
-        logger.warning("RESEND_API_KEY not configured — skipping email to %s", to_email)
-        return False
 
-    def _send() -> bool:
+class ResendEmailSender(ThreadedSender):
+    """Email via Resend; several queued emails go out in one batch call."""
+    channel = "email"
+
+    def configured(self) -> bool:
+        return bool(RESEND_API_KEY)
+
+    def send_sync(self, payloads: List[dict]) -> None:
         import resend
         resend.api_key = RESEND_API_KEY
-        resend.Emails.send({
-            "from": RESEND_FROM_ADDRESS,
-            "to": [to_email],
-            "subject": subject,
-            "html": html_body,
-        })
-        return True
+        emails = [
+            {"from": RESEND_FROM_ADDRESS, "to": [p["to"]], "subject": p["subject"], "html": p["html"]}
+            for p in payloads
+        ]
+        if len(emails) == 1:
+            resend.Emails.send(emails[0])
+        else:
+            resend.Batch.send(emails)
+        logger.info("Sent %d email(s) via Resend", len(emails))
 
+
+class WebPushSender(ThreadedSender):
+    """Browser web push via pywebpush over one shared HTTP session."""
+    channel = "push"
+
+    def __init__(self, workers: int = 1):
+        super().__init__(workers)
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    def configured(self) -> bool:
+        return bool(VAPID_PRIVATE_KEY and VAPID_PUBLIC_KEY)
+
+    def _requests_session(self):
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                self._session = requests.Session()
+                adapter = HTTPAdapter(pool_maxsize=self.workers)
+                self._session.mount("https://", adapter)
+            return self._session
+
+    def send_sync(self, payloads: List[dict]) -> None:
+        from pywebpush import webpush, WebPushException
+        session = self._requests_session()
+        for p in payloads:
+            try:
+                webpush(
+                    subscription_info=p["subscription"],
+                    data=json.dumps({"title": p["title"], "body": p["body"]}),
+                    vapid_private_key=VAPID_PRIVATE_KEY,
+                    vapid_claims={"sub": VAPID_CLAIMS_EMAIL},
+                    requests_session=session,
+                )
+            except WebPushException as e:
+                # 404/410: the subscription is gone, retrying won't help
+                if e.response is not None and e.response.status_code in (404, 410):
+                    raise PermanentNotificationError(f"Push subscription expired: {e}") from e
+                raise
+        logger.info("Push notification sent: %s", payloads[-1]["title"])
+
+    def close(self) -> None:
+        super().close()
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
+class TwilioSmsSender(ThreadedSender):
+    """SMS via Twilio, reusing one REST client."""
+    channel = "sms"
+
+    def __init__(self, workers: int = 1):
+        super().__init__(workers)
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    def configured(self) -> bool:
+        return bool(TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN and TWILIO_FROM_NUMBER)
+
+    def _twilio(self):
+        with self._client_lock:
+            if self._client is None:
+                from twilio.rest import Client
+                self._client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+            return self._client
+
+    def send_sync(self, payloads: List[dict]) -> None:
+        client = self._twilio()
+        for p in payloads:
+            client.messages.create(to=p["to"], from_=TWILIO_FROM_NUMBER, body=p["body"])
+            logger.info("SMS sent to %s", p["to"])
+
+
+def build_senders() -> Dict[str, ChannelSender]:
+    """One sender per channel: the real providers, or local stand-ins."""
+    if settings.NOTIFY_PROVIDERS == "standin":
+        return {
+            "email": StandInSender(
+                "email", settings.NOTIFY_EMAIL_WORKERS, settings.NOTIFY_EMAIL_BATCH,
+                settings.NOTIFY_STANDIN_LATENCY, settings.NOTIFY_STANDIN_FAILURE_RATE,
+            ),
+            "push": StandInSender(
+                "push", settings.NOTIFY_PUSH_WORKERS, 1,
+                settings.NOTIFY_STANDIN_LATENCY, settings.NOTIFY_STANDIN_FAILURE_RATE,
+            ),
+            "sms": StandInSender(
+                "sms", settings.NOTIFY_SMS_WORKERS, 1,
+                settings.NOTIFY_STANDIN_LATENCY, settings.NOTIFY_STANDIN_FAILURE_RATE,
+            ),
+        }
+    return {
+        "email": ResendEmailSender(
+            settings.NOTIFY_EMAIL_WORKERS, min(settings.NOTIFY_EMAIL_BATCH, RESEND_BATCH_LIMIT)
+        ),
+        "push": WebPushSender(settings.NOTIFY_PUSH_WORKERS),
+        "sms": TwilioSmsSender(settings.NOTIFY_SMS_WORKERS),
+    }
+
+
+# Global outbound notification queue (started in the app lifespan)
+notification_queue = NotificationQueue(build_senders())
+
+
+async def _send_now(channel: str, payload: dict, description: str) -> bool:
+    sender = notification_queue.senders[channel]
+    if not sender.configured():
+        logger.warning("%s not configured — skipping %s", channel, description)
+        return False
     try:
-        result = await asyncio.to_thread(_send)
-        logger.info("Email sent to %s: %s", to_email, subject)
-        return result
+        await sender.send_batch([payload])
+        return True
     except Exception as e:
-        logger.error("Email send failed to %s: %s", to_email, e)
+        logger.error("%s send failed (%s): %s", channel, description, e)
         return False
 
 
+async def send_email(to_email: str, subject: str, html_body: str) -> bool:
+    """
+    Send a transactional email via the Resend API right away (not queued).
+    Returns True on success, False on failure.
+    Skips silently if RESEND_API_KEY is not configured.
+    """
+    return await _send_now("email", {"to": to_email, "subject": subject, "html": html_body}, f"email to {to_email}")
+
+
 async def send_push(push_subscription: dict, title: str, body: str) -> bool:
     """
-    Send a browser web push notification via pywebpush.
+    Send a browser web push notification via pywebpush right away (not queued).
     push_subscription must contain 'endpoint' and 'keys' (p256dh, auth).
     Returns True on success, False on failure.
     Skips silently if VAPID keys are not configured.
     """
-    if not VAPID_PRIVATE_KEY or not VAPID_PUBLIC_KEY:
-        logger.warning("VAPID keys not configured — skipping push notification")
-        return False
-
-    def _send() -> bool:
-        from pywebpush import webpush, WebPushException
-        webpush(
-            subscription_info=push_subscription,
-            data=json.dumps({"title": title, "body": body}),
-            vapid_private_key=VAPID_PRIVATE_KEY,
-            vapid_claims={"sub": VAPID_CLAIMS_EMAIL},
-        )
-        return True
-
-    try:
-        result = await asyncio.to_thread(_send)
-        logger.info("Push notification sent: %s", title)
-        return result
-    except Exception as e:
-        logger.error("Push notification failed: %s", e)
-        return False
+    return await _send_now("push", {"subscription": push_subscription, "title": title, "body": body}, "push notification")
 
 
 async def send_sms(phone_number: str, message: str) -> bool:
     """
-    Send an SMS via the Twilio API.
+    Send an SMS via the Twilio API right away (not queued).
     Returns True on success, False on failure.
     Skips silently if Twilio credentials are not configured.
     """
-    if not TWILIO_ACCOUNT_SID or not TWILIO_AUTH_TOKEN or not TWILIO_FROM_NUMBER:
-        logger.warning("Twilio not configured — skipping SMS to %s", phone_number)
-        return False
-
-    def _send() -> bool:
-        from twilio.rest import Client
-        client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-        client.messages.create(
-            to=phone_number,
-            from_=TWILIO_FROM_NUMBER,
-            body=message,
-        )
-        return True
-
-    try:
-        result = await asyncio.to_thread(_send)
-        logger.info("SMS sent to %s", phone_number)
-        return result
-    except Exception as e:
-        logger.error("SMS send failed to %s: %s", phone_number, e)
-        return False
+    return await _send_now("sms", {"to": phone_number, "body": message}, f"SMS to {phone_number}")
 
 
 async def dispatch_notification(
@@ -121,28 +216,34 @@ async def dispatch_notification(
     preferences: dict,
     plan: str,
     push_subscription: Optional[dict] = None,
-) -> None:
+) -> int:
     """
-    Dispatch notifications to a user across all enabled channels.
+    Queue notifications to a user across all enabled channels.
+    Returns as soon as they are queued; returns how many were.
 
     Channels are enabled by user preferences:
-      - email_alerts   → send_email()
-      - push_alerts    → send_push()  (requires push_subscription to be provided)
+      - email_alerts   → email
+      - push_alerts    → push  (requires push_subscription to be provided)
 
     SMS (Twilio) is gated to plan == "pro" and requires a phone_number in preferences.
     """
+    notifications = []
     if preferences.get("email_alerts"):
-        await send_email(email, subject, html_body)
+        notifications.append(Notification("email", {"to": email, "subject": subject, "html": html_body}, user_id))
 
     if preferences.get("push_alerts") and push_subscription:
-        await send_push(push_subscription, subject, message)
+        notifications.append(Notification(
+            "push", {"subscription": push_subscription, "title": subject, "body": message}, user_id
+        ))
 
     if plan == "pro":
         phone = preferences.get("phone_number")
         if phone:
-            await send_sms(phone, message)
+            notifications.append(Notification("sms", {"to": phone, "body": message}, user_id))
         else:
             logger.warning(
                 "SMS enabled for pro user %s but no phone_number in preferences",
                 user_id,
             )
+
+    return await notification_queue.enqueue_many(notifications)
@@ -1,18 +1,28 @@
+import asyncio
 import logging
-from typing import List
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from datetime import datetime
+from config import settings
 from models.candle import ScanResult
+from services.alert_resolver import PendingAlert, resolve_alerts
 from services.supabase_client import supabase
+from utils.market_calendar import latest_session
 
 logger = logging.getLogger(__name__)
 
 
-async def save_scan_results(results: List[ScanResult]) -> None:
-    """Save scan results to Supabase breakout_scans table, then dispatch watchlist alerts."""
-    if not results:
-        return
+# breakout_scans keeps one row per symbol per trading session; rescans update it
+SCAN_CONFLICT_KEY = "symbol,scan_date"
+
+# current_setups keeps each symbol's latest scan (what the results API serves)
+CURRENT_SETUPS_CONFLICT_KEY = "symbol"
+
 
-    rows = [
+def _scan_rows(results: List[ScanResult]) -> List[dict]:
+    scanned_at = datetime.utcnow().isoformat()
+    scan_date = latest_session().isoformat()
+    return [
         {
             "symbol": r.symbol,
             "price": float(r.price),
@@ -27,134 +37,224 @@ async def save_scan_results(results: List[ScanResult]) -> None:
             "breakout_score": int(r.breakout_score),
             "notes": r.notes,
             "market_cap": float(r.market_cap) if r.market_cap else None,
-            "scanned_at": datetime.utcnow().isoformat(),
+            "scan_date": scan_date,
+            "scanned_at": scanned_at,
         }
         for r in results
     ]
 
-    await supabase.table("breakout_scans").insert(rows).execute()
-    logger.info("Saved %d scan results to Supabase", len(results))
 
-    await _notify_watchlist_users(results)
+def _row_key(row: dict) -> Tuple[str, str]:
+    return row["symbol"], row["scan_date"]
+
+
+async def _write_rows(rows: List[dict], dropped: Iterable[str] = ()) -> None:
+    """
+    Upsert rows into breakout_scans (history) and current_setups (latest
+    per symbol) in concurrent chunks, then remove the `dropped` symbols
+    from current_setups, logging throughput. Rows are in scan order, so
+    later rows are newer.
+    """
+    # One upsert statement can't touch the same row twice; keep each key's latest row
+    rows = list({_row_key(row): row for row in rows}.values())
+    current = list({row["symbol"]: row for row in rows}.values())
+    started = time.perf_counter()
+    history_requests, current_requests = await asyncio.gather(
+        supabase.insert_many("breakout_scans", rows, on_conflict=SCAN_CONFLICT_KEY),
+        supabase.insert_many("current_setups", current, on_conflict=CURRENT_SETUPS_CONFLICT_KEY),
+    )
+    # After the upserts, so a buffered older row can't bring a dropped symbol back
+    dropped_requests = await supabase.delete_in("current_setups", "symbol", dropped)
+    requests = history_requests + current_requests + dropped_requests
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "Saved %d scan results to Supabase in %d request(s), %.2fs (%.0f rows/s)",
+        len(rows), requests, elapsed, len(rows) / elapsed if elapsed else 0,
+    )
+
+
+class ScanWriteBuffer:
+    """
+    Write-behind buffer for scan results (SCAN_WRITE_BEHIND): rows are
+    written in the background once SCAN_WRITE_BUFFER_ROWS are buffered or
+    the oldest has waited SCAN_WRITE_FLUSH_INTERVAL seconds. A rescanned
+    symbol replaces its buffered row; symbols a later scan no longer finds
+    are removed from current_setups on the same flush. Rows from a failed
+    write are kept for the next flush; rows still buffered when the process
+    dies are lost.
+    """
+
+    def __init__(self):
+        self.rows: Dict[Tuple[str, str], dict] = {}
+        self.dropped: Set[str] = set()  # symbols to remove from current_setups
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+        self._flushes: set = set()
+
+    def add(self, rows: List[dict], dropped: Iterable[str] = ()) -> None:
+        self.dropped.update(dropped)
+        for row in rows:
+            key = _row_key(row)
+            self.rows.pop(key, None)
+            self.rows[key] = row
+            self.dropped.discard(row["symbol"])
+
+        if len(self.rows) >= settings.SCAN_WRITE_BUFFER_ROWS:
+            task = asyncio.create_task(self.flush())
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+        elif self._timer is None and (self.rows or self.dropped):
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(settings.SCAN_WRITE_FLUSH_INTERVAL)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Write everything buffered now."""
+        async with self._lock:
+            if not self.rows and not self.dropped:
+                return
+            rows, self.rows = list(self.rows.values()), {}
+            dropped, self.dropped = self.dropped, set()
+            try:
+                await _write_rows(rows, dropped)
+            except Exception as e:
+                logger.error("Write-behind flush of %d scan results failed, will retry: %s", len(rows), e)
+                for row in rows:
+                    # Rows buffered since are newer
+                    self.rows.setdefault(_row_key(row), row)
+                # ...and a symbol buffered since qualifies again
+                requalified = {row["symbol"] for row in self.rows.values()}
+                self.dropped |= {symbol for symbol in dropped if symbol not in requalified}
+                if self._timer is None:
+                    self._timer = asyncio.create_task(self._flush_later())
+
+    async def close(self) -> None:
+        """Stop the timer and write what's left (app shutdown)."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await asyncio.gather(*self._flushes, return_exceptions=True)
+        await self.flush()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self.rows or self.dropped:
+            logger.error(
+                "Dropping %d unsaved scan results and %d setup removals at shutdown",
+                len(self.rows), len(self.dropped),
+            )
+
+
+# Global write-behind buffer (flushed on shutdown)
+scan_write_buffer = ScanWriteBuffer()
+
 
+async def save_scan_results(results: List[ScanResult], scanned: Optional[Iterable[str]] = None) -> None:
+    """
+    Save scan results to the Supabase breakout_scans (history) and
+    current_setups (latest per symbol) tables, then dispatch watchlist
+    alerts. Rows are upserted in chunks sent concurrently; with
+    SCAN_WRITE_BEHIND they are buffered and written in the background
+    instead.
 
-async def _notify_watchlist_users(results: List[ScanResult]) -> None:
+    scanned is the universe the scan covered, if it ran to completion:
+    its symbols without a result no longer qualify and are removed from
+    current_setups.
+    """
+    found = {r.symbol for r in results}
+    dropped = sorted({s.upper() for s in scanned} - found) if scanned else []
+    if not results and not dropped:
+        return
+
+    rows = _scan_rows(results)
+    if settings.SCAN_WRITE_BEHIND:
+        scan_write_buffer.add(rows, dropped)
+    else:
+        await _write_rows(rows, dropped)
+
+    if results:
+        await _notify_watchlist_users(results)
+
+
+async def _notify_watchlist_users(results: List[ScanResult]) -> Optional[dict]:
     """
     For each scan result, find users who have that symbol on their watchlist
     with alert_enabled=True and score >= their alert_threshold, then dispatch
     notifications through their enabled channels.
+
+    Recipients are resolved in bulk (services.alert_resolver) and their
+    notifications queued concurrently, at most ALERT_DISPATCH_CONCURRENCY
+    at a time; delivery happens on the notification queue's workers.
+    Returns a summary with per-phase timings (ms), also logged.
     """
-    from middleware.auth import get_user_plan
     from services.notification_service import dispatch_notification
 
-    scan_symbols = {r.symbol for r in results}
-    scan_by_symbol = {r.symbol: r for r in results}
-
-    # Fetch all alert-enabled watchlist items in one query, then filter
-    # by scan symbols in Python (SupabaseTable has no `in` filter method).
+    started = time.perf_counter()
     try:
-        alert_items = await (
-            supabase.table("watchlist_items")
-            .select("user_id, symbol")
-            .eq("alert_enabled", True)
-            .execute()
-        )
+        alerts, timings = await resolve_alerts(results)
     except Exception as e:
-        logger.error("Failed to fetch alert-enabled watchlist items: %s", e)
-        return
+        logger.error("Failed to resolve watchlist alerts: %s", e)
+        return None
 
-    matches = [item for item in alert_items if item["symbol"] in scan_symbols]
-    if not matches:
-        return
+    semaphore = asyncio.Semaphore(max(1, settings.ALERT_DISPATCH_CONCURRENCY))
+    failed = 0
 
-    for item in matches:
-        user_id = item["user_id"]
-        symbol = item["symbol"]
-        scan_result = scan_by_symbol[symbol]
-
-        try:
-            # Fetch user email from profiles (PK is `id`, not `user_id`)
-            profiles = await (
-                supabase.table("profiles")
-                .select("email")
-                .eq("id", user_id)
-                .execute()
-            )
-            if not profiles:
-                logger.warning("No profile found for user %s, skipping alert", user_id)
-                continue
-            email = profiles[0]["email"]
-
-            # Fetch user preferences
-            prefs_rows = await (
-                supabase.table("user_preferences")
-                .select("email_alerts, push_alerts, alert_threshold, phone_number")
-                .eq("user_id", user_id)
-                .execute()
-            )
-            preferences = prefs_rows[0] if prefs_rows else {}
-
-            # Respect the user's score threshold (default 80)
-            threshold = preferences.get("alert_threshold", 80)
-            if scan_result.breakout_score < threshold:
-                continue
-
-            # Skip entirely if no channel is enabled
-            if not preferences.get("email_alerts") and not preferences.get("push_alerts"):
-                continue
-
-            plan = await get_user_plan(user_id)
-
-            # Fetch push subscription endpoint if push is enabled.
-            # Requires a `push_subscriptions` table with columns (user_id, subscription_data).
-            push_subscription = None
-            if preferences.get("push_alerts"):
-                try:
-                    push_rows = await (
-                        supabase.table("push_subscriptions")
-                        .select("subscription_data")
-                        .eq("user_id", user_id)
-                        .execute()
-                    )
-                    if push_rows:
-                        push_subscription = push_rows[0]["subscription_data"]
-                except Exception as e:
-                    logger.warning(
-                        "Could not fetch push subscription for user %s: %s", user_id, e
-                    )
-
-            subject = f"Orbis Alert: {symbol} breakout setup detected"
-            message = (
-                f"{symbol} matched your alert — "
-                f"Score: {scan_result.breakout_score}/100, "
-                f"Setup: {scan_result.setup_type}, "
-                f"Price: ${scan_result.price:.2f}, "
-                f"Trigger: ${scan_result.trigger_price:.2f} "
-                f"({scan_result.distance_pct:.1f}% away)"
-            )
-            html_body = (
-                f"<h2>{symbol} Breakout Setup Detected</h2>"
-                f"<ul>"
-                f"<li><strong>Score:</strong> {scan_result.breakout_score}/100</li>"
-                f"<li><strong>Setup:</strong> {scan_result.setup_type}</li>"
-                f"<li><strong>Price:</strong> ${scan_result.price:.2f}</li>"
-                f"<li><strong>Trigger:</strong> ${scan_result.trigger_price:.2f}</li>"
-                f"<li><strong>Distance to breakout:</strong> {scan_result.distance_pct:.1f}%</li>"
-                f"</ul>"
-            )
+    async def notify(alert: PendingAlert) -> None:
+        nonlocal failed
+        scan_result = alert.scan_result
+        symbol = scan_result.symbol
+        subject = f"Orbis Alert: {symbol} breakout setup detected"
+        message = (
+            f"{symbol} matched your alert — "
+            f"Score: {scan_result.breakout_score}/100, "
+            f"Setup: {scan_result.setup_type}, "
+            f"Price: ${scan_result.price:.2f}, "
+            f"Trigger: ${scan_result.trigger_price:.2f} "
+            f"({scan_result.distance_pct:.1f}% away)"
+        )
+        html_body = (
+            f"<h2>{symbol} Breakout Setup Detected</h2>"
+            f"<ul>"
+            f"<li><strong>Score:</strong> {scan_result.breakout_score}/100</li>"
+            f"<li><strong>Setup:</strong> {scan_result.setup_type}</li>"
+            f"<li><strong>Price:</strong> ${scan_result.price:.2f}</li>"
+            f"<li><strong>Trigger:</strong> ${scan_result.trigger_price:.2f}</li>"
+            f"<li><strong>Distance to breakout:</strong> {scan_result.distance_pct:.1f}%</li>"
+            f"</ul>"
+        )
 
-            await dispatch_notification(
-                user_id=user_id,
-                email=email,
-                subject=subject,
-                message=message,
-                html_body=html_body,
-                preferences=preferences,
-                plan=plan,
-                push_subscription=push_subscription,
-            )
+        async with semaphore:
+            try:
+                await dispatch_notification(
+                    user_id=alert.user_id,
+                    email=alert.email,
+                    subject=subject,
+                    message=message,
+                    html_body=html_body,
+                    preferences=alert.preferences,
+                    plan=alert.plan,
+                    push_subscription=alert.push_subscription,
+                )
+            except Exception as e:
+                failed += 1
+                logger.error(
+                    "Notification failed for user %s / symbol %s: %s", alert.user_id, symbol, e
+                )
 
-        except Exception as e:
-            logger.error(
-                "Notification failed for user %s / symbol %s: %s", user_id, symbol, e
-            )
+    dispatch_started = time.perf_counter()
+    await asyncio.gather(*(notify(alert) for alert in alerts))
+    timings["dispatch"] = (time.perf_counter() - dispatch_started) * 1000
+    timings["total"] = (time.perf_counter() - started) * 1000
+
+    summary = {
+        "alerts": len(alerts),
+        "users": len({a.user_id for a in alerts}),
+        "failed": failed,
+        "timings_ms": {phase: round(ms, 1) for phase, ms in timings.items()},
+    }
+    if alerts:
+        logger.info("Watchlist alert fan-out: %s", summary)
+    return summary
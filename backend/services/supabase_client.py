@@ -1,8 +1,21 @@
 import os
+import asyncio
+import logging
+from typing import Optional
 from supabase import create_client, Client
 from postgrest import AsyncPostgrestClient
 import httpx
 
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Values per `in` filter in select_in/delete_in (keeps request URLs well under server limits)
+IN_FILTER_CHUNK = 200
+
+# Rows per request in insert_many (keeps request bodies well under size limits)
+INSERT_CHUNK = 500
+
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
@@ -19,8 +32,23 @@ def get_supabase_client() -> Client:
         _supabase_client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
     return _supabase_client
 
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
 # Direct Postgrest client (lightweight, no realtime)
 class SupabaseClient:
+    """
+    PostgREST client over one long-lived, pooled httpx.AsyncClient.
+    Keep-alive connections (multiplexed over HTTP/2 when available) and TLS
+    sessions are reused by every query. Opened and closed in the app
+    lifespan; opened lazily elsewhere (CLI, scripts).
+    """
+
     def __init__(self, url: str, key: str):
         self.url = url
         self.key = key
@@ -29,27 +57,171 @@ class SupabaseClient:
             "Authorization": f"Bearer {key}",
             "Content-Type": "application/json",
         }
+        self._http: Optional[httpx.AsyncClient] = None
+
+    def open(self) -> httpx.AsyncClient:
+        """Open the shared HTTP client; safe to call more than once."""
+        if self._http is None or self._http.is_closed:
+            http2 = settings.SUPABASE_HTTP2 and _http2_available()
+            self._http = httpx.AsyncClient(
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=settings.SUPABASE_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.SUPABASE_MAX_KEEPALIVE,
+                    keepalive_expiry=settings.SUPABASE_KEEPALIVE_TIMEOUT,
+                ),
+                timeout=httpx.Timeout(
+                    settings.SUPABASE_HTTP_TIMEOUT,
+                    connect=settings.SUPABASE_CONNECT_TIMEOUT,
+                ),
+            )
+            logger.info(f"Supabase HTTP client opened ({'HTTP/2' if http2 else 'HTTP/1.1'})")
+        return self._http
+
+    async def close(self) -> None:
+        """Close the shared HTTP client and its connection pool."""
+        if self._http is not None and not self._http.is_closed:
+            await self._http.aclose()
+            logger.info("Supabase HTTP client closed")
+        self._http = None
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """The shared HTTP client, opened lazily."""
+        if self._http is None or self._http.is_closed:
+            return self.open()
+        return self._http
 
     def table(self, name: str):
         """Return table interface."""
-        return SupabaseTable(self.url, name, self.headers)
+        return SupabaseTable(self, name)
+
+    async def select_in(
+        self,
+        table: str,
+        column: str,
+        values,
+        fields: str = "*",
+        chunk_size: int = IN_FILTER_CHUNK,
+        **eq,
+    ) -> list:
+        """
+        Select rows whose `column` is one of `values` (and whose columns
+        equal any `eq` keyword filters). Long value lists are split into
+        chunks queried concurrently, so each URL stays short.
+        """
+        values = list(dict.fromkeys(values))
+
+        def query(chunk: list):
+            q = self.table(table).select(fields).in_(column, chunk)
+            for col, value in eq.items():
+                q = q.eq(col, value)
+            return q.execute()
+
+        chunks = await asyncio.gather(*(
+            query(values[i:i + chunk_size]) for i in range(0, len(values), chunk_size)
+        ))
+        return [row for rows in chunks for row in rows]
+
+    async def insert_many(
+        self,
+        table: str,
+        rows: list,
+        on_conflict: Optional[str] = None,
+        chunk_size: int = INSERT_CHUNK,
+        concurrency: Optional[int] = None,
+    ) -> int:
+        """
+        Bulk-insert rows (upserting on `on_conflict` if given) in chunks
+        sent concurrently, at most `concurrency` (SUPABASE_WRITE_CONCURRENCY)
+        at a time, without returning the rows. Returns the number of
+        requests made; raises if any chunk fails.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency or settings.SUPABASE_WRITE_CONCURRENCY))
+
+        async def write(chunk: list):
+            async with semaphore:
+                if on_conflict:
+                    await self.table(table).upsert(chunk, on_conflict, returning="minimal").execute()
+                else:
+                    await self.table(table).insert(chunk, returning="minimal").execute()
+
+        chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+        await asyncio.gather(*(write(chunk) for chunk in chunks))
+        return len(chunks)
+
+    async def delete_in(
+        self,
+        table: str,
+        column: str,
+        values,
+        chunk_size: int = IN_FILTER_CHUNK,
+        concurrency: Optional[int] = None,
+    ) -> int:
+        """
+        Delete rows whose `column` is one of `values`, in chunks sent
+        concurrently, at most `concurrency` (SUPABASE_WRITE_CONCURRENCY) at
+        a time. Returns the number of requests made; raises if any fails.
+        """
+        values = list(dict.fromkeys(values))
+        semaphore = asyncio.Semaphore(max(1, concurrency or settings.SUPABASE_WRITE_CONCURRENCY))
+
+        async def delete(chunk: list):
+            async with semaphore:
+                await self.table(table).delete().in_(column, chunk).execute()
+
+        chunks = [values[i:i + chunk_size] for i in range(0, len(values), chunk_size)]
+        await asyncio.gather(*(delete(chunk) for chunk in chunks))
+        return len(chunks)
+
+
+def _quote(value) -> str:
+    """Render a value inside a PostgREST list/logic filter, quoting reserved characters."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    text = str(value)
+    if any(ch in text for ch in ',.:()" \\'):
+        return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+    return text
 
 
 class SupabaseTable:
-    def __init__(self, url: str, table: str, headers: dict):
-        self.url = f"{url}/rest/v1/{table}"
-        self.headers = headers
+    def __init__(self, client: SupabaseClient, table: str):
+        self.client = client
+        self.url = f"{client.url}/rest/v1/{table}"
+        self.headers = client.headers
         self._insert_data = None
+        self._returning = "representation"
+        self._on_conflict = None
         self._update_data = None
         self._delete_mode = False
         self._select_fields = "*"
-        self._filters = []
-        self._order_by = None
+        self._count_mode = None
+        self._filters = []  # (param, value) pairs; a column may appear more than once
+        self._order_by = []
         self._limit_val = None
-
-    def insert(self, data: list):
-        """Insert rows (returns self for chaining)."""
+        self._offset_val = None
+        self.count = None  # total matching rows, set by execute() when select(count=...) was used
+
+    def insert(self, data: list, returning: str = "representation"):
+        """
+        Insert rows (returns self for chaining). returning="minimal" skips
+        sending the inserted rows back; execute() then returns [].
+        """
         self._insert_data = data
+        self._returning = returning
+        return self
+
+    def upsert(self, data: list, on_conflict: str, returning: str = "representation"):
+        """
+        Insert rows, updating the existing row instead where the
+        on_conflict columns (e.g. "symbol,scan_date", which need a unique
+        index) match. Conflict keys must be unique within data.
+        """
+        self.insert(data, returning)
+        self._on_conflict = on_conflict
         return self
 
     def update(self, data: dict):
@@ -62,30 +234,58 @@ class SupabaseTable:
         self._delete_mode = True
         return self
 
-    def select(self, fields: str = "*"):
-        """Select specific fields."""
+    def select(self, fields: str = "*", count: str = None):
+        """
+        Select specific fields (e.g. "symbol, score" or "id, profiles(email)").
+        count ("exact", "planned" or "estimated") also reports the total
+        number of matching rows in `self.count`, regardless of limit/range.
+        """
         self._select_fields = fields
+        self._count_mode = count
         return self
 
     def eq(self, column: str, value):
         """Equal filter."""
-        self._filters.append(f"{column}=eq.{value}")
+        self._filters.append((column, f"eq.{value}"))
+        return self
+
+    def neq(self, column: str, value):
+        """Not equal filter."""
+        self._filters.append((column, f"neq.{value}"))
         return self
 
     def gte(self, column: str, value):
         """Greater than or equal filter."""
-        self._filters.append(f"{column}=gte.{value}")
+        self._filters.append((column, f"gte.{value}"))
         return self
 
     def lte(self, column: str, value):
         """Less than or equal filter."""
-        self._filters.append(f"{column}=lte.{value}")
+        self._filters.append((column, f"lte.{value}"))
+        return self
+
+    def in_(self, column: str, values):
+        """Membership filter: column matches any of the values."""
+        self._filters.append((column, f"in.({','.join(_quote(v) for v in values)})"))
+        return self
+
+    def is_(self, column: str, value):
+        """Identity filter for null/true/false (e.g. is_("deleted_at", None))."""
+        self._filters.append((column, f"is.{_quote(value)}"))
+        return self
+
+    def or_(self, filters: str):
+        """
+        Match any of several PostgREST conditions, given in their raw form,
+        e.g. or_("symbol.eq.AAPL,breakout_score.gte.90").
+        """
+        self._filters.append(("or", f"({filters})"))
         return self
 
     def order(self, column: str, desc: bool = False):
-        """Order results."""
+        """Order results (later calls add tie-breakers)."""
         direction = "desc" if desc else "asc"
-        self._order_by = f"{column}.{direction}"
+        self._order_by.append(f"{column}.{direction}")
         return self
 
     def limit(self, n: int):
@@ -93,89 +293,101 @@ class SupabaseTable:
         self._limit_val = n
         return self
 
+    def offset(self, n: int):
+        """Skip the first n results."""
+        self._offset_val = n
+        return self
+
+    def range(self, start: int, end: int):
+        """Return rows start..end (0-based, inclusive), for pagination."""
+        self._offset_val = start
+        self._limit_val = end - start + 1
+        return self
+
+    def _read_count(self, response: httpx.Response):
+        # Content-Range: "0-24/3573" (or "*/0" when nothing matched)
+        total = response.headers.get("content-range", "").rsplit("/", 1)[-1]
+        self.count = int(total) if total.isdigit() else None
+
     async def execute(self):
         """Execute the query (INSERT, UPDATE, DELETE, or SELECT)."""
-        async with httpx.AsyncClient() as client:
-            # INSERT operation
-            if self._insert_data is not None:
-                headers = {**self.headers, "Prefer": "return=representation"}
-                response = await client.post(
-                    self.url,
-                    json=self._insert_data,
-                    headers=headers,
-                )
-                if response.status_code not in [200, 201]:
-                    raise Exception(f"Insert failed: {response.text}")
-                return response.json()
-
-            # UPDATE operation
-            if self._update_data is not None:
-                # Build query string with filters
-                params = {}
-                for filter_str in self._filters:
-                    parts = filter_str.split("=", 1)
-                    if len(parts) == 2:
-                        params[parts[0]] = parts[1]
-
-                headers = {**self.headers, "Prefer": "return=representation"}
-                response = await client.patch(
-                    self.url,
-                    json=self._update_data,
-                    params=params,
-                    headers=headers,
-                )
-                if response.status_code not in [200, 204]:
-                    raise Exception(f"Update failed: {response.text}")
-                return response.json() if response.status_code == 200 else []
-
-            # DELETE operation
-            if self._delete_mode:
-                # Build query string with filters
-                params = {}
-                for filter_str in self._filters:
-                    parts = filter_str.split("=", 1)
-                    if len(parts) == 2:
-                        params[parts[0]] = parts[1]
-
-                if not params:
-                    raise Exception("DELETE requires filters to prevent accidental full table deletion")
-
-                response = await client.delete(
-                    self.url,
-                    params=params,
-                    headers=self.headers,
-                )
-                if response.status_code not in [200, 204]:
-                    raise Exception(f"Delete failed: {response.text}")
-                return []
-
-            # SELECT operation
-            params = {"select": self._select_fields}
-
-            # Apply filters
-            for filter_str in self._filters:
-                parts = filter_str.split("=", 1)
-                if len(parts) == 2:
-                    params[parts[0]] = parts[1]
-
-            # Apply ordering
-            if self._order_by:
-                params["order"] = self._order_by
-
-            # Apply limit
-            if self._limit_val:
-                params["limit"] = self._limit_val
-
-            response = await client.get(
+        client = self.client.http
+
+        # INSERT operation
+        if self._insert_data is not None:
+            prefer = f"return={self._returning}"
+            params = []
+            if self._on_conflict:
+                prefer += ",resolution=merge-duplicates"
+                params.append(("on_conflict", self._on_conflict))
+            headers = {**self.headers, "Prefer": prefer}
+            response = await client.post(
                 self.url,
+                json=self._insert_data,
                 params=params,
-                headers=self.headers,
+                headers=headers,
+            )
+            if response.status_code not in [200, 201]:
+                raise Exception(f"Insert failed: {response.text}")
+            return response.json() if response.content else []
+
+        # UPDATE operation
+        if self._update_data is not None:
+            headers = {**self.headers, "Prefer": "return=representation"}
+            response = await client.patch(
+                self.url,
+                json=self._update_data,
+                params=self._filters,
+                headers=headers,
             )
+            if response.status_code not in [200, 204]:
+                raise Exception(f"Update failed: {response.text}")
+            return response.json() if response.status_code == 200 else []
 
-            if response.status_code != 200:
-                raise Exception(f"Select failed: {response.text}")
+        # DELETE operation
+        if self._delete_mode:
+            if not self._filters:
+                raise Exception("DELETE requires filters to prevent accidental full table deletion")
 
-            return response.json()
+            response = await client.delete(
+                self.url,
+                params=self._filters,
+                headers=self.headers,
+            )
+            if response.status_code not in [200, 204]:
+                raise Exception(f"Delete failed: {response.text}")
+            return []
+
+        # SELECT operation
+        params = [("select", self._select_fields), *self._filters]
+
+        # Apply ordering
+        if self._order_by:
+            params.append(("order", ",".join(self._order_by)))
+
+        # Apply pagination
+        if self._limit_val is not None:
+            params.append(("limit", self._limit_val))
+        if self._offset_val:
+            params.append(("offset", self._offset_val))
+
+        headers = self.headers
+        if self._count_mode:
+            headers = {**self.headers, "Prefer": f"count={self._count_mode}"}
+
+        response = await client.get(
+            self.url,
+            params=params,
+            headers=headers,
+        )
+
+        # 206 = partial content, returned for a page of a counted result
+        if response.status_code not in [200, 206]:
+            raise Exception(f"Select failed: {response.text}")
+
+        if self._count_mode:
+            self._read_count(response)
+        return response.json()
 
 
 supabase = SupabaseClient(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
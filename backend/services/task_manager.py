@@ -1,75 +1,490 @@
-from typing import Dict, Optional, Any
+from typing import AsyncIterator, Dict, List, Optional, Any, Sequence, Tuple
 from datetime import datetime, timedelta
-from dataclasses import dataclass, field
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field, fields
+import asyncio
+import hashlib
+import json
+import logging
+
+import redis.asyncio as aioredis
+from pydantic import BaseModel
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def request_fingerprint(kind: str, symbols: Optional[List[str]] = None, **params) -> str:
+    """
+    Stable fingerprint of a job request: the job kind, the symbol set
+    (order and case ignored) and any parameters that affect the result.
+    """
+    payload = {
+        "kind": kind,
+        "symbols": sorted({s.upper() for s in symbols}) if symbols else None,
+        "params": params,
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def _jsonable(value: Any) -> Any:
+    """Convert results (pydantic models, datetimes, containers) to JSON types."""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    return value
 
 
 @dataclass
 class Task:
     """Task tracking dataclass."""
     task_id: str
-    status: str  # "pending", "running", "completed", "failed"
+    status: str  # "pending", "running", "completed", "failed", "cancelled"
     created_at: datetime
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
     result: Optional[Any] = None
     error: Optional[str] = None
     metadata: Dict = field(default_factory=dict)
+    fingerprint: Optional[str] = None
+    heartbeat_at: Optional[datetime] = None  # refreshed by the worker running the task
+    progress: Dict = field(default_factory=dict)  # e.g. {"done", "total", "found"}
+    partial_results: List = field(default_factory=list)  # results so far, while running
+
+    def to_dict(self) -> dict:
+        data = {f.name: getattr(self, f.name) for f in fields(self) if f.name != "partial_results"}
+        return _jsonable(data)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Task":
+        for key in ("created_at", "started_at", "completed_at", "heartbeat_at"):
+            if data.get(key):
+                data[key] = datetime.fromisoformat(data[key])
+        return cls(**data)
+
+
+class InMemoryTaskStore:
+    """Task storage in a process-local dict (single worker only)."""
+
+    def __init__(self):
+        self.tasks: Dict[str, Task] = {}
+        self.fingerprints: Dict[str, str] = {}  # fingerprint -> latest task_id
+        self.cancelled: set = set()
+        self.owners: Dict[str, set] = {}  # task_id -> user_ids attached to it
+
+    async def save(self, task: Task):
+        self.tasks[task.task_id] = task
+
+    async def load(self, task_id: str) -> Optional[Task]:
+        return self.tasks.get(task_id)
+
+    async def update(self, task_id: str, changes: Dict) -> bool:
+        task = self.tasks.get(task_id)
+        if task is None:
+            return False
+        for key, value in changes.items():
+            setattr(task, key, value)
+        return True
+
+    async def delete(self, task_id: str):
+        self.tasks.pop(task_id, None)
+        self.cancelled.discard(task_id)
+        self.owners.pop(task_id, None)
+
+    async def attach(self, task_id: str, user_id: str):
+        self.owners.setdefault(task_id, set()).add(user_id)
+
+    async def detach(self, task_id: str, user_id: str) -> Optional[int]:
+        owners = self.owners.get(task_id, set())
+        if user_id not in owners:
+            return None
+        owners.discard(user_id)
+        return len(owners)
+
+    async def record_progress(self, task_id: str, done: int, total: int, results: Sequence = ()):
+        task = self.tasks.get(task_id)
+        if task is None:
+            return
+        task.partial_results.extend(results)
+        task.progress = {"done": done, "total": total, "found": len(task.partial_results)}
+
+    async def clear_results(self, task_id: str):
+        if task_id in self.tasks:
+            self.tasks[task_id].partial_results = []
+
+    async def get_fingerprint(self, fingerprint: str) -> Optional[str]:
+        return self.fingerprints.get(fingerprint)
+
+    async def claim_fingerprint(self, fingerprint: str, task_id: str, replace: bool = False) -> bool:
+        if not replace and fingerprint in self.fingerprints:
+            return False
+        self.fingerprints[fingerprint] = task_id
+        return True
+
+    async def request_cancel(self, task_id: str):
+        self.cancelled.add(task_id)
+
+    async def cancel_requested(self, task_id: str) -> bool:
+        return task_id in self.cancelled
+
+    async def expire(self, cutoff: datetime):
+        to_remove = [tid for tid, task in self.tasks.items() if task.created_at < cutoff]
+        for tid in to_remove:
+            task = self.tasks.pop(tid)
+            self.cancelled.discard(tid)
+            self.owners.pop(tid, None)
+            if task.fingerprint and self.fingerprints.get(task.fingerprint) == tid:
+                del self.fingerprints[task.fingerprint]
+
+    async def close(self):
+        pass
+
+
+class RedisTaskStore:
+    """
+    Task storage in Redis, shared by every worker process.
+    Every key carries TASK_TTL, so old tasks expire on their own. A task is
+    a hash of JSON-encoded fields, so an update writes only the fields it
+    changes; progress lives in its own hash, so recording it is one O(1)
+    round trip that never rewrites the task.
+    """
+
+    def __init__(self, client: aioredis.Redis, ttl: int):
+        self.redis = client
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(task_id: str, suffix: str = "") -> str:
+        return f"task:{task_id}{suffix}"
+
+    async def save(self, task: Task):
+        key = self._key(task.task_id)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.delete(key)
+        pipe.hset(key, mapping={k: json.dumps(v) for k, v in task.to_dict().items()})
+        pipe.expire(key, self.ttl)
+        await pipe.execute()
+
+    async def update(self, task_id: str, changes: Dict) -> bool:
+        key = self._key(task_id)
+        mapping = {k: json.dumps(_jsonable(v)) for k, v in changes.items()}
+        async with self.redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    # WATCH keeps a task that expired meanwhile from coming back as a partial hash
+                    await pipe.watch(key)
+                    if not await pipe.exists(key):
+                        return False
+                    pipe.multi()
+                    pipe.hset(key, mapping=mapping)
+                    await pipe.execute()
+                    return True
+                except aioredis.WatchError:
+                    continue
+
+    async def load(self, task_id: str) -> Optional[Task]:
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hgetall(self._key(task_id))
+        pipe.hgetall(self._key(task_id, ":progress"))
+        pipe.lrange(self._key(task_id, ":results"), 0, -1)
+        raw, progress, results = await pipe.execute()
+        if not raw:
+            return None
+        task = Task.from_dict({k: json.loads(v) for k, v in raw.items()})
+        if progress:
+            task.progress = {k: int(v) for k, v in progress.items()}
+        task.partial_results = [json.loads(r) for r in results]
+        return task
+
+    async def delete(self, task_id: str):
+        await self.redis.delete(
+            self._key(task_id), self._key(task_id, ":results"),
+            self._key(task_id, ":progress"), self._key(task_id, ":cancel"),
+            self._key(task_id, ":owners"),
+        )
+
+    async def attach(self, task_id: str, user_id: str):
+        key = self._key(task_id, ":owners")
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.sadd(key, user_id)
+        pipe.expire(key, self.ttl)
+        await pipe.execute()
+
+    async def detach(self, task_id: str, user_id: str) -> Optional[int]:
+        key = self._key(task_id, ":owners")
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.srem(key, user_id)
+        pipe.scard(key)
+        removed, remaining = await pipe.execute()
+        return remaining if removed else None
+
+    async def record_progress(self, task_id: str, done: int, total: int, results: Sequence = ()):
+        progress_key = self._key(task_id, ":progress")
+        pipe = self.redis.pipeline(transaction=False)
+        if results:
+            results_key = self._key(task_id, ":results")
+            pipe.rpush(results_key, *(json.dumps(_jsonable(result)) for result in results))
+            pipe.expire(results_key, self.ttl)
+        pipe.hset(progress_key, mapping={"done": done, "total": total})
+        pipe.hincrby(progress_key, "found", len(results))
+        pipe.expire(progress_key, self.ttl)
+        await pipe.execute()
+
+    async def clear_results(self, task_id: str):
+        await self.redis.delete(self._key(task_id, ":results"))
+
+    async def get_fingerprint(self, fingerprint: str) -> Optional[str]:
+        return await self.redis.get(f"task_fp:{fingerprint}")
+
+    async def claim_fingerprint(self, fingerprint: str, task_id: str, replace: bool = False) -> bool:
+        # SET NX makes the claim atomic across workers
+        return bool(await self.redis.set(f"task_fp:{fingerprint}", task_id, ex=self.ttl, nx=not replace))
+
+    async def request_cancel(self, task_id: str):
+        await self.redis.set(self._key(task_id, ":cancel"), "1", ex=self.ttl)
+
+    async def cancel_requested(self, task_id: str) -> bool:
+        return bool(await self.redis.exists(self._key(task_id, ":cancel")))
+
+    async def expire(self, cutoff: datetime):
+        # Redis expires keys itself (TASK_TTL)
+        pass
+
+    async def close(self):
+        await self.redis.aclose()
 
 
 class TaskManager:
     """
-    Simple in-memory task manager for background jobs.
-    Sufficient for single-server deployment.
+    Task manager for background jobs.
+    Stores tasks in Redis so every uvicorn worker sees the same tasks and
+    they survive restarts; falls back to process memory without Redis.
+    Connected in the app lifespan, or lazily on first use.
     """
 
     def __init__(self):
-        self.tasks: Dict[str, Task] = {}
+        self._store = None
+        self._connect_lock = asyncio.Lock()
+
+    async def connect(self):
+        """Pick the store once: Redis if reachable, else process memory."""
+        async with self._connect_lock:
+            if self._store is not None:
+                return self._store
+            try:
+                client = aioredis.from_url(
+                    settings.REDIS_URL,
+                    decode_responses=True,
+                    socket_connect_timeout=2,
+                    socket_timeout=2
+                )
+                await client.ping()
+                self._store = RedisTaskStore(client, settings.TASK_TTL)
+                logger.info("Task manager using Redis")
+            except Exception as e:
+                logger.warning(f"Redis unavailable for tasks ({e}). Using in-memory task store.")
+                self._store = InMemoryTaskStore()
+            return self._store
+
+    async def close(self):
+        """Close the Redis connection pool; a later call reconnects."""
+        async with self._connect_lock:
+            if self._store is not None:
+                await self._store.close()
+                self._store = None
+
+    async def store(self):
+        return self._store if self._store is not None else await self.connect()
+
+    async def _update(self, task_id: str, **changes) -> bool:
+        return await (await self.store()).update(task_id, changes)
 
-    def create_task(self, task_id: str, metadata: Dict = None) -> Task:
-        """Create a new task entry."""
+    async def _reap(self, task: Optional[Task]) -> Optional[Task]:
+        """
+        Fail a pending/running task whose worker stopped heartbeating (the
+        process restarted or crashed mid-scan), so nobody waits on it.
+        """
+        if task is None or task.status not in ("pending", "running"):
+            return task
+        last_seen = task.heartbeat_at or task.started_at or task.created_at
+        if datetime.utcnow() - last_seen <= timedelta(seconds=2 * settings.TASK_HEARTBEAT_INTERVAL):
+            return task
+        logger.warning(f"Task {task.task_id} stopped heartbeating since {last_seen}, marking it failed")
+        task.status, task.completed_at, task.error = "failed", datetime.utcnow(), "Worker stopped responding"
+        await self._update(task.task_id, status=task.status, completed_at=task.completed_at, error=task.error)
+        return task
+
+    async def _new_task(self, task_id: str, metadata: Dict = None, fingerprint: Optional[str] = None) -> Task:
+        await self.cleanup_old_tasks(hours=settings.TASK_TTL / 3600)
+        store = await self.store()
         task = Task(
             task_id=task_id,
             status="pending",
             created_at=datetime.utcnow(),
-            metadata=metadata or {}
+            metadata=metadata or {},
+            fingerprint=fingerprint
         )
-        self.tasks[task_id] = task
+        # Drop leftovers (cancel flag, progress, partial results) of a reused id
+        await store.delete(task_id)
+        await store.save(task)
         return task
 
-    def start_task(self, task_id: str):
+    async def create_task(
+        self,
+        task_id: str,
+        metadata: Dict = None,
+        fingerprint: Optional[str] = None,
+        owner: Optional[str] = None
+    ) -> Task:
+        """Create a new task entry, attaching owner (a user_id) to it."""
+        store = await self.store()
+        task = await self._new_task(task_id, metadata, fingerprint)
+        if fingerprint:
+            await store.claim_fingerprint(fingerprint, task_id, replace=True)
+        if owner:
+            await store.attach(task_id, owner)
+        return task
+
+    async def find_task(self, fingerprint: str, max_age_seconds: int) -> Optional[Task]:
+        """
+        Find a reusable task for a fingerprint: one still pending/running
+        (and heartbeating), or completed within the last max_age_seconds.
+        Failed and cancelled tasks are not reused.
+        """
+        store = await self.store()
+        task_id = await store.get_fingerprint(fingerprint)
+        task = await self._reap(await store.load(task_id)) if task_id else None
+        if task is None:
+            return None
+        if task.status in ("pending", "running"):
+            return task
+        if task.status == "completed" and task.completed_at:
+            if datetime.utcnow() - task.completed_at <= timedelta(seconds=max_age_seconds):
+                return task
+        return None
+
+    async def get_or_create_task(
+        self,
+        task_id: str,
+        fingerprint: str,
+        max_age_seconds: int,
+        metadata: Dict = None,
+        owner: Optional[str] = None
+    ) -> Tuple[Task, bool]:
+        """
+        Return (task, created): an identical running or recent task if there
+        is one, otherwise a newly created task under task_id. Either way,
+        owner (a user_id) is attached to the returned task.
+        """
+        store = await self.store()
+        existing = await self.find_task(fingerprint, max_age_seconds)
+        if existing is not None:
+            if owner:
+                await store.attach(existing.task_id, owner)
+            return existing, False
+
+        # Save the task before claiming the fingerprint, so a worker that
+        # loses the claim always finds a task behind it
+        task = await self._new_task(task_id, metadata, fingerprint)
+        if not await store.claim_fingerprint(fingerprint, task_id):
+            existing = await self.find_task(fingerprint, max_age_seconds)
+            if existing is not None and existing.task_id != task_id:
+                await store.delete(task_id)
+                if owner:
+                    await store.attach(existing.task_id, owner)
+                return existing, False
+            await store.claim_fingerprint(fingerprint, task_id, replace=True)
+        if owner:
+            await store.attach(task_id, owner)
+        return task, True
+
+    async def start_task(self, task_id: str):
         """Mark task as started."""
-        if task_id in self.tasks:
-            self.tasks[task_id].status = "running"
-            self.tasks[task_id].started_at = datetime.utcnow()
+        now = datetime.utcnow()
+        await self._update(task_id, status="running", started_at=now, heartbeat_at=now)
+
+    @asynccontextmanager
+    async def heartbeat(self, task_id: str) -> AsyncIterator[None]:
+        """
+        Refresh the task's heartbeat every TASK_HEARTBEAT_INTERVAL seconds
+        while the body runs, so other workers can tell it's still alive.
+        """
+        async def beat():
+            while True:
+                await asyncio.sleep(settings.TASK_HEARTBEAT_INTERVAL)
+                try:
+                    await self._update(task_id, heartbeat_at=datetime.utcnow())
+                except Exception as e:
+                    logger.warning(f"Failed to refresh heartbeat for task {task_id}: {e}")
+
+        beater = asyncio.create_task(beat())
+        try:
+            yield
+        finally:
+            beater.cancel()
+            await asyncio.gather(beater, return_exceptions=True)
 
-    def complete_task(self, task_id: str, result: Any):
+    async def update_progress(self, task_id: str, done: int, total: int, results: Sequence = ()):
+        """Record progress (symbols done/total) and append the results found since the last update."""
+        try:
+            await (await self.store()).record_progress(task_id, done, total, results)
+        except Exception as e:
+            logger.warning(f"Failed to record progress for task {task_id}: {e}")
+
+    async def complete_task(self, task_id: str, result: Any):
         """Mark task as completed with result."""
-        if task_id in self.tasks:
-            self.tasks[task_id].status = "completed"
-            self.tasks[task_id].completed_at = datetime.utcnow()
-            self.tasks[task_id].result = result
+        if await self._update(task_id, status="completed", completed_at=datetime.utcnow(), result=_jsonable(result)):
+            await (await self.store()).clear_results(task_id)
 
-    def fail_task(self, task_id: str, error: str):
+    async def fail_task(self, task_id: str, error: str):
         """Mark task as failed with error."""
-        if task_id in self.tasks:
-            self.tasks[task_id].status = "failed"
-            self.tasks[task_id].completed_at = datetime.utcnow()
-            self.tasks[task_id].error = error
+        await self._update(task_id, status="failed", completed_at=datetime.utcnow(), error=error)
 
-    def get_task(self, task_id: str) -> Optional[Task]:
-        """Get task by ID."""
-        return self.tasks.get(task_id)
+    async def cancel_task(self, task_id: str, user_id: str) -> Tuple[Optional[Task], bool]:
+        """
+        Detach a user from a task, and request cancellation if no other
+        user is still attached to it (identical requests share a task).
+        A cancelled task stops at its next progress check (on whichever
+        worker runs it).
 
-    def cleanup_old_tasks(self, hours: int = 24):
-        """Remove tasks older than specified hours."""
-        cutoff = datetime.utcnow() - timedelta(hours=hours)
-        to_remove = [
-            tid for tid, task in self.tasks.items()
-            if task.created_at < cutoff
-        ]
-        for tid in to_remove:
-            del self.tasks[tid]
+        Returns (task, cancelling): task is None if it doesn't exist or
+        the user isn't attached to it; cancelling is whether cancellation
+        was requested.
+        """
+        store = await self.store()
+        task = await store.load(task_id)
+        if task is None:
+            return None, False
+        remaining = await store.detach(task_id, user_id)
+        if remaining is None:
+            return None, False
+        cancelling = remaining == 0 and task.status in ("pending", "running")
+        if cancelling:
+            await store.request_cancel(task_id)
+        return task, cancelling
+
+    async def is_cancelled(self, task_id: str) -> bool:
+        """Whether cancellation was requested for a task."""
+        return await (await self.store()).cancel_requested(task_id)
+
+    async def mark_cancelled(self, task_id: str):
+        """Mark task as cancelled, keeping the results found before it stopped."""
+        await self._update(task_id, status="cancelled", completed_at=datetime.utcnow())
+
+    async def get_task(self, task_id: str) -> Optional[Task]:
+        """Get task by ID (failed if its worker stopped heartbeating)."""
+        return await self._reap(await (await self.store()).load(task_id))
+
+    async def cleanup_old_tasks(self, hours: float = 24):
+        """Remove tasks older than specified hours (Redis expires them itself)."""
+        await (await self.store()).expire(datetime.utcnow() - timedelta(hours=hours))
 
 
-# Global task manager instance
+# Global task manager instance (connected in the app lifespan)
 task_manager = TaskManager()
@@ -0,0 +1,203 @@
+"""
+In-process symbol → subscriber index for watchlist alerts.
+
+Maps every symbol on an alert-enabled watchlist item to the users watching
+it, alongside each user's alert preferences (threshold and channels), so
+matching a scan's results against watchlists is a dictionary join with no
+database reads. Built at startup, updated by the watchlist and preferences
+routes as users change their data, and rebuilt from the database every
+WATCHLIST_INDEX_RECONCILE seconds to pick up changes made elsewhere (other
+processes, the Supabase dashboard, cascading deletes).
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from config import settings
+from models.candle import ScanResult
+from services.supabase_client import supabase
+
+logger = logging.getLogger(__name__)
+
+# user_preferences columns alert dispatch needs
+PREFERENCE_FIELDS = "user_id, email_alerts, push_alerts, alert_threshold, phone_number"
+
+# Rows per page when loading watchlist items (PostgREST's default max-rows)
+PAGE_SIZE = 1000
+
+# (user_id, symbol, preferences)
+Match = Tuple[str, str, dict]
+
+
+def wants_alert(preferences: dict, score: float) -> bool:
+    """Whether a result with this score alerts a user: threshold (default 80) met and a channel enabled."""
+    if score < preferences.get("alert_threshold", 80):
+        return False
+    return bool(preferences.get("email_alerts") or preferences.get("push_alerts"))
+
+
+def _alert_preferences(row: Optional[dict]) -> dict:
+    fields = PREFERENCE_FIELDS.split(", ")[1:]
+    return {k: row[k] for k in fields if k in row} if row else {}
+
+
+class WatchlistIndex:
+    """
+    symbol → user_ids with an alert-enabled watchlist item, plus each of
+    those users' alert preferences. Not ready (match() unusable) until the
+    first build succeeds.
+    """
+
+    def __init__(self):
+        self.by_symbol: Dict[str, Set[str]] = {}
+        self.preferences: Dict[str, dict] = {}  # user_id -> alert preferences ({} if none saved)
+        self.ready = False
+        self.built_at: Optional[float] = None
+        self._journal: Optional[list] = None  # changes made while a rebuild is loading
+        self._rebuild_lock = asyncio.Lock()
+        self._reconciler: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # Incremental updates (called by the routes after a successful write)
+    # ------------------------------------------------------------------
+
+    def _record(self, change: str, *args):
+        if self._journal is not None:
+            self._journal.append((change, args))
+
+    def add(self, user_id: str, symbol: str):
+        """An alert-enabled watchlist item was added (or had alerts turned on)."""
+        self._record("add", user_id, symbol)
+        self.by_symbol.setdefault(symbol.upper(), set()).add(user_id)
+
+    def remove(self, user_id: str, symbol: str):
+        """A watchlist item was removed (or had alerts turned off)."""
+        self._record("remove", user_id, symbol)
+        symbol = symbol.upper()
+        users = self.by_symbol.get(symbol)
+        if users is not None:
+            users.discard(user_id)
+            if not users:
+                del self.by_symbol[symbol]
+
+    def set_alert(self, user_id: str, symbol: str, enabled: bool):
+        if enabled:
+            self.add(user_id, symbol)
+        else:
+            self.remove(user_id, symbol)
+
+    def set_preferences(self, user_id: str, row: Optional[dict]):
+        """A user's preferences were saved (row) or reset (None)."""
+        self._record("set_preferences", user_id, row)
+        self.preferences[user_id] = _alert_preferences(row)
+
+    async def ensure_preferences(self, user_id: str):
+        """Load a user's preferences if the index doesn't hold them yet (e.g. their first alert)."""
+        if user_id in self.preferences:
+            return
+        try:
+            rows = await supabase.table("user_preferences").select(PREFERENCE_FIELDS).eq("user_id", user_id).execute()
+        except Exception as e:
+            logger.warning("Could not load preferences for %s into the watchlist index: %s", user_id, e)
+            return
+        if user_id not in self.preferences:
+            self.set_preferences(user_id, rows[0] if rows else None)
+
+    # ------------------------------------------------------------------
+    # Full builds
+    # ------------------------------------------------------------------
+
+    async def _load_items(self) -> List[dict]:
+        items: List[dict] = []
+        while True:
+            page = await (
+                supabase.table("watchlist_items")
+                .select("id, user_id, symbol")
+                .eq("alert_enabled", True)
+                .order("id")
+                .range(len(items), len(items) + PAGE_SIZE - 1)
+                .execute()
+            )
+            items.extend(page)
+            if len(page) < PAGE_SIZE:
+                return items
+
+    async def rebuild(self):
+        """
+        Rebuild the index from the database and swap it in. Changes
+        recorded while loading are replayed on top, so a route's update
+        isn't lost to a snapshot taken just before it. Raises on failure,
+        leaving the current index in place.
+        """
+        async with self._rebuild_lock:
+            started = time.perf_counter()
+            self._journal = []
+            try:
+                items = await self._load_items()
+                user_ids = list(dict.fromkeys(item["user_id"] for item in items))
+                prefs_rows = await supabase.select_in("user_preferences", "user_id", user_ids, PREFERENCE_FIELDS)
+            except BaseException:
+                self._journal = None
+                raise
+
+            by_symbol: Dict[str, Set[str]] = {}
+            for item in items:
+                by_symbol.setdefault(item["symbol"].upper(), set()).add(item["user_id"])
+            preferences = {user_id: {} for user_id in user_ids}
+            for row in prefs_rows:
+                preferences[row["user_id"]] = _alert_preferences(row)
+
+            journal, self._journal = self._journal, None
+            self.by_symbol, self.preferences = by_symbol, preferences
+            for change, args in journal:
+                getattr(self, change)(*args)
+
+            self.ready = True
+            self.built_at = time.time()
+            logger.info(
+                "Watchlist index built: %d symbols, %d users in %.0f ms",
+                len(self.by_symbol), len(self.preferences), (time.perf_counter() - started) * 1000,
+            )
+
+    async def _reconcile(self):
+        while True:
+            await asyncio.sleep(settings.WATCHLIST_INDEX_RECONCILE)
+            try:
+                await self.rebuild()
+            except Exception as e:
+                logger.error("Watchlist index reconciliation failed: %s", e)
+
+    async def start(self):
+        """Build the index and start periodic reconciliation (app lifespan)."""
+        if self._reconciler is not None:
+            return
+        try:
+            await self.rebuild()
+        except Exception as e:
+            logger.error("Watchlist index build failed (%s); alerts will query the database until it succeeds", e)
+        self._reconciler = asyncio.create_task(self._reconcile())
+
+    async def stop(self):
+        if self._reconciler is not None:
+            self._reconciler.cancel()
+            await asyncio.gather(self._reconciler, return_exceptions=True)
+            self._reconciler = None
+
+    # ------------------------------------------------------------------
+    # Matching
+    # ------------------------------------------------------------------
+
+    def match(self, results: List[ScanResult]) -> List[Match]:
+        """(user_id, symbol, preferences) for every user a result should alert."""
+        matches: List[Match] = []
+        for result in results:
+            for user_id in self.by_symbol.get(result.symbol, ()):
+                preferences = self.preferences.get(user_id, {})
+                if wants_alert(preferences, result.breakout_score):
+                    matches.append((user_id, result.symbol, preferences))
+        return matches
+
+
+# Global watchlist index (built in the app lifespan)
+watchlist_index = WatchlistIndex()
@@ -0,0 +1,9 @@
+"""Shared test setup: import the backend packages and satisfy required settings (no real services are contacted)."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("POLYGON_API_KEY", "test")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test")
@@ -0,0 +1,109 @@
+"""BarStore on-disk layout: versioned publish, in-place append, and writers in several processes."""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from benchmarks.synthetic import DAY_MS, make_series
+from data.bar_store import COLUMNS, BarStore
+from models.candle import CandleSeries
+
+SYMBOL = "AAA"
+
+
+def _versions(store: BarStore) -> list:
+    return sorted(name for name in os.listdir(store._dir(SYMBOL)) if name.startswith("v"))
+
+
+def _bar(t: int) -> CandleSeries:
+    # o encodes t, so a row whose columns came from different writes shows up
+    day = float(t // DAY_MS)
+    return CandleSeries(np.array([t], dtype=np.int64), *(np.array([day]) for _ in range(5)))
+
+
+def _append_days(root: str, count: int) -> None:
+    store = BarStore(root)
+    for _ in range(count):
+        store.write_tail(SYMBOL, _bar(store.last_timestamp(SYMBOL) + DAY_MS))
+
+
+def test_relative_root_resolves_against_the_backend_dir(tmp_path):
+    store = BarStore("data/bars")
+    assert os.path.isabs(store.root) and store.root.endswith(os.path.join("backend", "data", "bars"))
+    assert BarStore(str(tmp_path)).root == str(tmp_path)
+
+
+def test_write_publishes_a_new_version_and_keeps_the_previous(tmp_path):
+    store = BarStore(str(tmp_path / "bars"))
+    assert store.read_columns(SYMBOL) is None
+    assert not os.path.exists(store.root)  # created on first write
+
+    store.write(SYMBOL, make_series(30, seed=1))
+    first = store._read_meta(SYMBOL)["version"]
+    store.write(SYMBOL, make_series(40, seed=2))
+    store.write(SYMBOL, make_series(50, seed=3))
+
+    meta = store._read_meta(SYMBOL)
+    assert meta["version"] != first
+    assert len(_versions(store)) == 2 and meta["version"] in _versions(store)
+    np.testing.assert_array_equal(store.read(SYMBOL).c, make_series(50, seed=3).c)
+
+
+def test_write_tail_appends_in_place_and_republishes_overlaps(tmp_path):
+    store = BarStore(str(tmp_path))
+    series = make_series(60, seed=4)
+    store.write(SYMBOL, series[:40])
+    version = store._read_meta(SYMBOL)["version"]
+
+    assert store.write_tail(SYMBOL, series[40:50]) == 10
+    assert store._read_meta(SYMBOL)["version"] == version
+
+    # An overlapping tail (refreshed last bar) must not truncate under readers' maps
+    reader = store.read_columns(SYMBOL)
+    store.write_tail(SYMBOL, series[49:60])
+    assert store._read_meta(SYMBOL)["version"] != version
+    assert len(reader["t"]) == 50
+
+    np.testing.assert_array_equal(store.read(SYMBOL).t, series.t)
+    np.testing.assert_array_equal(store.read(SYMBOL).c, series.c)
+
+
+def test_legacy_layout_is_read_then_replaced(tmp_path):
+    store = BarStore(str(tmp_path))
+    series = make_series(20, seed=5)
+    os.makedirs(store._dir(SYMBOL))
+    for col, dtype in COLUMNS.items():
+        getattr(series, col).astype(dtype).tofile(os.path.join(store._dir(SYMBOL), f"{col}.bin"))
+
+    np.testing.assert_array_equal(store.read(SYMBOL).c, series.c)
+    store.write_tail(SYMBOL, make_series(25, seed=5)[20:])
+    assert store.row_count(SYMBOL) == 25
+
+    # The first publish moves the symbol to a version directory; the legacy
+    # files stay for readers that mapped them and go with the next publish
+    store.write_tail(SYMBOL, make_series(30, seed=5)[24:])
+    store.write_tail(SYMBOL, make_series(30, seed=5)[29:])
+    assert not any(name.endswith(".bin") for name in os.listdir(store._dir(SYMBOL)))
+    np.testing.assert_array_equal(store.read(SYMBOL).c, make_series(30, seed=5).c)
+
+
+def test_writers_in_several_processes_keep_columns_aligned(tmp_path):
+    store = BarStore(str(tmp_path))
+    store.write(SYMBOL, _bar(100 * DAY_MS))
+
+    # Every process appends "the day after the last one it saw": racers
+    # collide on timestamps, so appends and republishes interleave
+    with ProcessPoolExecutor(4, mp_context=multiprocessing.get_context("fork")) as pool:
+        for future in [pool.submit(_append_days, store.root, 25) for _ in range(4)]:
+            future.result()
+
+    data_dir = store._data_dir(SYMBOL, store._read_meta(SYMBOL))
+    sizes = {os.path.getsize(os.path.join(data_dir, f"{col}.bin")) // dtype.itemsize for col, dtype in COLUMNS.items()}
+    assert len(sizes) == 1
+
+    stored = store.read(SYMBOL)
+    assert np.all(np.diff(stored.t) > 0)
+    np.testing.assert_array_equal(stored.o, stored.t // DAY_MS)
+    np.testing.assert_array_equal(stored.v, stored.t // DAY_MS)
+    assert stored.t[0] == 100 * DAY_MS and len(stored) > 1
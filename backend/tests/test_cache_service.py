@@ -0,0 +1,64 @@
+"""CacheService two-tier reads: the local tier never outlives Redis."""
+import asyncio
+import time
+from datetime import datetime
+
+import fakeredis
+import pytest
+
+import data.cache_service as cache_module
+from config import settings
+from data.cache_service import CacheService
+from utils.market_calendar import NY, SNAPSHOT, cache_ttl
+
+# Wednesday 2025-06-11, 11:00 New York: regular session
+IN_SESSION = datetime(2025, 6, 11, 11, 0, tzinfo=NY)
+
+
+def _connected(client) -> CacheService:
+    cache = CacheService()
+    cache.redis_client = client
+    cache.enabled = True
+    cache._connect_attempted = True
+    return cache
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeAsyncRedis()
+
+
+@pytest.fixture
+def in_session(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_SNAPSHOT_TTL", 1)
+    monkeypatch.setattr(cache_module, "cache_ttl", lambda kind, now=None: cache_ttl(kind, IN_SESSION))
+
+
+def test_snapshot_ttl_during_session(in_session):
+    assert cache_module.cache_ttl(SNAPSHOT) == settings.CACHE_SNAPSHOT_TTL
+
+
+async def test_snapshot_read_through_local_tier_expires_with_redis(redis_client, in_session):
+    writer, reader = _connected(redis_client), _connected(redis_client)
+    await writer.set_snapshot("momentum", {"leaders": ["NVDA"]})
+
+    # The reader (another worker) caches the Redis hit in its local tier...
+    assert await reader.get_snapshot("momentum") == {"leaders": ["NVDA"]}
+    expires_at, _ = reader.local._entries["snapshot:momentum"]
+    assert expires_at - time.monotonic() <= settings.CACHE_SNAPSHOT_TTL
+
+    # ...but only until the key's Redis TTL ends, not for CACHE_LOCAL_TTL
+    await asyncio.sleep(settings.CACHE_SNAPSHOT_TTL + 0.2)
+    assert await redis_client.get("snapshot:momentum") is None
+    assert await reader.get_snapshot("momentum") is None
+
+
+async def test_get_many_caps_local_ttl_at_redis_ttl(redis_client):
+    await redis_client.set("short", b'{"v": 1}', px=500)
+    await redis_client.set("forever", b'{"v": 2}')
+    reader = _connected(redis_client)
+
+    assert await reader.get_many(["short", "forever", "missing"]) == [{"v": 1}, {"v": 2}, None]
+
+    await asyncio.sleep(0.7)
+    assert await reader.get_many(["short", "forever"]) == [None, {"v": 2}]
@@ -0,0 +1,35 @@
+"""Scan process pool: a dead worker doesn't take later batches down with it."""
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import scan.cpu_pool as cpu_pool
+from benchmarks.synthetic import make_series
+from config import settings
+from scan.cpu_pool import run_scan_batch, run_scan_one, scan_batch
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(settings, "SCAN_CPU_WORKERS", 1)
+    yield
+    cpu_pool.shutdown_process_pool()
+
+
+def _kill_worker():
+    with pytest.raises(BrokenProcessPool):
+        cpu_pool.get_process_pool().submit(os._exit, 1).result()
+
+
+async def test_batch_after_worker_death_runs_on_a_new_pool(pool):
+    items = [("AAA", make_series(260, seed=1)), ("BBB", make_series(260, seed=2))]
+    expected = scan_batch(items)
+
+    assert await run_scan_batch(items) == expected
+    broken = cpu_pool.get_process_pool()
+    _kill_worker()
+
+    assert await run_scan_batch(items) == expected
+    assert cpu_pool.get_process_pool() is not broken
+    assert await run_scan_one("AAA", items[0][1]) == expected[0]
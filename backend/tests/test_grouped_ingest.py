@@ -0,0 +1,65 @@
+"""Grouped-daily ingestion: update runs append new days instead of rewriting history."""
+from datetime import datetime, timedelta
+
+import pytest
+
+import data.grouped_ingest as grouped_ingest
+import providers.polygon as polygon
+from data.bar_store import BarStore, _day_start_ms
+from models.candle import CandleSeries
+
+SYMBOLS = ["AAA", "BBB"]
+
+
+@pytest.fixture
+def market(monkeypatch):
+    """Fake grouped-daily endpoint; days after `market["until"]` have no data yet."""
+    market = {"until": datetime.utcnow() - timedelta(days=7), "requested": []}
+
+    async def get_grouped_daily(d, adjusted=True):
+        market["requested"].append(d)
+        if d > market["until"]:
+            return [], CandleSeries.empty()
+        t = _day_start_ms(d)
+        return SYMBOLS, CandleSeries.from_polygon([
+            {"t": t, "o": 1, "h": 2, "l": 0.5, "c": float(d.day) + i, "v": 5} for i in range(len(SYMBOLS))
+        ])
+
+    async def get_split_tickers(start, end):
+        return []
+
+    monkeypatch.setattr(polygon, "get_grouped_daily", get_grouped_daily)
+    monkeypatch.setattr(polygon, "get_split_tickers", get_split_tickers)
+    monkeypatch.setattr(grouped_ingest, "_bar_final", lambda d: True)
+    return market
+
+
+async def test_update_appends_after_the_last_final_day(market, tmp_path):
+    store = BarStore(str(tmp_path))
+    await grouped_ingest.ingest_grouped_daily(40, store=store)
+    last_date = grouped_ingest.load_state(store)["last_date"]
+    rows = store.row_count("AAA")
+    version = store._read_meta("AAA")["version"]
+
+    market["until"] = datetime.utcnow()
+    market["requested"].clear()
+    summary = await grouped_ingest.ingest_grouped_daily(store=store)
+
+    assert min(market["requested"]) > datetime.strptime(last_date, "%Y-%m-%d")
+    assert store.row_count("AAA") == rows + summary["days_with_data"] > rows
+    # Pure appends: the stored version is extended in place, not republished
+    assert store._read_meta("AAA")["version"] == version
+    t = store.read("AAA").t
+    assert list(t) == sorted(set(t))
+
+
+async def test_provisional_last_day_is_requested_again(market, tmp_path, monkeypatch):
+    monkeypatch.setattr(grouped_ingest, "_bar_final", lambda d: False)
+    store = BarStore(str(tmp_path))
+    await grouped_ingest.ingest_grouped_daily(40, store=store)
+    state = grouped_ingest.load_state(store)
+    assert state["last_final"] is False
+
+    market["requested"].clear()
+    await grouped_ingest.ingest_grouped_daily(store=store)
+    assert min(market["requested"]) == datetime.strptime(state["last_date"], "%Y-%m-%d")
@@ -0,0 +1,53 @@
+"""NumPy indicator engine vs the original per-element loops (benchmarks.bench_indicators)."""
+import numpy as np
+import pytest
+
+from benchmarks.bench_indicators import RTOL, legacy_adr, legacy_atr, legacy_ema
+from benchmarks.synthetic import make_series
+from indicators.adr import adr_pct
+from indicators.atr import atr
+from indicators.ema import ema
+from indicators.engine import compute_batch
+
+LENGTHS = (0, 1, 2, 14, 15, 64, 65, 420)
+PERIODS = (1, 14, 21, 50, 200)
+
+
+@pytest.mark.parametrize("seed", range(8))
+@pytest.mark.parametrize("n", LENGTHS)
+def test_wrappers_match_legacy_loops(seed, n):
+    series = make_series(max(n, 1), seed)[:n]
+    h, l, c = series.h.tolist(), series.l.tolist(), series.c.tolist()
+    for period in PERIODS:
+        np.testing.assert_allclose(ema(series.c, period), legacy_ema(c, period), rtol=RTOL)
+        expected_atr = legacy_atr(h, l, c, period)
+        got_atr = atr(series, period)
+        assert len(got_atr) == len(expected_atr)
+        np.testing.assert_allclose(got_atr, expected_atr, rtol=RTOL)
+        np.testing.assert_allclose(adr_pct(series, period), legacy_adr(h, l, c, period), rtol=RTOL)
+
+
+def test_atr_front_padding():
+    series = make_series(30, seed=1)
+    got = np.asarray(atr(series, 14))
+    # One value per bar: the first ATR repeated over the bars before it exists
+    assert len(got) == len(series)
+    assert np.all(got[:15] == got[14])
+    np.testing.assert_allclose(got, legacy_atr(series.h.tolist(), series.l.tolist(), series.c.tolist(), 14), rtol=RTOL)
+
+
+def test_compute_batch_matches_legacy_loops():
+    universe = [make_series(260, seed) for seed in range(6)]
+    batch = compute_batch(
+        np.stack([s.h for s in universe]),
+        np.stack([s.l for s in universe]),
+        np.stack([s.c for s in universe]),
+    )
+    for row, s in enumerate(universe):
+        h, l, c = s.h.tolist(), s.l.tolist(), s.c.tolist()
+        np.testing.assert_allclose(
+            [batch.ema21[row], batch.ema50[row], batch.ema200[row], batch.atr14[row], batch.adr14[row]],
+            [legacy_ema(c, 21)[-1], legacy_ema(c, 50)[-1], legacy_ema(c, 200)[-1],
+             legacy_atr(h, l, c, 14)[-1], legacy_adr(h, l, c, 14)],
+            rtol=RTOL,
+        )
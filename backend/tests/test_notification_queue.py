@@ -0,0 +1,47 @@
+"""NotificationQueue.stop(drain=True) delivers what was queued, with either store."""
+import fakeredis
+import pytest
+
+from services.notification_queue import (
+    InMemoryNotificationStore,
+    Notification,
+    NotificationQueue,
+    RedisNotificationStore,
+    StandInSender,
+)
+
+
+@pytest.fixture(params=["memory", "redis"])
+def queue(request) -> NotificationQueue:
+    queue = NotificationQueue({"email": StandInSender("email", workers=2, batch_size=10, latency=0.02)})
+    if request.param == "redis":
+        queue.store = RedisNotificationStore(fakeredis.FakeAsyncRedis(decode_responses=True))
+    else:
+        queue.store = InMemoryNotificationStore()
+    return queue
+
+
+async def test_drain_sends_everything_just_queued(queue):
+    sender = queue.senders["email"]
+    await queue.start(use_redis=False)
+    accepted = await queue.enqueue_many([Notification("email", {"to": f"user{i}@example.com"}) for i in range(50)])
+
+    await queue.stop(drain=True, timeout=5)
+
+    assert accepted == 50
+    assert sender.delivered == 50
+    assert queue.stats["email_sent"] == 50
+
+
+async def test_stop_without_drain_leaves_the_queue(queue):
+    sender = queue.senders["email"]
+    store = queue.store
+    sender.latency = 1.0
+    await queue.start(use_redis=False)
+    await queue.enqueue_many([Notification("email", {"to": f"user{i}@example.com"}) for i in range(50)])
+
+    await queue.stop()
+
+    assert sender.delivered == 0
+    if isinstance(store, InMemoryNotificationStore):
+        assert await store.depth("email") > 0  # Redis keeps it for the next process
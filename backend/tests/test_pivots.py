@@ -0,0 +1,52 @@
+"""Sliding-window pivots vs the nested-loop original (benchmarks.bench_pivots)."""
+import numpy as np
+import pytest
+
+from benchmarks.bench_pivots import legacy_pivot_highs, legacy_pivot_lows
+from benchmarks.synthetic import make_series
+from indicators.pivots import Pivot, pivot_high_mask, pivot_highs, pivot_low_mask, pivot_lows
+from models.candle import CandleSeries
+
+WINDOWS = ((3, 3), (0, 2), (2, 0), (1, 5), (5, 1))
+
+
+def _series(highs, lows) -> CandleSeries:
+    n = len(highs)
+    return CandleSeries(
+        np.arange(n, dtype=np.int64), np.asarray(lows, float), np.asarray(highs, float),
+        np.asarray(lows, float), np.asarray(highs, float), np.ones(n),
+    )
+
+
+@pytest.mark.parametrize("seed", range(8))
+@pytest.mark.parametrize("n", (0, 3, 6, 7, 8, 60, 420))
+@pytest.mark.parametrize("rounded", (False, True))
+def test_pivots_match_legacy_loops(seed, n, rounded):
+    series = make_series(max(n, 1), seed)[:n]
+    if rounded:
+        # Rounded prices produce plenty of equal highs/lows to exercise ties
+        series.h[:] = series.h.round()
+        series.l[:] = series.l.round()
+    for left, right in WINDOWS:
+        assert pivot_highs(series, left, right) == legacy_pivot_highs(series.h.tolist(), left, right)
+        assert pivot_lows(series, left, right) == legacy_pivot_lows(series.l.tolist(), left, right)
+
+
+def test_tied_pivots():
+    # Strictly beyond the left bars, ties allowed on the right: only the first of a tied pair pivots
+    series = _series([1, 2, 3, 3, 2, 1, 0], [5, 4, 3, 3, 4, 5, 6])
+    assert pivot_highs(series, 2, 2) == [Pivot(2, 3.0)] == legacy_pivot_highs(series.h.tolist(), 2, 2)
+    assert pivot_lows(series, 2, 2) == [Pivot(2, 3.0)] == legacy_pivot_lows(series.l.tolist(), 2, 2)
+
+
+@pytest.mark.parametrize("left,right", WINDOWS)
+def test_batched_masks_match_legacy_loops(left, right):
+    universe = [make_series(120, seed) for seed in range(6)]
+    for s in universe[::2]:
+        s.h[:] = s.h.round()
+        s.l[:] = s.l.round()
+    high_mask = pivot_high_mask(np.stack([s.h for s in universe]), left, right)
+    low_mask = pivot_low_mask(np.stack([s.l for s in universe]), left, right)
+    for row, s in enumerate(universe):
+        assert np.flatnonzero(high_mask[row]).tolist() == [p.i for p in legacy_pivot_highs(s.h.tolist(), left, right)]
+        assert np.flatnonzero(low_mask[row]).tolist() == [p.i for p in legacy_pivot_lows(s.l.tolist(), left, right)]
@@ -0,0 +1,146 @@
+"""AdaptiveRateLimiter AIMD: the rate's path over time for a sequence of successes and 429s, and the per-request backoff on 429s."""
+import pytest
+
+import providers.polygon as polygon
+from providers.polygon import ADJUST_INTERVAL, AdaptiveRateLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(polygon.time, "monotonic", clock)
+    return clock
+
+
+def _limiter() -> AdaptiveRateLimiter:
+    return AdaptiveRateLimiter(rate=5.0, min_rate=0.5, max_rate=6.0, burst=5, increase=0.25, decrease=0.5)
+
+
+def test_increase_is_per_interval_not_per_response(clock):
+    limiter = _limiter()
+    path = []
+    for _ in range(4):
+        for _ in range(50):  # many 200s within one interval
+            limiter.on_success()
+            clock.now += ADJUST_INTERVAL / 50
+        path.append(limiter.rate)
+    assert path == pytest.approx([5.25, 5.5, 5.75, 6.0])
+
+    clock.now += 10 * ADJUST_INTERVAL
+    limiter.on_success()
+    assert limiter.rate == 6.0  # capped at max_rate
+
+
+def test_throttle_then_recover(clock):
+    limiter = _limiter()
+    path = []
+
+    def step(event: str):
+        limiter.on_throttle() if event == "429" else limiter.on_success()
+        path.append(round(limiter.rate, 2))
+        clock.now += ADJUST_INTERVAL / 2
+
+    for event in ("200", "429", "429", "200", "200", "429", "200", "200", "200", "200"):
+        step(event)
+
+    assert path == [
+        5.25,   # first success raises the rate
+        2.62,   # 429 halves it
+        2.62,   # a second 429 within the interval is the same signal
+        2.88,   # one interval after the decrease, successes raise it again
+        2.88,   # ...once per interval
+        1.44,   # 429 an interval after the last decrease halves it again
+        1.44,   # no increase within an interval of the decrease
+        1.69,
+        1.69,
+        1.94,
+    ]
+
+
+def test_rate_floor(clock):
+    limiter = _limiter()
+    for _ in range(10):
+        limiter.on_throttle()
+        clock.now += ADJUST_INTERVAL
+    assert limiter.rate == 0.5
+
+
+class Response:
+    def __init__(self, status: int, headers: dict = None):
+        self.status = status
+        self.headers = headers or {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def read(self) -> bytes:
+        return b"{}"
+
+
+class Session:
+    def __init__(self, responses):
+        self.responses = list(responses)
+
+    def get(self, url, params=None) -> Response:
+        return self.responses.pop(0)
+
+
+class OpenLimiter:
+    """Never waits, so every recorded sleep is _polygon_get's own backoff."""
+
+    def __init__(self):
+        self.throttles = []
+
+    async def acquire(self) -> None:
+        pass
+
+    def on_success(self) -> None:
+        pass
+
+    def on_throttle(self, retry_after=None) -> None:
+        self.throttles.append(retry_after)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record _polygon_get's backoff sleeps instead of waiting them out."""
+    sleeps = []
+
+    async def sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(polygon, "rate_limiter", OpenLimiter())
+    monkeypatch.setattr(polygon.asyncio, "sleep", sleep)
+    return sleeps
+
+
+def _session(monkeypatch, *responses: Response):
+    async def get_session():
+        return Session(responses)
+
+    monkeypatch.setattr(polygon, "get_session", get_session)
+
+
+async def test_429s_back_off_before_retrying(monkeypatch, sleeps):
+    _session(monkeypatch, *(Response(429) for _ in range(5)))
+    with pytest.raises(Exception, match="rate limited"):
+        await polygon._polygon_get("https://api.polygon.io/x", {}, tries=5)
+    assert sleeps == [1.0, 2.0, 4.0, 8.0]
+
+
+async def test_429_honours_retry_after(monkeypatch, sleeps):
+    _session(monkeypatch, Response(429, {"Retry-After": "3"}), Response(429, {"Retry-After": "3"}), Response(200))
+    assert await polygon._polygon_get("https://api.polygon.io/x", {}, tries=5) == b"{}"
+    assert sleeps == [3.0, 3.0]
+    assert polygon.rate_limiter.throttles == [3.0, 3.0]
@@ -0,0 +1,103 @@
+"""Saving scan results: breakout_scans history, current_setups upserts and drops, and the write-behind buffer."""
+import pytest
+
+pytest.importorskip("supabase")
+
+import services.save_results as save_results
+from config import settings
+from models.candle import ScanResult
+from services.save_results import ScanWriteBuffer, save_scan_results
+
+
+class Tables:
+    """Upserts by the conflict key and `in` deletes, like PostgREST; `fail` makes the next writes raise."""
+
+    def __init__(self):
+        self.rows = {"breakout_scans": {}, "current_setups": {}}
+        self.fail = 0
+
+    async def insert_many(self, table: str, rows: list, on_conflict=None, **kwargs) -> int:
+        if self.fail:
+            self.fail -= 1
+            raise RuntimeError("supabase unavailable")
+        keys = on_conflict.split(",")
+        for row in rows:
+            self.rows[table][tuple(row[k] for k in keys)] = row
+        return 1
+
+    async def delete_in(self, table: str, column: str, values, **kwargs) -> int:
+        values = set(values)
+        self.rows[table] = {k: row for k, row in self.rows[table].items() if row[column] not in values}
+        return 1 if values else 0
+
+    def current(self) -> dict:
+        return {row["symbol"]: row["breakout_score"] for row in self.rows["current_setups"].values()}
+
+
+def _result(symbol: str, score: int = 50) -> ScanResult:
+    return ScanResult(
+        symbol=symbol, price=10.0, trigger_price=10.5, distance_pct=5.0, adr_pct_14=4.0,
+        ema21=9.8, ema50=9.5, ema200=8.0, avg_vol_50=1e6, setup_type="FLAT_TOP",
+        breakout_score=score, notes=[],
+    )
+
+
+@pytest.fixture
+def tables(monkeypatch) -> Tables:
+    tables = Tables()
+
+    async def notify(results):
+        return None
+
+    monkeypatch.setattr(save_results, "supabase", tables)
+    monkeypatch.setattr(save_results, "_notify_watchlist_users", notify)
+    monkeypatch.setattr(settings, "SCAN_WRITE_BEHIND", False)
+    return tables
+
+
+async def test_rescan_updates_the_session_row_and_current_setup(tables):
+    await save_scan_results([_result("AAA", 40), _result("BBB", 60)])
+    await save_scan_results([_result("AAA", 70)])
+
+    assert len(tables.rows["breakout_scans"]) == 2  # one row per symbol per session
+    assert tables.current() == {"AAA": 70, "BBB": 60}
+
+
+async def test_completed_scan_drops_symbols_it_no_longer_finds(tables):
+    await save_scan_results([_result("AAA"), _result("BBB"), _result("CCC")], scanned=["AAA", "BBB", "CCC"])
+    await save_scan_results([_result("AAA")], scanned=["aaa", "bbb", "ddd"])
+
+    # CCC wasn't in this scan's universe, so it stays; history is kept
+    assert tables.current() == {"AAA": 50, "CCC": 50}
+    assert len(tables.rows["breakout_scans"]) == 3
+
+    await save_scan_results([], scanned=["AAA"])
+    assert tables.current() == {"CCC": 50}
+
+
+async def test_buffer_keeps_the_latest_row_and_drops(tables):
+    buffer = ScanWriteBuffer()
+    buffer.add(save_results._scan_rows([_result("AAA", 40), _result("BBB")]))
+    buffer.add(save_results._scan_rows([_result("AAA", 70)]), dropped=["BBB", "CCC"])
+    buffer.add(save_results._scan_rows([_result("CCC", 30)]))
+    await buffer.close()
+
+    # BBB's buffered row is written, then dropped; CCC qualified again after its drop
+    assert tables.current() == {"AAA": 70, "CCC": 30}
+    assert not buffer.rows and not buffer.dropped
+
+
+async def test_failed_flush_keeps_rows_and_drops_for_the_next(tables, monkeypatch):
+    monkeypatch.setattr(settings, "SCAN_WRITE_FLUSH_INTERVAL", 60)
+    tables.rows["current_setups"][("OLD",)] = {"symbol": "OLD", "breakout_score": 10}
+    buffer = ScanWriteBuffer()
+    buffer.add(save_results._scan_rows([_result("AAA", 40)]), dropped=["OLD"])
+
+    tables.fail = 2
+    await buffer.flush()
+    assert tables.current() == {"OLD": 10}
+    assert buffer.dropped == {"OLD"}
+
+    buffer.add(save_results._scan_rows([_result("AAA", 70)]))
+    await buffer.close()
+    assert tables.current() == {"AAA": 70}
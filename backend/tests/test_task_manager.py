@@ -0,0 +1,129 @@
+"""TaskManager over both stores: dedup, shared cancel, reuse and liveness of tasks, field-wise updates and progress."""
+import asyncio
+from datetime import datetime, timedelta
+
+import fakeredis
+import pytest
+
+from config import settings
+from services.task_manager import InMemoryTaskStore, RedisTaskStore, TaskManager, request_fingerprint
+
+FINGERPRINT = "fp"
+
+
+@pytest.fixture(params=["memory", "redis"])
+def manager(request) -> TaskManager:
+    manager = TaskManager()
+    if request.param == "memory":
+        manager._store = InMemoryTaskStore()
+    else:
+        manager._store = RedisTaskStore(fakeredis.FakeAsyncRedis(decode_responses=True), settings.TASK_TTL)
+    return manager
+
+
+async def _age(manager: TaskManager, task_id: str, seconds: float):
+    """Pretend the task's last sign of life was `seconds` ago."""
+    then = datetime.utcnow() - timedelta(seconds=seconds)
+    await manager._update(task_id, created_at=then, started_at=then, heartbeat_at=then)
+
+
+async def test_running_task_without_heartbeat_is_failed_not_reused(manager):
+    task, _ = await manager.get_or_create_task("t1", FINGERPRINT, 600)
+    await manager.start_task("t1")
+    await _age(manager, "t1", 3 * settings.TASK_HEARTBEAT_INTERVAL)
+
+    assert await manager.find_task(FINGERPRINT, 600) is None
+    assert (await manager.get_task("t1")).status == "failed"
+
+    task, created = await manager.get_or_create_task("t2", FINGERPRINT, 600)
+    assert created and task.task_id == "t2"
+
+
+async def test_heartbeat_keeps_a_running_task_reusable(manager, monkeypatch):
+    monkeypatch.setattr(settings, "TASK_HEARTBEAT_INTERVAL", 0.05)
+    await manager.get_or_create_task("t1", FINGERPRINT, 600)
+    await manager.start_task("t1")
+
+    async with manager.heartbeat("t1"):
+        await asyncio.sleep(0.3)  # several intervals
+        task = await manager.find_task(FINGERPRINT, 600)
+        assert task is not None and task.status == "running"
+
+
+async def test_update_writes_only_changed_fields_of_existing_tasks(manager):
+    await manager.create_task("t1", {"type": "universe_scan"})
+    await manager.update_progress("t1", 1, 2, [{"symbol": "AAA"}])
+    await manager.start_task("t1")
+
+    task = await manager.get_task("t1")
+    assert task.status == "running" and task.metadata == {"type": "universe_scan"}
+    assert task.progress == {"done": 1, "total": 2, "found": 1}
+    assert not await manager._update("missing", status="running")
+    assert await manager.get_task("missing") is None
+
+
+async def test_progress_is_recorded_in_batches(manager):
+    await manager.create_task("t1", {"type": "universe_scan"})
+    await manager.update_progress("t1", 100, 300, [{"symbol": "AAA"}, {"symbol": "BBB"}])
+    await manager.update_progress("t1", 200, 300)
+    await manager.update_progress("t1", 300, 300, [{"symbol": "CCC"}])
+
+    task = await manager.get_task("t1")
+    assert task.progress == {"done": 300, "total": 300, "found": 3}
+    assert [r["symbol"] for r in task.partial_results] == ["AAA", "BBB", "CCC"]
+
+
+def test_fingerprint_ignores_symbol_order_and_case():
+    assert request_fingerprint("scan", ["aapl", "MSFT"], days=5) == request_fingerprint("scan", ["MSFT", "AAPL", "aapl"], days=5)
+    assert request_fingerprint("scan", ["AAPL"], days=5) != request_fingerprint("scan", ["AAPL"], days=6)
+
+
+async def test_concurrent_identical_requests_share_one_task(manager):
+    outcomes = await asyncio.gather(*(
+        manager.get_or_create_task(f"t{i}", FINGERPRINT, 600, owner=f"user{i}") for i in range(8)
+    ))
+
+    assert sum(created for _, created in outcomes) == 1
+    winner = next(task.task_id for task, created in outcomes if created)
+    assert {task.task_id for task, _ in outcomes} == {winner}
+    store = await manager.store()
+    assert await store.get_fingerprint(FINGERPRINT) == winner
+    for i in range(8):
+        if f"t{i}" != winner:
+            assert await store.load(f"t{i}") is None
+
+
+async def test_cancel_waits_for_the_last_attached_owner(manager):
+    await manager.get_or_create_task("t1", FINGERPRINT, 600, owner="alice")
+    await manager.get_or_create_task("t2", FINGERPRINT, 600, owner="bob")
+
+    assert await manager.cancel_task("t1", "mallory") == (None, False)
+    task, cancelling = await manager.cancel_task("t1", "alice")
+    assert task.task_id == "t1" and not cancelling
+    assert not await manager.is_cancelled("t1")
+    assert await manager.cancel_task("t1", "alice") == (None, False)  # already detached
+
+    task, cancelling = await manager.cancel_task("t1", "bob")
+    assert cancelling and await manager.is_cancelled("t1")
+
+
+async def test_completed_tasks_are_reused_until_max_age(manager):
+    await manager.get_or_create_task("t1", FINGERPRINT, 600)
+    await manager.start_task("t1")
+    await manager.complete_task("t1", {"results": [], "count": 0})
+
+    task, created = await manager.get_or_create_task("t2", FINGERPRINT, 600)
+    assert not created and task.task_id == "t1" and task.result == {"results": [], "count": 0}
+
+    await manager._update("t1", completed_at=datetime.utcnow() - timedelta(seconds=601))
+    task, created = await manager.get_or_create_task("t3", FINGERPRINT, 600)
+    assert created and task.task_id == "t3"
+
+
+@pytest.mark.parametrize("finish", ["fail_task", "mark_cancelled"])
+async def test_failed_and_cancelled_tasks_are_not_reused(manager, finish):
+    await manager.get_or_create_task("t1", FINGERPRINT, 600)
+    await (manager.fail_task("t1", "boom") if finish == "fail_task" else manager.mark_cancelled("t1"))
+
+    task, created = await manager.get_or_create_task("t2", FINGERPRINT, 600)
+    assert created and task.task_id == "t2"
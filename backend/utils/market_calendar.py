@@ -0,0 +1,215 @@
+"""
+NYSE trading calendar, computed locally (no API calls).
+
+Covers weekends, the exchange's full-day holidays with their observed-date
+rules, and the 1:00 PM early closes. Session times are US/Eastern; the
+public helpers accept and return timezone-aware datetimes (naive inputs are
+taken as UTC, matching datetime.utcnow() used across the backend).
+
+Also decides cache expiry per data kind, so cached data lives exactly as
+long as it can't change: daily bars until the next close, snapshots for
+seconds during the session, reference data for a week.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, FrozenSet, Optional
+from zoneinfo import ZoneInfo
+
+from config import settings
+
+NY = ZoneInfo("America/New_York")
+
+SESSION_OPEN = time(9, 30)
+SESSION_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+
+# Daily aggregates are finalized shortly after the close
+CLOSE_SETTLE = timedelta(minutes=15)
+
+# Cache data kinds (see cache_ttl)
+DAILY_BARS = "daily_bars"
+SNAPSHOT = "snapshot"
+REFERENCE = "reference"
+
+REFERENCE_TTL = 7 * 86400
+
+
+def _observed(d: date) -> date:
+    """Saturday holidays are observed Friday, Sunday holidays Monday."""
+    if d.weekday() == 5:
+        return d - timedelta(days=1)
+    if d.weekday() == 6:
+        return d + timedelta(days=1)
+    return d
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th (1-based) given weekday of a month; n=-1 for the last one."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+@lru_cache(maxsize=64)
+def holidays(year: int) -> Dict[date, str]:
+    """Full-day NYSE closures in a year, keyed by observed date."""
+    days = {
+        _nth_weekday(year, 1, 0, 3): "Martin Luther King Jr. Day",
+        _nth_weekday(year, 2, 0, 3): "Washington's Birthday",
+        _easter(year) - timedelta(days=2): "Good Friday",
+        _nth_weekday(year, 5, 0, -1): "Memorial Day",
+        _observed(date(year, 7, 4)): "Independence Day",
+        _nth_weekday(year, 9, 0, 1): "Labor Day",
+        _nth_weekday(year, 11, 3, 4): "Thanksgiving Day",
+        _observed(date(year, 12, 25)): "Christmas Day",
+    }
+    # A Saturday New Year's Day is not observed (the Friday is a year-end session)
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        days[_observed(new_year)] = "New Year's Day"
+    if year >= 2022:
+        days[_observed(date(year, 6, 19))] = "Juneteenth"
+    return days
+
+
+@lru_cache(maxsize=64)
+def early_closes(year: int) -> FrozenSet[date]:
+    """1:00 PM closes: July 3, the day after Thanksgiving and Christmas Eve (when sessions)."""
+    candidates = (
+        date(year, 7, 3),
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),
+        date(year, 12, 24),
+    )
+    return frozenset(d for d in candidates if is_trading_day(d))
+
+
+def is_trading_day(d: date) -> bool:
+    """Whether the exchange holds a session on a date."""
+    return d.weekday() < 5 and d not in holidays(d.year)
+
+
+def next_trading_day(d: date) -> date:
+    """First trading day strictly after d."""
+    d += timedelta(days=1)
+    while not is_trading_day(d):
+        d += timedelta(days=1)
+    return d
+
+
+def previous_trading_day(d: date) -> date:
+    """Last trading day strictly before d."""
+    d -= timedelta(days=1)
+    while not is_trading_day(d):
+        d -= timedelta(days=1)
+    return d
+
+
+def session_open(d: date) -> datetime:
+    """Opening time (aware, US/Eastern) of the session on a trading day."""
+    return datetime.combine(d, SESSION_OPEN, tzinfo=NY)
+
+
+def session_close(d: date) -> datetime:
+    """Closing time (aware, US/Eastern) of the session on a trading day."""
+    close = EARLY_CLOSE if d in early_closes(d.year) else SESSION_CLOSE
+    return datetime.combine(d, close, tzinfo=NY)
+
+
+def _now(now: Optional[datetime]) -> datetime:
+    if now is None:
+        return datetime.now(timezone.utc)
+    return now if now.tzinfo else now.replace(tzinfo=timezone.utc)
+
+
+def is_market_open(now: Optional[datetime] = None) -> bool:
+    """Whether the regular session is in progress."""
+    now = _now(now).astimezone(NY)
+    today = now.date()
+    return is_trading_day(today) and session_open(today) <= now < session_close(today)
+
+
+def next_open(now: Optional[datetime] = None) -> datetime:
+    """Next session open strictly after now (aware, US/Eastern)."""
+    now = _now(now).astimezone(NY)
+    today = now.date()
+    if is_trading_day(today) and now < session_open(today):
+        return session_open(today)
+    return session_open(next_trading_day(today))
+
+
+def next_close(now: Optional[datetime] = None) -> datetime:
+    """Next session close strictly after now (aware, US/Eastern)."""
+    now = _now(now).astimezone(NY)
+    today = now.date()
+    if is_trading_day(today) and now < session_close(today):
+        return session_close(today)
+    return session_close(next_trading_day(today))
+
+
+def last_close(now: Optional[datetime] = None) -> datetime:
+    """Most recent session close at or before now (aware, US/Eastern)."""
+    now = _now(now).astimezone(NY)
+    today = now.date()
+    if is_trading_day(today) and now >= session_close(today):
+        return session_close(today)
+    return session_close(previous_trading_day(today))
+
+
+def latest_session(now: Optional[datetime] = None) -> date:
+    """Most recent trading day whose session has opened (the date of the newest daily bar)."""
+    now = _now(now).astimezone(NY)
+    today = now.date()
+    if is_trading_day(today) and now >= session_open(today):
+        return today
+    return previous_trading_day(today)
+
+
+def daily_bars_expiry(now: Optional[datetime] = None) -> datetime:
+    """
+    When daily bars fetched at `now` go stale. While a session is running
+    (or its bar is settling) the last bar is still moving, so they are only
+    good for CACHE_INTRADAY_TTL; afterwards nothing changes until the next
+    session's close.
+    """
+    now = _now(now)
+    if now < last_close(now) + CLOSE_SETTLE or is_market_open(now):
+        return now + timedelta(seconds=settings.CACHE_INTRADAY_TTL)
+    return next_close(now) + CLOSE_SETTLE
+
+
+def cache_ttl(kind: str, now: Optional[datetime] = None) -> int:
+    """
+    Seconds a value of a data kind stays valid when cached at `now`:
+    DAILY_BARS until the next close (short-lived during the session),
+    SNAPSHOT for CACHE_SNAPSHOT_TTL during the session and until the next
+    open outside it, REFERENCE for a week. Unknown kinds get CACHE_TTL.
+    """
+    now = _now(now)
+    if kind == DAILY_BARS:
+        expires_at = daily_bars_expiry(now)
+    elif kind == SNAPSHOT:
+        if is_market_open(now):
+            return settings.CACHE_SNAPSHOT_TTL
+        expires_at = next_open(now)
+    elif kind == REFERENCE:
+        return REFERENCE_TTL
+    else:
+        return settings.CACHE_TTL
+    return max(1, int((expires_at - now).total_seconds()))